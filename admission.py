@@ -0,0 +1,168 @@
+# ==================================================================================
+#  FILE: admission.py
+#  DESCRIPTION: Admission Control (Token Buckets per User / IP / Tier + In-Flight Load Shedding)
+# ==================================================================================
+#  - Har request ka ek "cost" hota hai (chat 1, research 2, agent 8, pro image 10 ...).
+#  - Teen buckets check hote hain: user ka (tier ke hisaab se), IP ka (guest churn pakadne ke liye),
+#    aur poore tier ka shared pool (guest/free spike pro ki capacity na kha jaaye).
+#  - Buckets Mongo mein (sab workers share karte hain), ek atomic pipeline update per bucket,
+#    server clock ($$NOW) se refill. Mongo fail ho toh per-worker memory buckets (fail-open nahi).
+#  - In-flight cap per worker: limit bhar gayi toh turant 429, queue mein latakna nahi. Yeh count
+#    process ki memory mein hai (shared nahi): poore deploy ka cap = MAX_INFLIGHT_PER_WORKER x workers.
+#    Isse worker ka event loop/threads bachte hain; shared fairness token buckets (Mongo) se aati hai.
+# ==================================================================================
+
+import asyncio
+import math
+import os
+import time
+from collections import Counter
+
+from pymongo import ReturnDocument
+
+from metrics import metrics
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+ADMISSION_STORE = os.getenv("ADMISSION_STORE", "mongo")   # mongo | memory
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 1))
+TIER_CACHE_TTL = 60
+
+# tier -> (burst capacity, refill tokens/sec). Guest ~6/min, free ~30/min, pro ~120/min
+TIER_LIMITS = {"guest": (10, 0.1), "free": (30, 0.5), "pro": (120, 2.0)}
+IP_LIMIT = (60, 1.0)   # ek IP ke saare guests/accounts milake (pro pe nahi lagta: office NAT)
+# Poore tier ka ek pool; pro ka koi pool nahi
+TIER_POOLS = {"guest": (150, 5.0), "free": (600, 20.0)}
+# Ek worker process mein ek saath kitni requests (workers badhao toh inhe ghatao)
+MAX_INFLIGHT_PER_WORKER = {
+    "guest": int(os.getenv("ADMISSION_INFLIGHT_GUEST", 6)),
+    "free": int(os.getenv("ADMISSION_INFLIGHT_FREE", 24)),
+    "pro": int(os.getenv("ADMISSION_INFLIGHT_PRO", 96)),
+}
+ACTION_COSTS = {"chat": 1, "research": 2, "custom": 1, "speak": 0.5, "image_gen:free": 3, "image_gen:pro": 10}
+SHED_RETRY_AFTER = 2
+
+class Decision:
+    def __init__(self, ok, retry_after=0, reason=None):
+        self.ok = ok
+        self.retry_after = retry_after
+        self.reason = reason   # user | ip | tier | overloaded
+
+class MemoryBuckets:
+    """Per-worker buckets. Mongo na ho (ya down ho) tab."""
+
+    def __init__(self):
+        self._buckets = {}   # key -> [tokens, updated_at]
+
+    async def take(self, key, capacity, rate, cost):
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        granted = tokens >= cost
+        if granted: tokens -= cost
+        self._buckets[key] = [tokens, now]
+        if len(self._buckets) > 100000: self._prune(now)
+        return granted, tokens
+
+    async def refund(self, key, cost):
+        if key in self._buckets: self._buckets[key][0] += cost
+
+    def _prune(self, now):
+        # Jo bucket itni der se untouched hai woh waise bhi full ho chuka hoga
+        for key in [k for k, (_, updated) in self._buckets.items() if now - updated > 3600]:
+            self._buckets.pop(key, None)
+
+class MongoBuckets:
+    """Doc: {_id: key, tokens, updated_at, expires_at}. Refill + take ek hi atomic update mein."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def take(self, key, capacity, rate, cost):
+        elapsed = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}, 1000]}
+        doc = await self.collection.find_one_and_update({"_id": key}, [
+            {"$set": {"tokens": {"$min": [capacity, {"$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed, rate]}]}]}, "updated_at": "$$NOW"}},
+            {"$set": {"granted": {"$gte": ["$tokens", cost]}}},
+            # Poora refill hone tak hi doc ki zarurat hai, uske baad naya doc = full bucket
+            {"$set": {"tokens": {"$cond": ["$granted", {"$subtract": ["$tokens", cost]}, "$tokens"]}, "expires_at": {"$add": ["$$NOW", int(capacity / rate * 1000)]}}},
+        ], upsert=True, return_document=ReturnDocument.AFTER)
+        return doc["granted"], doc["tokens"]
+
+    async def refund(self, key, cost):
+        await self.collection.update_one({"_id": key}, {"$inc": {"tokens": cost}})
+
+class Admission:
+    def __init__(self, store):
+        self.store = store
+        self.fallback = MemoryBuckets()
+        self.inflight = Counter()
+        self._tiers = {}   # email -> (tier, expires_at)
+        self._store_error_at = 0.0
+
+    async def ensure_indexes(self):
+        if hasattr(self.store, "ensure_indexes"): await self.store.ensure_indexes()
+
+    async def tier_for(self, user, is_pro):
+        """is_pro: async fn(email) -> bool. Result 60s cache (admin ne plan badla toh minute bhar mein lagega)."""
+        email = user.get("email", "")
+        if user.get("is_guest") or email.startswith("guest_"): return "guest"
+        cached = self._tiers.get(email)
+        if cached and cached[1] > time.time(): return cached[0]
+        tier = "pro" if await is_pro(email) else "free"
+        self._tiers[email] = (tier, time.time() + TIER_CACHE_TTL)
+        if len(self._tiers) > 50000: self._tiers.clear()
+        return tier
+
+    async def _take(self, key, capacity, rate, cost):
+        try: return await self.store.take(key, capacity, rate, cost)
+        except Exception as e:
+            if time.time() - self._store_error_at > 60:
+                print(f"Admission Store Error (using per-worker buckets): {e}")
+                self._store_error_at = time.time()
+            return await self.fallback.take(key, capacity, rate, cost)
+
+    async def _refund(self, key, cost):
+        try: await self.store.refund(key, cost)
+        except Exception: await self.fallback.refund(key, cost)
+
+    async def admit(self, identity, ip, tier, cost, shed=False):
+        """shed=True: in-flight slot bhi lo; admit hone pe baad mein release(tier) zaroor karo."""
+        if not ADMISSION_ENABLED: return Decision(True)
+        started = time.perf_counter()
+        decision = await self._decide(identity, ip, tier, cost, shed)
+        result = "ok" if decision.ok else ("shed" if decision.reason == "overloaded" else "limited")
+        metrics.observe("admission_seconds", time.perf_counter() - started, tier=tier, result=result, reason=decision.reason)
+        return decision
+
+    async def _decide(self, identity, ip, tier, cost, shed):
+        if shed:
+            if self.inflight[tier] >= MAX_INFLIGHT_PER_WORKER.get(tier, MAX_INFLIGHT_PER_WORKER["free"]):
+                return Decision(False, SHED_RETRY_AFTER, "overloaded")
+            # Bucket check ke await se pehle hi slot le lo, warna ek saath aaye requests sab pass ho jaate
+            self.inflight[tier] += 1
+        capacity, rate = TIER_LIMITS.get(tier, TIER_LIMITS["free"])
+        checks = [("user", f"user:{identity}", capacity, rate)]
+        if ip and tier != "pro": checks.append(("ip", f"ip:{ip}", *IP_LIMIT))
+        if tier in TIER_POOLS: checks.append(("tier", f"tier:{tier}", *TIER_POOLS[tier]))
+        # Cost bucket ki capacity se zyada ho toh kabhi pass hi nahi hogi
+        results = await asyncio.gather(*(self._take(key, cap, r, min(cost, cap)) for _, key, cap, r in checks))
+
+        denied = [(reason, math.ceil((min(cost, cap) - tokens) / r)) for (reason, _, cap, r), (granted, tokens) in zip(checks, results) if not granted]
+        if denied:
+            # Jo buckets ne de diya tha woh wapas, warna ek bucket ki denial doosre ko bhi khaali karti
+            await asyncio.gather(*(self._refund(key, min(cost, cap)) for (_, key, cap, _), (granted, _) in zip(checks, results) if granted))
+            if shed: self.release(tier)
+            reason, wait = max(denied, key=lambda d: d[1])
+            return Decision(False, max(1, wait), reason)
+        return Decision(True)
+
+    def release(self, tier):
+        if self.inflight[tier] > 0: self.inflight[tier] -= 1
+
+def client_ip(request):
+    # Proxy (Render/Nginx) X-Forwarded-For ke end mein asli client jodta hai; shuru wala client khud bhej sakta hai
+    forwarded = [p.strip() for p in request.headers.get("x-forwarded-for", "").split(",") if p.strip()]
+    if forwarded and TRUSTED_PROXY_HOPS: return forwarded[-min(TRUSTED_PROXY_HOPS, len(forwarded))]
+    return request.client.host if request.client else None
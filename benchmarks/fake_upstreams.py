@@ -0,0 +1,195 @@
+# ==================================================================================
+#  FILE: benchmarks/fake_upstreams.py
+#  DESCRIPTION: Offline Stand-Ins for Every Upstream (Groq, OpenRouter, Gemini, Pinecone,
+#               Brevo, Hugging Face, Pollinations, Exchange Rates) with Configurable Latency / Errors
+# ==================================================================================
+#  Usage (standalone): python benchmarks/fake_upstreams.py --port 9100 [--profile profile.json]
+#  load_test.py isse apne process mein hi chalata hai.
+#
+#  Profile: {"groq": {"latency_ms": 400, "jitter_ms": 150, "error_rate": 0.01, "token_ms": 10}, ...}
+#  latency = latency_ms + exponential(jitter_ms)  -> real providers jaisi lambi tail
+# ==================================================================================
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+DEFAULT_PROFILE = {
+    "groq": {"latency_ms": 350, "jitter_ms": 150, "error_rate": 0.0, "token_ms": 8},
+    "openrouter": {"latency_ms": 800, "jitter_ms": 400, "error_rate": 0.02, "token_ms": 20},
+    "gemini": {"latency_ms": 600, "jitter_ms": 250, "error_rate": 0.0, "token_ms": 12},
+    "pinecone": {"latency_ms": 40, "jitter_ms": 20, "error_rate": 0.0},
+    "brevo": {"latency_ms": 150, "jitter_ms": 50, "error_rate": 0.0},
+    # cold_start_rate: itne fraction requests pe 503 + estimated_time (model loading)
+    "huggingface": {"latency_ms": 4000, "jitter_ms": 2000, "error_rate": 0.0, "cold_start_rate": 0.05, "cold_start_s": 2},
+    "pollinations": {"latency_ms": 1500, "jitter_ms": 800, "error_rate": 0.01},
+}
+
+# 1x1 PNG: image endpoints ke liye kaafi hai
+PNG_BYTES = base64.b64decode("iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==")
+EMBED_DIM = 768
+REPLY_WORDS = ("Sure", "here", "is", "a", "short", "answer", "that", "sounds", "natural", "and", "helpful", "for", "you")
+
+def merge_profile(overrides=None):
+    profile = {name: dict(cfg) for name, cfg in DEFAULT_PROFILE.items()}
+    for name, cfg in (overrides or {}).items(): profile.setdefault(name, {}).update(cfg)
+    return profile
+
+def build_fake_app(profile=None, seed=None):
+    profile = merge_profile(profile)
+    rng = random.Random(seed)
+    app = FastAPI(title="fake-upstreams")
+    app.state.calls = {name: 0 for name in profile}
+    vectors = {}   # Pinecone stand-in: namespace -> {id: (values, metadata)}
+
+    async def delay(provider):
+        cfg = profile[provider]
+        app.state.calls[provider] += 1
+        jitter = cfg.get("jitter_ms", 0)
+        await asyncio.sleep((cfg.get("latency_ms", 0) + (rng.expovariate(1 / jitter) if jitter else 0)) / 1000)
+        return rng.random() < cfg.get("error_rate", 0)
+
+    def fake_text(prompt, words=40):
+        # Prompt length ke hisaab se thoda lamba jawab, deterministic-ish
+        n = max(8, min(words, len(prompt) // 20))
+        return " ".join(rng.choice(REPLY_WORDS) for _ in range(n)) + "."
+
+    async def chat_completion(provider, request):
+        body = await request.json()
+        if await delay(provider):
+            return JSONResponse({"error": {"message": f"fake {provider} failure", "type": "server_error"}}, 503)
+        prompt = " ".join(str(m.get("content", "")) for m in body.get("messages", []))
+        text, model = fake_text(prompt), body.get("model", "fake")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        if body.get("stream"):
+            token_ms = profile[provider].get("token_ms", 10)
+            async def stream():
+                for word in text.split(" "):
+                    chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                             "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    await asyncio.sleep(token_ms / 1000)
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(stream(), media_type="text/event-stream")
+        return {
+            "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4, "total_tokens": (len(prompt) + len(text)) // 4},
+        }
+
+    def fake_embedding(content):
+        text = " ".join(p.get("text", "") for p in content.get("parts", []))
+        seeded = random.Random(text)
+        values = [seeded.uniform(-1, 1) for _ in range(EMBED_DIM)]
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+    @app.post("/openai/v1/chat/completions")
+    async def groq_chat(request: Request): return await chat_completion("groq", request)
+
+    @app.post("/api/v1/chat/completions")
+    async def openrouter_chat(request: Request): return await chat_completion("openrouter", request)
+
+    @app.post("/v1beta/models/{model_action:path}")
+    async def gemini(model_action: str, request: Request):
+        body = await request.json()
+        if await delay("gemini"): return JSONResponse({"error": {"code": 503, "message": "fake gemini failure", "status": "UNAVAILABLE"}}, 503)
+        if model_action.endswith(":embedContent"):
+            return {"embedding": {"values": fake_embedding(body.get("content", {}))}}
+        if model_action.endswith(":batchEmbedContents"):
+            return {"embeddings": [{"values": fake_embedding(r.get("content", {}))} for r in body.get("requests", [])]}
+        prompt = " ".join(p.get("text", "") for c in body.get("contents", []) for p in c.get("parts", []) if isinstance(p, dict))
+        return {"candidates": [{"content": {"parts": [{"text": fake_text(prompt)}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+                "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": 30, "totalTokenCount": len(prompt) // 4 + 30}}
+
+    @app.post("/query")
+    async def pinecone_query(request: Request):
+        body = await request.json()
+        if await delay("pinecone"): return JSONResponse({"code": 14, "message": "fake pinecone failure"}, 503)
+        query, flt = body.get("vector") or [], body.get("filter") or {}
+        matches = []
+        for vid, (values, metadata) in vectors.get(body.get("namespace", ""), {}).items():
+            if any(metadata.get(k) != (v.get("$eq") if isinstance(v, dict) else v) for k, v in flt.items()): continue
+            matches.append({"id": vid, "score": sum(a * b for a, b in zip(query, values)), "values": [], "metadata": metadata if body.get("includeMetadata") else None})
+        matches.sort(key=lambda m: -m["score"])
+        return {"matches": matches[:body.get("topK", 10)], "namespace": body.get("namespace", ""), "usage": {"readUnits": 1}}
+
+    @app.post("/vectors/upsert")
+    async def pinecone_upsert(request: Request):
+        body = await request.json()
+        if await delay("pinecone"): return JSONResponse({"code": 14, "message": "fake pinecone failure"}, 503)
+        space = vectors.setdefault(body.get("namespace", ""), {})
+        for v in body.get("vectors", []): space[v["id"]] = (v.get("values", []), v.get("metadata") or {})
+        return {"upsertedCount": len(body.get("vectors", []))}
+
+    @app.get("/vectors/fetch")
+    async def pinecone_fetch(request: Request):
+        if await delay("pinecone"): return JSONResponse({"code": 14, "message": "fake pinecone failure"}, 503)
+        namespace = request.query_params.get("namespace", "")
+        space = vectors.get(namespace, {})
+        found = {vid: {"id": vid, "values": space[vid][0], "metadata": space[vid][1]} for vid in request.query_params.getlist("ids") if vid in space}
+        return {"vectors": found, "namespace": namespace, "usage": {"readUnits": 1}}
+
+    @app.post("/describe_index_stats")
+    async def pinecone_stats(request: Request):
+        await delay("pinecone")
+        counts = {ns: {"vectorCount": len(space)} for ns, space in vectors.items() if space}
+        return {"namespaces": counts, "dimension": EMBED_DIM, "indexFullness": 0.0, "totalVectorCount": sum(c["vectorCount"] for c in counts.values())}
+
+    @app.post("/vectors/delete")
+    async def pinecone_delete(request: Request):
+        body = await request.json()
+        await delay("pinecone")
+        space = vectors.get(body.get("namespace", ""), {})
+        if body.get("deleteAll"): space.clear()
+        for vid in body.get("ids", []): space.pop(vid, None)
+        return {}
+
+    @app.post("/v3/smtp/email")
+    async def brevo(request: Request):
+        if await delay("brevo"): return JSONResponse({"code": "internal_error"}, 500)
+        return JSONResponse({"messageId": f"<{uuid.uuid4().hex}@fake.brevo>"}, 201)
+
+    @app.post("/models/{model_id:path}")
+    async def huggingface(model_id: str, request: Request):
+        cfg = profile["huggingface"]
+        if rng.random() < cfg.get("cold_start_rate", 0):
+            app.state.calls["huggingface"] += 1
+            return JSONResponse({"error": f"Model {model_id} is currently loading", "estimated_time": cfg.get("cold_start_s", 2)}, 503)
+        if await delay("huggingface"): return JSONResponse({"error": "fake hf failure"}, 500)
+        return Response(PNG_BYTES, media_type="image/png")
+
+    @app.get("/p/{prompt:path}")
+    @app.get("/prompt/{prompt:path}")
+    async def pollinations(prompt: str):
+        if await delay("pollinations"): return Response(b"busy", status_code=502)
+        return Response(PNG_BYTES, media_type="image/png")
+
+    @app.get("/v6/latest/{base}")
+    async def exchange_rates(base: str):
+        # open.er-api.com jaisa shape; currency_engine ka HTTPRateSource isi ko padhta hai
+        return {"result": "success", "base_code": base.upper(), "time_last_update_utc": time.strftime("%a, %d %b %Y 00:00:01 +0000", time.gmtime()),
+                "rates": {"USD": 1, "INR": 83.2, "EUR": 0.92, "GBP": 0.79, "JPY": 151.4, "AED": 3.67}}
+
+    @app.get("/_stats")
+    async def stats(): return {"calls": app.state.calls, "vectors": len(vectors)}
+
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Run fake upstream providers")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--profile", help="JSON file with per-provider overrides")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    overrides = json.load(open(args.profile)) if args.profile else None
+    uvicorn.run(build_fake_app(overrides, args.seed), host="127.0.0.1", port=args.port, log_level="warning")
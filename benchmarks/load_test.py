@@ -0,0 +1,362 @@
+# ==================================================================================
+#  FILE: benchmarks/load_test.py
+#  DESCRIPTION: Offline End-to-End Load Test (Fake Upstreams + Local/In-Memory Mongo +
+#               Scripted User Scenarios -> Throughput and p50/p95/p99 per Endpoint)
+# ==================================================================================
+#  Usage:
+#    python benchmarks/load_test.py --users 40 --duration 60 --json results/load.json
+#    python benchmarks/load_test.py --mongo-url mongodb://127.0.0.1:27017 --baseline results/load.json
+#
+#  - Upstreams: benchmarks/fake_upstreams.py (alag thread, apna event loop). --profile se latency/errors badlo.
+#    Single-core machine pe fakes ko alag process mein chalao (--fakes-url), warna GIL share hota hai.
+#  - Mongo: --mongo-url (throwaway mongod!) warna mongomock-motor (pip install mongomock-motor).
+#  - App: main.py uvicorn pe alag thread mein; virtual users asli HTTP se hit karte hain.
+#  - --baseline: kisi endpoint ka p95 threshold se zyada badha toh exit code 1.
+#  Koi bhi request internet pe nahi jaati.
+# ==================================================================================
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Scenario -> weight (har virtual user har iteration mein ek chunta hai)
+SCENARIO_WEIGHTS = {"chat": 50, "tool": 20, "history": 20, "image": 7, "admin": 3}
+TOOL_MODES = ("grammar_fixer", "interview_questions", "qr_generator", "code_debugger", "smart_todo")
+PROMPTS = (
+    "Hi! How was your day?", "Mujhe kal exam ke liye motivate karo", "Explain recursion like I am five",
+    "I like playing guitar and my birthday is in March", "Write a haiku about monsoon", "What should I cook tonight?",
+)
+
+def percentile(values, pct):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+# ==================================================================================
+# [CATEGORY] ENVIRONMENT (fakes + app)
+# ==================================================================================
+def point_env_at_fakes(fake_url, mongo_url, admission=False):
+    """main.py import hone se PEHLE: saare providers fake server pe, keys fake, pools khaali."""
+    os.environ.update({
+        # Saare virtual users ek hi IP + tier se aate hain; default mein rate limits band (app latency naapni hai)
+        "ADMISSION_ENABLED": "1" if admission else "0",
+        # mongomock pipeline updates theek se nahi chalata
+        "ADMISSION_STORE": "memory" if mongo_url == "mongodb://memory" else "mongo",
+        "MONGO_URL": mongo_url,
+        "GROQ_BASE_URL": fake_url, "GROQ_API_KEY": "fake-groq", "GROQ_API_KEY_POOL": "",
+        "OPENROUTER_BASE_URL": f"{fake_url}/api/v1", "OPENROUTER_API_KEY": "fake-openrouter", "OPENROUTER_API_KEY_POOL": "",
+        "GEMINI_API_ENDPOINT": fake_url, "GEMINI_API_KEY": "fake-gemini", "GEMINI_API_KEY_POOL": "",
+        "PINECONE_HOST": fake_url, "PINECONE_API_KEY": "fake-pinecone",
+        "BREVO_BASE_URL": fake_url, "BREVO_API_KEY": "fake-brevo",
+        "HF_INFERENCE_URL": f"{fake_url}/models", "HF_TOKEN": "fake-hf", "HUGGINGFACE_PRO_TOKEN": "fake-hf-pro",
+        "POLLINATIONS_URL": fake_url, "POLLINATIONS_IMAGE_URL": fake_url,
+        "CURRENCY_RATES_URL": f"{fake_url}/v6/latest/USD",
+        "METRICS_TOKEN": "",
+    })
+
+class ServerThread(threading.Thread):
+    """uvicorn.Server ko apne thread + event loop mein chalata hai."""
+
+    def __init__(self, app, port):
+        super().__init__(daemon=True)
+        import uvicorn
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+
+    def run(self): self.server.run()
+
+    def wait_started(self, timeout=60):
+        deadline = time.time() + timeout
+        while not self.server.started:
+            if time.time() > deadline or not self.is_alive(): raise RuntimeError("server did not start")
+            time.sleep(0.05)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.join(timeout=10)
+
+def use_memory_mongo():
+    try: import mongomock_motor
+    except ImportError:
+        sys.exit("In-memory Mongo ke liye `pip install mongomock-motor` karo, ya --mongo-url do.")
+    import motor.motor_asyncio
+    # main.py module level pe AsyncIOMotorClient(MONGO_URL) banata hai
+    motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+    patch_mongomock()
+
+def patch_mongomock():
+    """mongomock ke do gaps jo app use karta hai: find projection mein expressions ($size)
+    aur naye pymongo ka UpdateOne(sort=...) bulk_write mein."""
+    import mongomock.collection as mc
+
+    add_update = mc.BulkOperationBuilder.add_update
+    def add_update_compat(self, *args, sort=None, **kwargs): return add_update(self, *args, **kwargs)
+    mc.BulkOperationBuilder.add_update = add_update_compat
+
+    find_one = mc.Collection.find_one
+    def find_one_compat(self, filter=None, *args, **kwargs):
+        projection = args[0] if args else kwargs.get("projection")
+        computed = isinstance(projection, dict) and any(isinstance(v, dict) and not {"$slice", "$elemMatch"} & set(v) for v in projection.values())
+        if not computed: return find_one(self, filter, *args, **kwargs)
+        # find ka {"$slice": n} aggregation mein {"$slice": ["$field", n]} hota hai
+        projection = {k: {"$slice": [f"${k}", v["$slice"]]} if isinstance(v, dict) and set(v) == {"$slice"} and not isinstance(v["$slice"], list) else v for k, v in projection.items()}
+        docs = list(self.aggregate([{"$match": filter or {}}, {"$limit": 1}, {"$project": projection}]))
+        return docs[0] if docs else None
+    mc.Collection.find_one = find_one_compat
+
+# ==================================================================================
+# [CATEGORY] SEED DATA
+# ==================================================================================
+async def seed(db, session_store_cls, users, admin_email, chats_per_user=6, messages_per_chat=20):
+    """Users, purani chats (history browsing ke liye) aur logged-in sessions."""
+    from datetime import datetime, timedelta
+    from memory_store import text_hash
+    store = session_store_cls(db.sessions)
+    now = datetime.utcnow()
+    accounts = []
+    for i in range(users + 1):
+        email = admin_email if i == users else f"loadtest+{i}@example.com"
+        await db.users.update_one({"email": email}, {"$set": {"email": email, "name": f"Load User {i}", "is_pro": i % 5 == 0}}, upsert=True)
+        for text in ("Likes chai", "Studies CS"):
+            await db.memories.update_one({"email": email, "text_hash": text_hash(text)}, {"$setOnInsert": {"text": text, "source": "seed", "created_at": now, "updated_at": now}}, upsert=True)
+        session_ids = []
+        for c in range(chats_per_user if i < users else 0):
+            sid = f"lt-{i}-{c}"
+            session_ids.append(sid)
+            messages = [{"role": "user" if m % 2 == 0 else "assistant", "content": f"{random.choice(PROMPTS)} ({m})", "timestamp": now - timedelta(minutes=messages_per_chat - m)} for m in range(messages_per_chat)]
+            await db.chats.update_one({"session_id": sid}, {"$set": {
+                "session_id": sid, "user_email": email, "title": f"Chat - seed {c}", "messages": messages,
+                "last_activity": now - timedelta(hours=c), "version": messages_per_chat}}, upsert=True)
+        cookie_sid = uuid.uuid4().hex
+        await store.save(cookie_sid, {"user": {"email": email, "name": f"Load User {i}", "picture": ""}})
+        accounts.append({"email": email, "cookie": cookie_sid, "sessions": session_ids, "admin": email == admin_email, "pro": i % 5 == 0})
+    return accounts[:-1], accounts[-1]
+
+# ==================================================================================
+# [CATEGORY] SCENARIOS
+# ==================================================================================
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)   # endpoint -> [ms]
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client, endpoint, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kwargs)
+            status = resp.status_code
+        except Exception as e:
+            resp, status = None, type(e).__name__
+        self.samples[endpoint].append((time.perf_counter() - started) * 1000)
+        self.statuses[endpoint][str(status)] += 1
+        ok = resp is not None and resp.status_code < 400
+        # App errors bhi 200 ke saath "⚠️" reply deta hai
+        if ok and resp.headers.get("content-type", "").startswith("application/json"):
+            try:
+                body = resp.json()
+                if isinstance(body, dict) and str(body.get("reply", "")).startswith("⚠️ Server Error"): ok = False
+            except ValueError: pass
+        if not ok: self.errors[endpoint] += 1
+        return resp
+
+async def scenario_chat(client, rec, account, rng):
+    sid = rng.choice(account["sessions"] + [f"lt-new-{uuid.uuid4().hex[:8]}"])
+    await rec.request(client, "POST /api/chat [chat]", "POST", "/api/chat", json={"message": rng.choice(PROMPTS), "session_id": sid, "mode": "chat"})
+
+async def scenario_tool(client, rec, account, rng):
+    mode = rng.choice(TOOL_MODES)
+    await rec.request(client, f"POST /api/chat [{mode}]", "POST", "/api/chat", json={"message": rng.choice(PROMPTS), "session_id": f"lt-tool-{uuid.uuid4().hex[:8]}", "mode": mode})
+
+async def scenario_history(client, rec, account, rng):
+    resp = await rec.request(client, "GET /api/history", "GET", "/api/history")
+    if resp is not None and resp.status_code == 200:
+        cursor = resp.json().get("next_cursor")
+        if cursor: await rec.request(client, "GET /api/history?cursor", "GET", "/api/history", params={"cursor": cursor})
+    if account["sessions"]:
+        sid = rng.choice(account["sessions"])
+        resp = await rec.request(client, "GET /api/chat/{id}", "GET", f"/api/chat/{sid}")
+        if resp is not None and resp.status_code == 200 and resp.headers.get("etag"):
+            await rec.request(client, "GET /api/chat/{id} (revalidate)", "GET", f"/api/chat/{sid}", headers={"If-None-Match": resp.headers["etag"]})
+
+async def scenario_image(client, rec, account, rng, poll_interval=0.5, max_wait=60):
+    # Pro engine server sirf pro accounts ko deta hai
+    tier = rng.choice(("free", "pro")) if account["pro"] else "free"
+    resp = await rec.request(client, f"POST /api/image_gen [{tier}]", "POST", "/api/image_gen", json={"prompt": rng.choice(PROMPTS), "style": "realistic", "tier": tier})
+    if resp is None or resp.status_code != 202: return
+    job_id, started, status = resp.json()["job_id"], time.perf_counter(), "timeout"
+    while time.perf_counter() - started < max_wait:
+        await asyncio.sleep(poll_interval)
+        poll = await rec.request(client, "GET /api/image_gen/{id}", "GET", f"/api/image_gen/{job_id}")
+        if poll is None or poll.status_code != 200: return
+        if poll.json().get("status") in ("done", "error"):
+            status = poll.json()["status"]
+            break
+    # Job submit se result tak ka time (user ko yahi dikhta hai)
+    endpoint = f"image job end-to-end [{tier}]"
+    rec.samples[endpoint].append((time.perf_counter() - started) * 1000)
+    rec.statuses[endpoint][status] += 1
+    if status != "done": rec.errors[endpoint] += 1
+
+async def scenario_admin(client, rec, admin, rng):
+    await rec.request(client, "GET /admin", "GET", "/admin", cookies={"shanvika_sid": admin["cookie"]})
+
+SCENARIOS = {"chat": scenario_chat, "tool": scenario_tool, "history": scenario_history, "image": scenario_image, "admin": scenario_admin}
+
+async def virtual_user(base_url, account, admin, rec, deadline, rng, think_time):
+    import httpx
+    names, weights = zip(*SCENARIO_WEIGHTS.items())
+    async with httpx.AsyncClient(base_url=base_url, cookies={"shanvika_sid": account["cookie"]}, timeout=120) as client:
+        while time.time() < deadline:
+            name = rng.choices(names, weights)[0]
+            await SCENARIOS[name](client, rec, admin if name == "admin" else account, rng)
+            if think_time: await asyncio.sleep(rng.expovariate(1 / think_time))
+
+# ==================================================================================
+# [CATEGORY] REPORT + BASELINE
+# ==================================================================================
+def build_report(rec, args, elapsed, fake_calls, app_metrics):
+    endpoints = {}
+    for endpoint, values in sorted(rec.samples.items()):
+        endpoints[endpoint] = {
+            "count": len(values), "errors": rec.errors.get(endpoint, 0),
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 50), 1), "p95_ms": round(percentile(values, 95), 1), "p99_ms": round(percentile(values, 99), 1),
+            "statuses": dict(rec.statuses.get(endpoint, {})),
+        }
+    total = sum(len(v) for k, v in rec.samples.items() if not k.startswith("image job"))
+    try: commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except Exception: commit = ""
+    return {
+        "meta": {"commit": commit, "users": args.users, "duration_s": round(elapsed, 1), "think_time_s": args.think_time,
+                 "mongo": "mongod" if args.mongo_url else "mongomock", "seed": args.seed, "scenario_weights": SCENARIO_WEIGHTS},
+        "totals": {"requests": total, "rps": round(total / elapsed, 2), "errors": sum(rec.errors.values())},
+        "endpoints": endpoints,
+        "upstream_calls": fake_calls,
+        "app_metrics": app_metrics,
+    }
+
+def compare_with_baseline(report, baseline, threshold):
+    regressions = []
+    for endpoint, current in report["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(endpoint)
+        if not before or before["count"] < 20 or current["count"] < 20: continue   # kam samples = noise
+        for key in ("p95_ms", "p99_ms"):
+            if before[key] > 0 and current[key] > before[key] * (1 + threshold):
+                regressions.append(f"{endpoint}: {key} {before[key]} -> {current[key]} (+{(current[key] / before[key] - 1) * 100:.0f}%)")
+    return regressions
+
+def print_report(report):
+    print(f"\n{'endpoint':<40} {'count':>7} {'err':>5} {'rps':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for endpoint, r in report["endpoints"].items():
+        print(f"{endpoint:<40} {r['count']:>7} {r['errors']:>5} {r['rps']:>7} {r['p50_ms']:>7}ms {r['p95_ms']:>7}ms {r['p99_ms']:>7}ms")
+    t = report["totals"]
+    print(f"\nTotal: {t['requests']} requests, {t['rps']} req/s, {t['errors']} errors in {report['meta']['duration_s']}s")
+
+# ==================================================================================
+# [CATEGORY] MAIN
+# ==================================================================================
+async def health_probe(base_url, rec, deadline, interval=0.2):
+    # /health kuch nahi karta: iski latency = app ke event loop ka lag (blocking calls yahin dikhti hain)
+    import httpx
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        while time.time() < deadline:
+            await rec.request(client, "GET /health (loop lag probe)", "GET", "/health")
+            await asyncio.sleep(interval)
+
+async def drive(args, base_url, accounts, admin):
+    rec = Recorder()
+    rng = random.Random(args.seed)
+    deadline = time.time() + args.duration
+    started = time.perf_counter()
+    users = [virtual_user(base_url, accounts[i % len(accounts)], admin, rec, deadline, random.Random(rng.random()), args.think_time) for i in range(args.users)]
+    await asyncio.gather(health_probe(base_url, rec, deadline), *users)
+    return rec, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end load test against fake upstreams")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean pause between a user's actions (s)")
+    parser.add_argument("--mongo-url", help="Throwaway mongod URL. Na do toh mongomock-motor")
+    parser.add_argument("--profile", help="fake_upstreams latency/error overrides (JSON file)")
+    parser.add_argument("--fakes-url", help="Pehle se chal raha fake_upstreams.py (alag process), e.g. http://127.0.0.1:9100")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--admission", action="store_true", help="Admission control (rate limits / 429s) on rakho")
+    parser.add_argument("--json", help="Results ko is file mein save karo")
+    parser.add_argument("--baseline", help="Pichla results JSON; p95/p99 regression pe exit 1")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed p95/p99 increase vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(ROOT)   # templates/ aur static/ relative paths hain
+
+    app_port, fakes = free_port(), None
+    if args.fakes_url:
+        fake_url = args.fakes_url.rstrip("/")
+    else:
+        from fake_upstreams import build_fake_app
+        overrides = json.load(open(args.profile)) if args.profile else None
+        fake_port = free_port()
+        fakes = ServerThread(build_fake_app(overrides, args.seed), fake_port)
+        fakes.start()
+        fakes.wait_started()
+        fake_url = f"http://127.0.0.1:{fake_port}"
+
+    point_env_at_fakes(fake_url, args.mongo_url or "mongodb://memory", args.admission)
+    if not args.mongo_url: use_memory_mongo()
+    import main as app_module
+    from session_store import SessionStore
+
+    # mongomock: app wala client hi (data usi mein rehta hai). mongod: alag client, kyunki motor client event loop se bandh jaata hai
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        seed_db = AsyncIOMotorClient(args.mongo_url).shanvika_db
+    else:
+        seed_db = app_module.db
+    accounts, admin = asyncio.run(seed(seed_db, SessionStore, max(1, args.users), app_module.ADMIN_EMAIL))
+
+    server = ServerThread(app_module.app, app_port)
+    server.start()
+    server.wait_started()
+    print(f"App on :{app_port}, fake upstreams at {fake_url}. {args.users} users for {args.duration:.0f}s ...")
+
+    try: rec, elapsed = asyncio.run(drive(args, f"http://127.0.0.1:{app_port}", accounts, admin))
+    finally: server.stop()
+    try:
+        import httpx
+        fake_calls = httpx.get(f"{fake_url}/_stats", timeout=5).json()["calls"]
+    except Exception: fake_calls = {}
+    if fakes: fakes.stop()
+
+    report = build_report(rec, args, elapsed, fake_calls, app_module.metrics.summary())
+    print_report(report)
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f: json.dump(report, f, indent=2, default=str)
+        print(f"Saved {args.json}")
+    if args.baseline:
+        with open(args.baseline) as f: regressions = compare_with_baseline(report, json.load(f), args.threshold)
+        if regressions:
+            print("\n❌ Regressions vs baseline:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\n✅ No p95/p99 regressions vs baseline")
+
+if __name__ == "__main__":
+    main()
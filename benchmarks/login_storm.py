@@ -0,0 +1,98 @@
+# ==================================================================================
+#  FILE: benchmarks/login_storm.py
+#  DESCRIPTION: Login Storm Benchmark (Login Throughput + Chat p99 During the Storm)
+# ==================================================================================
+#  Usage: python benchmarks/login_storm.py --logins 200 --concurrency 50 --rounds 12
+#
+#  Ek hi event loop pe "chat" requests simulate hoti hain (chhota async kaam, har 20ms),
+#  aur saath mein login storm chalta hai. Do modes compare hote hain:
+#    inline    -> purana tareeka: bcrypt seedha async handler ke andar (loop block)
+#    offloaded -> password_security ka bounded hash pool
+# ==================================================================================
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+def percentile(values, pct):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+async def chat_traffic(stop, latencies, interval=0.02):
+    # Open-loop: chat request fixed schedule pe "aati" hai; latency = khatam hone ka time - arrival time.
+    # Loop block hua toh arrivals pile up hoti hain aur p99 mein dikh jaata hai.
+    async def one_chat(arrival):
+        await asyncio.sleep(0.001)
+        latencies.append((time.perf_counter() - arrival) * 1000)
+
+    start, k, pending = time.perf_counter(), 0, []
+    while not stop.is_set():
+        arrival = start + k * interval
+        delay = arrival - time.perf_counter()
+        if delay > 0: await asyncio.sleep(delay)
+        pending.append(asyncio.create_task(one_chat(arrival)))
+        k += 1
+    await asyncio.gather(*pending)
+
+async def run_mode(mode, stored_hash, password, logins, concurrency):
+    import password_security as ps
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_login():
+        async with semaphore:
+            if mode == "inline":
+                ok = ps.pwd_context.verify(ps._prehash(password), stored_hash)
+            else:
+                ok, _ = await ps.verify_password(password, stored_hash)
+            assert ok
+
+    stop, latencies = asyncio.Event(), []
+    chat_task = asyncio.create_task(chat_traffic(stop, latencies))
+    await asyncio.sleep(0.2)   # warm-up baseline
+    start = time.perf_counter()
+    await asyncio.gather(*[one_login() for _ in range(logins)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await chat_task
+    return {
+        "mode": mode,
+        "logins": logins,
+        "seconds": round(elapsed, 3),
+        "logins_per_sec": round(logins / elapsed, 2),
+        "chat_p50_ms": round(percentile(latencies, 50), 2),
+        "chat_p95_ms": round(percentile(latencies, 95), 2),
+        "chat_p99_ms": round(percentile(latencies, 99), 2),
+        "chat_samples": len(latencies),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput and chat latency during a login storm")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=int(os.getenv("BCRYPT_ROUNDS", 12)))
+    parser.add_argument("--modes", default="inline,offloaded")
+    parser.add_argument("--json", help="Results ko is file mein save karo")
+    args = parser.parse_args()
+
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import password_security as ps
+
+    password = "correct horse battery staple"
+    stored_hash = ps.pwd_context.hash(ps._prehash(password))
+    results = []
+    for mode in args.modes.split(","):
+        result = asyncio.run(run_mode(mode.strip(), stored_hash, password, args.logins, args.concurrency))
+        result.update(rounds=args.rounds, hash_workers=ps.HASH_WORKERS)
+        results.append(result)
+        print(f"{result['mode']:>10}: {result['logins_per_sec']:>8} logins/s | chat p50 {result['chat_p50_ms']}ms  p95 {result['chat_p95_ms']}ms  p99 {result['chat_p99_ms']}ms")
+
+    if args.json:
+        with open(args.json, "w") as f: json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
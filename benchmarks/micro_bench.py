@@ -0,0 +1,234 @@
+# ==================================================================================
+#  FILE: benchmarks/micro_bench.py
+#  DESCRIPTION: Micro-Benchmarks for Tool + Prompt-Building Hot Paths (Time + Allocations per Call)
+# ==================================================================================
+#  Usage: python benchmarks/micro_bench.py [--filter pdf] [--json out.json] [--baseline old.json]
+#
+#  Fixtures (HTML pages, resume PDFs, QR payloads, lambi chat histories) yahin fixed seed se
+#  bante hain, koi network / file download nahi. Time aur allocation alag pass mein naapte hain
+#  (tracemalloc khud code ko slow karta hai). --baseline se compare; regression pe exit 1.
+# ==================================================================================
+
+import argparse
+import importlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ==================================================================================
+# [CATEGORY] FIXTURES
+# ==================================================================================
+WORDS = ("python", "backend", "latency", "design", "team", "project", "data", "model", "deploy", "fastapi",
+         "mongo", "cache", "accha", "suno", "matlab", "kaam", "bahut", "sahi", "hai", "yaar", "service", "queue")
+DEVANAGARI = ("नमस्ते", "धन्यवाद", "अच्छा", "समझ", "गया", "ठीक", "है")
+
+def sentence(rng, n=12):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+def build_html(sections, seed=1):
+    # Asli blog/docs page jaisa: nav, inline scripts/styles, tables, lists, footer
+    rng = random.Random(seed)
+    body = []
+    for i in range(sections):
+        body.append(f"<h2>Section {i}</h2>")
+        body.extend(f"<p>{sentence(rng, 30)}  <a href='/x/{i}'>{sentence(rng, 3)}</a></p>" for _ in range(6))
+        body.append("<ul>" + "".join(f"<li>  {sentence(rng, 6)}  </li>" for _ in range(5)) + "</ul>")
+        body.append("<table>" + "".join(f"<tr><td>{rng.randint(1, 999)}</td><td>{sentence(rng, 4)}</td></tr>" for _ in range(4)) + "</table>")
+        body.append(f"<script>var s{i} = {json.dumps([sentence(rng) for _ in range(3)])};</script>")
+    nav = "<nav>" + "".join(f"<a href='/p/{i}'>Link {i}</a>" for i in range(40)) + "</nav>"
+    style = "<style>" + "".join(f".c{i} {{ margin: {i}px; }}\n" for i in range(200)) + "</style>"
+    return f"<html><head>{style}</head><body>{nav}<article>{''.join(body)}</article><footer>{sentence(rng, 40)}</footer></body></html>"
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def build_pdf(pages, lines_per_page=50, seed=2):
+    """Chhota sa valid PDF (Helvetica text), taaki reportlab jaisi dependency na chahiye."""
+    rng = random.Random(seed)
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        lines = " ".join(f"({_pdf_escape(sentence(rng, 10))}) '" for _ in range(lines_per_page))
+        stream = f"BT /F1 10 Tf 12 TL 50 780 Td {lines} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>"
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode() + "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+def build_history(turns, seed=3):
+    # Beech beech mein pasted logs (lambe) aur Hindi messages, jaise asli chats mein hote hain
+    rng = random.Random(seed)
+    messages = []
+    for i in range(turns):
+        if i % 15 == 7: content = "\n".join(f"ERROR [{rng.randint(1000, 9999)}] {sentence(rng, 8)}" for _ in range(120))
+        elif i % 5 == 3: content = " ".join(rng.choice(DEVANAGARI) for _ in range(25))
+        else: content = " ".join(sentence(rng) for _ in range(rng.randint(1, 6)))
+        messages.append({"role": "user" if i % 2 == 0 else "assistant", "content": content, "timestamp": i})
+    return messages
+
+def build_tts_reply(seed=4):
+    rng = random.Random(seed)
+    parts = []
+    for i in range(12):
+        parts.append(f"<p><b>{sentence(rng, 4)}</b> 😊 {sentence(rng, 14)} **{rng.choice(WORDS)}** {' '.join(rng.choice(DEVANAGARI) for _ in range(6))}</p>")
+        if i % 4 == 0: parts.append(f"<pre><code>def f{i}(x): return x * {i}  # ✅</code></pre>")
+    return "".join(parts)
+
+# ==================================================================================
+# [CATEGORY] BENCHMARK CASES
+# ==================================================================================
+def build_cases():
+    """name -> (zero-arg callable, None). Jiski dependency install nahi, woh (None, reason)."""
+    cases = {}
+
+    def add(name, make, requires=()):
+        try:
+            for module in requires: importlib.import_module(module)
+            cases[name] = (make(), None)
+        except Exception as e: cases[name] = (None, f"{type(e).__name__}: {e}")
+
+    def tools_lab():
+        import tools_lab
+        return tools_lab
+
+    def main_module():
+        import main
+        return main
+
+    small_html, large_html = build_html(8), build_html(120)
+    add("scrape_website.clean_html[small]", lambda: lambda: tools_lab().clean_html_text(small_html), requires=("bs4",))
+    add("scrape_website.clean_html[large]", lambda: lambda: tools_lab().clean_html_text(large_html), requires=("bs4",))
+
+    resume_pdf, long_pdf = build_pdf(2), build_pdf(20)
+    add("analyze_resume.extract_pdf[2 pages]", lambda: lambda: tools_lab().extract_pdf_text(resume_pdf), requires=("PyPDF2",))
+    add("analyze_resume.extract_pdf[20 pages]", lambda: lambda: tools_lab().extract_pdf_text(long_pdf), requires=("PyPDF2",))
+
+    long_qr = " ".join(WORDS) * 6
+    add("generate_qr_code[url]", lambda: lambda: tools_lab().qr_png_base64("https://shanvika.ai/share/abc123"), requires=("qrcode", "PIL"))
+    add("generate_qr_code[long text]", lambda: lambda: tools_lab().qr_png_base64(long_qr), requires=("qrcode", "PIL"))
+
+    add("load_system_instructions", lambda: main_module().load_system_instructions)
+    tts_reply = build_tts_reply()
+    add("speak.clean_tts_text", lambda: (lambda m: lambda: m.clean_tts_text(tts_reply))(main_module()))
+
+    from context_builder import build_messages
+    system_prompt = build_tts_reply(5)
+    memory = "\n".join(sentence(random.Random(i), 10) for i in range(5))
+
+    def chat_prompt(history, summary=""):
+        # chat_endpoint jaisa hi: doc messages -> conversation -> token-budgeted prompt
+        def run():
+            conversation = [{"role": m["role"], "content": m["content"]} for m in history] + [{"role": "user", "content": "Accha, ab aage kya karein?"}]
+            return build_messages(system_prompt, conversation, memory=memory, summary=summary)
+        return run
+
+    add("chat.build_messages[40 turns]", lambda: chat_prompt(build_history(40)))
+    add("chat.build_messages[600 turns + summary]", lambda: chat_prompt(build_history(600), summary=sentence(random.Random(9), 200)))
+    return cases
+
+# ==================================================================================
+# [CATEGORY] MEASUREMENT
+# ==================================================================================
+def measure(fn, rounds=5, round_time=0.1):
+    fn()   # warm-up: lazy imports, regex compile, file cache
+    # Calibrate: ek round ~round_time ka ho
+    n, elapsed = 1, 0.0
+    while True:
+        started = time.perf_counter()
+        for _ in range(n): fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= round_time / 4 or n >= 100000: break
+        n *= 4
+    n = max(1, int(n * round_time / max(elapsed, 1e-9)))
+    per_call = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(n): fn()
+        per_call.append((time.perf_counter() - started) / n)
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        after, peak = tracemalloc.get_traced_memory()
+    finally: tracemalloc.stop()
+    return {
+        "calls": n * rounds,
+        "best_us": round(min(per_call) * 1e6, 1),
+        "median_us": round(statistics.median(per_call) * 1e6, 1),
+        "peak_kb": round((peak - before) / 1024, 1),       # ek call mein max kitna extra memory
+        "retained_kb": round((after - before) / 1024, 1),  # call ke baad bhi pada reh gaya (caches/leaks)
+    }
+
+def compare_with_baseline(report, baseline, threshold, alloc_threshold, min_delta_us=5):
+    regressions = []
+    for name, current in report["benchmarks"].items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if not before or "median_us" not in before or "median_us" not in current: continue
+        # Bahut chhote numbers pe timer noise hi % mein bada dikhta hai
+        if current["median_us"] > before["median_us"] * (1 + threshold) and current["median_us"] - before["median_us"] >= min_delta_us:
+            regressions.append(f"{name}: median {before['median_us']}us -> {current['median_us']}us (+{(current['median_us'] / before['median_us'] - 1) * 100:.0f}%)")
+        if before["peak_kb"] > 1 and current["peak_kb"] > before["peak_kb"] * (1 + alloc_threshold):
+            regressions.append(f"{name}: peak {before['peak_kb']}KB -> {current['peak_kb']}KB (+{(current['peak_kb'] / before['peak_kb'] - 1) * 100:.0f}%)")
+    return regressions
+
+def print_report(report):
+    print(f"\n{'benchmark':<44} {'calls':>7} {'best':>11} {'median':>11} {'peak':>10} {'retained':>10}")
+    for name, r in report["benchmarks"].items():
+        if "skipped" in r:
+            print(f"{name:<44} skipped ({r['skipped']})")
+            continue
+        print(f"{name:<44} {r['calls']:>7} {r['best_us']:>9}us {r['median_us']:>9}us {r['peak_kb']:>8}KB {r['retained_kb']:>8}KB")
+
+# ==================================================================================
+# [CATEGORY] MAIN
+# ==================================================================================
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for tool and prompt-building hot paths")
+    parser.add_argument("--filter", help="Sirf woh benchmarks jinke naam mein yeh substring ho")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--round-time", type=float, default=0.1, help="Seconds per timing round")
+    parser.add_argument("--json", help="Report ko is file mein save karo (baseline banane ke liye bhi)")
+    parser.add_argument("--baseline", help="Pichli --json report; regression pe exit code 1")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed median time increase (0.25 = 25%%)")
+    parser.add_argument("--alloc-threshold", type=float, default=0.25, help="Allowed peak allocation increase")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)   # character_config.json relative path hai
+
+    report = {"meta": {"python": sys.version.split()[0], "rounds": args.rounds, "round_time": args.round_time}, "benchmarks": {}}
+    for name, (fn, skip_reason) in build_cases().items():
+        if args.filter and args.filter not in name: continue
+        report["benchmarks"][name] = {"skipped": skip_reason} if fn is None else measure(fn, args.rounds, args.round_time)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f: json.dump(report, f, indent=2)
+        print(f"Saved {args.json}")
+    if args.baseline:
+        with open(args.baseline) as f: baseline = json.load(f)
+        regressions = compare_with_baseline(report, baseline, args.threshold, args.alloc_threshold)
+        if regressions:
+            print("\n❌ Regressions vs baseline:")
+            for line in regressions: print(f"  {line}")
+            sys.exit(1)
+        print("\n✅ No regressions vs baseline")
+
+if __name__ == "__main__":
+    main()
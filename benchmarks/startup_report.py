@@ -0,0 +1,75 @@
+# ==================================================================================
+#  FILE: benchmarks/startup_report.py
+#  DESCRIPTION: Startup Time Report (Import Cost by Module + Time to First Health Check)
+# ==================================================================================
+#  Usage: python benchmarks/startup_report.py [--top 20] [--serve] [--json out.json]
+#
+#  `python -X importtime -c "import main"` chala ke har top-level package ka self time jodta hai.
+#  --serve: uvicorn start karke /health pe pehla 200 kitni der mein aaya, wo bhi naapta hai.
+# ==================================================================================
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_profile(module="main"):
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    by_package, modules = defaultdict(int), []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line: continue
+        self_us, cumulative_us, name = [p.strip() for p in line[len("import time:"):].split("|")]
+        name = name.strip()
+        by_package[name.split(".")[0]] += int(self_us)
+        modules.append((name, int(self_us), int(cumulative_us)))
+    if proc.returncode != 0:
+        print(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed", file=sys.stderr)
+    return {"ok": proc.returncode == 0, "wall_seconds": round(wall, 3), "by_package_ms": {k: round(v / 1000, 1) for k, v in by_package.items()}, "modules": modules}
+
+def time_to_health(port=8765, timeout=30):
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)], cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as resp:
+                    if resp.status == 200: return round(time.perf_counter() - started, 3)
+            except Exception: time.sleep(0.05)
+        return None
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time report broken down by module")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--serve", action="store_true", help="uvicorn start karke /health tak ka time")
+    parser.add_argument("--json", help="Report ko is file mein save karo")
+    args = parser.parse_args()
+
+    report = import_profile(args.module)
+    total_ms = sum(report["by_package_ms"].values())
+    print(f"import {args.module}: {total_ms:.0f} ms in imports, {report['wall_seconds'] * 1000:.0f} ms wall (incl. interpreter start)")
+    print(f"{'package':<32}{'self ms':>10}{'share':>8}")
+    for name, ms in sorted(report["by_package_ms"].items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{name:<32}{ms:>10.1f}{ms / total_ms * 100 if total_ms else 0:>7.1f}%")
+
+    if args.serve:
+        report["health_seconds"] = time_to_health()
+        print(f"first /health 200 after: {report['health_seconds']} s")
+
+    if args.json:
+        report.pop("modules")
+        with open(args.json, "w") as f: json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# ==================================================================================
+#  FILE: build_assets.py
+#  DESCRIPTION: Static Asset Build (Content-Hashed Names + gzip/brotli + Manifest)
+# ==================================================================================
+#  Usage: python build_assets.py
+#
+#  static/{css,js,images} -> static/dist/<path>/<name>.<hash>.<ext> (+ .gz / .br)
+#  static/dist/asset-manifest.json: templates (asset_url) aur service worker dono isi ko padhte hain.
+# ==================================================================================
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+try: import brotli
+except ImportError: brotli = None   # Optional: na ho toh sirf gzip variants banenge
+
+STATIC_DIR = "static"
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "asset-manifest.json")
+ASSET_DIRS = ("css", "js", "images")
+COMPRESSIBLE = (".css", ".js", ".json", ".svg", ".ico", ".txt", ".html")
+
+def fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+def write_variants(path, data):
+    with open(path, "wb") as f: f.write(data)
+    if not path.endswith(COMPRESSIBLE): return
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(compressed) < len(data):
+        with open(path + ".gz", "wb") as f: f.write(compressed)
+    if brotli:
+        compressed = brotli.compress(data, quality=11)
+        if len(compressed) < len(data):
+            with open(path + ".br", "wb") as f: f.write(compressed)
+
+def build():
+    if os.path.exists(DIST_DIR): shutil.rmtree(DIST_DIR)
+    files = {}
+    for asset_dir in ASSET_DIRS:
+        for root, _, names in os.walk(os.path.join(STATIC_DIR, asset_dir)):
+            for name in sorted(names):
+                src = os.path.join(root, name)
+                rel = os.path.relpath(src, STATIC_DIR).replace(os.sep, "/")
+                with open(src, "rb") as f: data = f.read()
+                stem, ext = os.path.splitext(name)
+                out_rel = f"{os.path.dirname(rel)}/{stem}.{fingerprint(data)}{ext}"
+                out_path = os.path.join(DIST_DIR, *out_rel.split("/"))
+                os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                write_variants(out_path, data)
+                files[rel] = f"/static/dist/{out_rel}"
+
+    # Version = saare hashes ka hash; service worker ka cache name isi se badalta hai
+    version = fingerprint(json.dumps(files, sort_keys=True).encode())
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "files": files}, f, indent=2, sort_keys=True)
+    print(f"Built {len(files)} assets into {DIST_DIR} (version {version}, brotli={'on' if brotli else 'off'})")
+    return files
+
+if __name__ == "__main__":
+    build()
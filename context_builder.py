@@ -0,0 +1,181 @@
+# ==================================================================================
+#  FILE: context_builder.py
+#  DESCRIPTION: Token-Budgeted Prompt Builder + Rolling Per-Session Summaries
+# ==================================================================================
+
+import asyncio
+import math
+import os
+import re
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 6000))
+MEMORY_TOKEN_CAP = int(os.getenv("MEMORY_TOKEN_CAP", 600))
+SUMMARY_TOKEN_CAP = int(os.getenv("SUMMARY_TOKEN_CAP", 500))
+# Ek message (pasted log, debugger output) isse bada ho toh beech se kaat do
+TURN_TOKEN_CAP = int(os.getenv("TURN_TOKEN_CAP", 1500))
+TOOL_CONTEXT_TOKENS = int(os.getenv("TOOL_CONTEXT_TOKENS", 1500))
+# Summary tab update hoti hai jab itne naye messages recent window se bahar nikal jaayein
+SUMMARY_KEEP_RECENT = int(os.getenv("SUMMARY_KEEP_RECENT", 12))
+SUMMARY_BATCH = int(os.getenv("SUMMARY_BATCH", 10))
+# Chat prompt ke liye Mongo se sirf itne latest messages aate hain (budget waise bhi isse kam mein bhar jaata hai)
+HISTORY_TAIL = int(os.getenv("HISTORY_TAIL", 60))
+
+# ==================================================================================
+# [CATEGORY] TOKEN COUNTING
+# ==================================================================================
+# tiktoken optional hai (na ho toh regex estimate). Llama tokenizer se exact match
+# kisi ka nahi hota, budget ke liye andaaza kaafi hai.
+_encoder = None
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+def _get_encoder():
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoder = False
+    return _encoder
+
+def _piece_tokens(piece):
+    # Lambe English words ~4 chars/token; Devanagari/emoji har char alag token jaisa
+    return math.ceil(len(piece) / 4) if piece.isascii() else len(piece)
+
+def count_tokens(text):
+    if not text: return 0
+    encoder = _get_encoder()
+    if encoder: return len(encoder.encode(text, disallowed_special=()))
+    return sum(_piece_tokens(piece) for piece in _TOKEN_RE.findall(text))
+
+def truncate_tokens(text, max_tokens, marker="\n...[trimmed]...\n"):
+    """Head + tail rakhta hai (errors aksar log ke end mein hote hain).
+
+    Ek hi pass mein cut points nikalte hain; pehle binary search har step pe poora
+    text dobara count karta tha (pasted logs pe chat prompt ~10ms ka ho jaata tha).
+    """
+    total = count_tokens(text)
+    if total <= max_tokens: return text
+    half = max_tokens // 2
+    encoder = _get_encoder()
+    if encoder:
+        tokens = encoder.encode(text, disallowed_special=())
+        head, tail = encoder.decode(tokens[:half]), encoder.decode(tokens[len(tokens) - half:])
+    else:
+        # Tail ka cost = total - ab tak ka cost, toh list banaye bina ek hi pass kaafi hai
+        head_end, tail_start, used = 0, len(text), 0
+        for m in _TOKEN_RE.finditer(text):
+            if total - used <= half:
+                tail_start = max(m.start(), head_end)
+                break
+            used += _piece_tokens(m.group())
+            if used <= half: head_end = m.end()
+        head, tail = text[:head_end], text[tail_start:]
+    return head + marker + tail if head or tail else text[:max_tokens * 4]
+
+# ==================================================================================
+# [CATEGORY] PROMPT ASSEMBLY
+# ==================================================================================
+def build_messages(system_prompt, history, memory="", summary="", budget=CONTEXT_TOKEN_BUDGET):
+    """Budget is order mein bharta hai: system prompt, memories, recent turns, phir purani baaton ki summary.
+
+    history: [{"role", "content"}, ...] jisme aakhri item current user message hai (woh hamesha jaata hai).
+    Returns (messages, stats).
+    """
+    remaining = budget - count_tokens(system_prompt)
+    memory_block = ""
+    if memory:
+        memory = truncate_tokens(memory, min(MEMORY_TOKEN_CAP, max(0, remaining)))
+        memory_block = f"\n\n[USER LONG-TERM MEMORY]:\n{memory}\n(Use this information to personalize the conversation)"
+        remaining -= count_tokens(memory_block)
+
+    # Summary ke liye jagah pehle se alag rakho, warna recent turns sab kha jaayenge
+    summary_block = f"\n\n[EARLIER IN THIS CONVERSATION]:\n{truncate_tokens(summary, SUMMARY_TOKEN_CAP)}" if summary else ""
+    summary_reserve = count_tokens(summary_block)
+
+    turns = []
+    for i, m in enumerate(reversed(history)):
+        content = truncate_tokens(m["content"] or "", TURN_TOKEN_CAP)
+        cost = count_tokens(content) + 4   # role/format overhead
+        if i > 0 and cost > remaining - summary_reserve: break
+        turns.append({"role": m["role"], "content": content})
+        remaining -= cost
+    turns.reverse()
+
+    if summary_block and summary_reserve > remaining: summary_block = ""
+    elif summary_block: remaining -= summary_reserve
+
+    messages = [{"role": "system", "content": system_prompt + memory_block + summary_block}, *turns]
+    return messages, {"turns": len(turns), "summary": bool(summary_block), "tokens": budget - remaining}
+
+def turns_after_summary(tail, total, summary_upto=0):
+    """tail: poori history ke aakhri len(tail) messages, total: poori history ki length.
+
+    Summary mein fold ho chuke messages (pehle summary_upto) dobara verbatim na jaayein.
+    """
+    offset = total - len(tail)
+    return tail[max(0, summary_upto - offset):]
+
+def render_context_history(messages, budget=TOOL_CONTEXT_TOKENS):
+    """Tools ke liye 'role: content | ' wali string, budget ke andar (newest first bharte hain)."""
+    parts, used = [], 0
+    for m in reversed(messages):
+        part = f"{m['role']}: {truncate_tokens(m['content'] or '', TURN_TOKEN_CAP // 2)} | "
+        cost = count_tokens(part)
+        if used + cost > budget: break
+        parts.append(part)
+        used += cost
+    return "".join(reversed(parts))
+
+# ==================================================================================
+# [CATEGORY] ROLLING SESSION SUMMARY
+# ==================================================================================
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and Shanvika (an AI companion).
+Update the summary with the new messages. Keep names, facts, decisions, open questions and the user's mood.
+Drop small talk. Write at most {words} words, plain text, third person.
+
+CURRENT SUMMARY:
+{summary}
+
+NEW MESSAGES:
+{messages}
+
+UPDATED SUMMARY:"""
+
+class SessionSummarizer:
+    """chats doc mein `summary` + `summary_upto` (kitne messages cover ho chuke) rakhta hai.
+
+    Har baar sirf naye nikle hue messages fold hote hain; poori summary dobara nahi banti.
+    """
+
+    def __init__(self, collection, complete):
+        self.collection = collection
+        self.complete = complete   # sync fn(messages) -> text (thread mein chalta hai)
+        self._running = set()
+
+    def needs_update(self, chat_doc, total_messages):
+        return total_messages - SUMMARY_KEEP_RECENT - chat_doc.get("summary_upto", 0) >= SUMMARY_BATCH
+
+    async def update(self, session_id):
+        if session_id in self._running: return
+        self._running.add(session_id)
+        try:
+            doc = await self.collection.find_one({"session_id": session_id}, {"summary": 1, "summary_upto": 1, "messages": 1})
+            if not doc: return
+            messages = doc.get("messages", [])
+            upto = doc.get("summary_upto", 0)
+            end = len(messages) - SUMMARY_KEEP_RECENT
+            if end - upto < SUMMARY_BATCH: return
+
+            new_text = "\n".join(f"{m['role']}: {truncate_tokens(m.get('content') or '', 400)}" for m in messages[upto:end])
+            prompt = SUMMARY_PROMPT.format(words=SUMMARY_TOKEN_CAP // 2, summary=doc.get("summary") or "(none yet)", messages=new_text)
+            summary = await asyncio.to_thread(self.complete, [{"role": "user", "content": prompt}])
+            if not summary or summary.startswith("⚠️"): return
+
+            # summary_upto match hone pe hi likho (doosre worker ne beech mein update kiya ho toh skip)
+            await self.collection.update_one(
+                {"session_id": session_id, "summary_upto": {"$in": [upto, None]} if upto == 0 else upto},
+                {"$set": {"summary": truncate_tokens(summary.strip(), SUMMARY_TOKEN_CAP), "summary_upto": end}},
+            )
+        except Exception as e: print(f"Summary Error: {e}")
+        finally: self._running.discard(session_id)
@@ -0,0 +1,173 @@
+# ==================================================================================
+#  FILE: currency_engine.py
+#  DESCRIPTION: Offline Currency Conversion (Query Parser + In-Memory Rate Table)
+# ==================================================================================
+
+import asyncio
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+import httpx
+
+from metrics import metrics
+
+CURRENCY_RATES_FILE = os.getenv("CURRENCY_RATES_FILE", "currency_rates.json")
+CURRENCY_RATES_URL = os.getenv("CURRENCY_RATES_URL", "https://open.er-api.com/v6/latest/USD")
+CURRENCY_REFRESH_SECONDS = int(os.getenv("CURRENCY_REFRESH_SECONDS", 6 * 3600))
+
+# Common naam / symbols -> ISO code
+CURRENCY_ALIASES = {
+    "$": "USD", "dollar": "USD", "dollars": "USD", "usd": "USD", "bucks": "USD",
+    "₹": "INR", "rs": "INR", "rs.": "INR", "rupee": "INR", "rupees": "INR", "rupaye": "INR", "inr": "INR",
+    "€": "EUR", "euro": "EUR", "euros": "EUR",
+    "£": "GBP", "pound": "GBP", "pounds": "GBP", "sterling": "GBP",
+    "¥": "JPY", "yen": "JPY",
+    "yuan": "CNY", "rmb": "CNY",
+    "dirham": "AED", "dirhams": "AED",
+    "riyal": "SAR", "riyals": "SAR",
+    "taka": "BDT",
+    "ruble": "RUB", "rubles": "RUB",
+    "won": "KRW",
+    "franc": "CHF", "francs": "CHF",
+    "bitcoin": "BTC", "btc": "BTC",
+}
+DOLLAR_PREFIXES = {"us": "USD", "canadian": "CAD", "australian": "AUD", "singapore": "SGD", "hong kong": "HKD", "new zealand": "NZD"}
+
+_MULTIPLIERS = {"k": 1e3, "lakh": 1e5, "lakhs": 1e5, "crore": 1e7, "crores": 1e7, "million": 1e6, "mn": 1e6, "m": 1e6, "billion": 1e9, "bn": 1e9}
+
+# ==================================================================================
+# [CATEGORY] RATE SOURCES (Pluggable)
+# ==================================================================================
+class FileRateSource:
+    """Local JSON file: {"base": "USD", "rates": {"INR": 83.1, ...}, "updated_at": "..."}. Tests/offline ke liye."""
+
+    def __init__(self, path=CURRENCY_RATES_FILE):
+        self.path = path
+
+    async def fetch(self):
+        def read():
+            with open(self.path, "r", encoding="utf-8") as f: return json.load(f)
+        data = await asyncio.to_thread(read)
+        return data.get("base", "USD"), data["rates"], data.get("updated_at")
+
+class HTTPRateSource:
+    """open.er-api.com style JSON endpoint (base currency + rates map)."""
+
+    def __init__(self, url=CURRENCY_RATES_URL, timeout=10.0):
+        self.url = url
+        self.timeout = timeout
+
+    async def fetch(self):
+        async with httpx.AsyncClient(timeout=self.timeout) as http_client:
+            with metrics.span("upstream_seconds", provider="exchange_rates", model="latest"):
+                resp = await http_client.get(self.url)
+            resp.raise_for_status()
+            data = resp.json()
+        base = data.get("base_code") or data.get("base", "USD")
+        return base, data["rates"], data.get("time_last_update_utc")
+
+# ==================================================================================
+# [CATEGORY] RATE TABLE + CONVERSION
+# ==================================================================================
+class RateTable:
+    def __init__(self, sources=None):
+        # Pehle remote try karo, fail ho toh local file se kaam chalao
+        self.sources = sources if sources is not None else [HTTPRateSource(), FileRateSource()]
+        self.rates = {}          # ISO code -> units per 1 USD
+        self.updated_at = None
+        self.loaded_at = 0.0
+        self.last_attempt = 0.0
+        self._refresh_task = None
+
+    def load(self, base, rates, updated_at=None):
+        base_rate = float(rates.get(base, 1.0)) or 1.0
+        usd_rate = float(rates["USD"]) / base_rate if "USD" in rates else 1.0
+        # Sab kuch USD base pe normalize kar do
+        self.rates = {code.upper(): float(r) / base_rate / usd_rate for code, r in rates.items() if r}
+        self.rates.setdefault("USD", 1.0)
+        self.updated_at = updated_at or datetime.utcnow().strftime('%Y-%m-%d %H:%M UTC')
+        self.loaded_at = time.time()
+
+    async def refresh(self):
+        self.last_attempt = time.time()
+        for source in self.sources:
+            try:
+                self.load(*await source.fetch())
+                return True
+            except Exception as e:
+                print(f"Currency Rate Refresh Error ({type(source).__name__}): {e}")
+        return False
+
+    def is_stale(self):
+        return not self.rates or time.time() - self.loaded_at > CURRENCY_REFRESH_SECONDS
+
+    async def ensure_loaded(self):
+        # Saare sources fail hue hon toh har query pe dobara try mat karo (1 min backoff)
+        if time.time() - self.last_attempt < 60: return
+        if not self.rates: await self.refresh()
+        elif self.is_stale() and (not self._refresh_task or self._refresh_task.done()):
+            # Stale rates se turant jawab do, refresh background mein
+            self._refresh_task = asyncio.create_task(self.refresh())
+
+    async def refresh_forever(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(CURRENCY_REFRESH_SECONDS)
+
+    def convert(self, amount, from_code, to_code):
+        if from_code not in self.rates or to_code not in self.rates: return None
+        return amount / self.rates[from_code] * self.rates[to_code]
+
+def resolve_currency(token):
+    token = token.strip().lower().rstrip(".")
+    if not token: return None
+    for prefix, code in DOLLAR_PREFIXES.items():
+        if token.startswith(prefix) and token.endswith(("dollar", "dollars")): return code
+    if token in CURRENCY_ALIASES: return CURRENCY_ALIASES[token]
+    if token + "." in CURRENCY_ALIASES: return CURRENCY_ALIASES[token + "."]
+    return token.upper() if re.fullmatch(r"[a-z]{3}", token) else None
+
+_QUERY_RE = re.compile(
+    r"^(?:convert |how much is |what is )?"
+    r"(?P<pre>[$₹€£¥])?\s*(?P<amount>\d[\d,]*(?:\.\d+)?)\s*(?P<mult>k|lakhs?|crores?|million|mn|m|billion|bn)?\b"
+    r"\s*(?P<from>[a-z$₹€£¥][a-z. ]*?)?\s+(?:to|in|into|=|->|me|mein)\s+(?P<to>[a-z$₹€£¥][a-z. ]*?)\s*\??$"
+)
+_PAIR_RE = re.compile(r"^(?:convert )?(?P<from>[a-z$₹€£¥][a-z. ]*?)\s+(?:to|in|into)\s+(?P<to>[a-z$₹€£¥][a-z. ]*?)\s*\??$")
+
+def parse_currency_query(query):
+    """'500 usd to inr', '$20 in rupees', '1.5 lakh inr to usd' -> (amount, FROM, TO) ya None."""
+    text = re.sub(r"\s+", " ", query.strip().lower())
+    match = _QUERY_RE.match(text)
+    if not match:
+        # Amount ke bina: "usd to inr" -> 1 unit
+        pair = _PAIR_RE.match(text)
+        if not pair: return None
+        from_code, to_code = resolve_currency(pair.group("from")), resolve_currency(pair.group("to"))
+        return (1.0, from_code, to_code) if from_code and to_code else None
+
+    amount = float(match.group("amount").replace(",", ""))
+    if match.group("mult"): amount *= _MULTIPLIERS[match.group("mult")]
+    from_code = resolve_currency(match.group("pre") or match.group("from") or "")
+    to_code = resolve_currency(match.group("to"))
+    return (amount, from_code, to_code) if from_code and to_code else None
+
+def format_amount(value):
+    if value >= 1: return f"{value:,.2f}"
+    return f"{value:.6g}"
+
+rate_table = RateTable()
+
+async def convert_currency_query(query):
+    """Local conversion. Parse/rate nahi mila toh None (caller web search pe fallback kare)."""
+    parsed = parse_currency_query(query)
+    if not parsed: return None
+    await rate_table.ensure_loaded()
+    amount, from_code, to_code = parsed
+    result = rate_table.convert(amount, from_code, to_code)
+    if result is None: return None
+    unit_rate = rate_table.convert(1.0, from_code, to_code)
+    return (f"💱 **Conversion:**\n**{format_amount(amount)} {from_code} = {format_amount(result)} {to_code}**\n"
+            f"_(1 {from_code} = {format_amount(unit_rate)} {to_code} · rates as of {rate_table.updated_at})_")
@@ -0,0 +1,123 @@
+# ==================================================================================
+#  FILE: diary_context.py
+#  DESCRIPTION: Diary Context Across All of the Day's Sessions (Server-Side $filter + Incremental Digest)
+# ==================================================================================
+#  - Din bhar: har chat turn ek per-worker buffer mein, har kuch seconds mein bulk_write se
+#    diary_digests {_id: email|date} mein $push ($slice se capped). Raat ka job bas yeh doc padhta hai.
+#  - Digest na mile (naya deploy, flush miss): aggregation pipeline Mongo pe hi saare sessions ke
+#    aaj ke messages $filter karke, per message/per session cap ke saath laata hai. Poori history
+#    wire pe nahi aati.
+#  - Tool sessions ("Tool: ..." title, QR HTML / images) diary mein nahi jaate.
+# ==================================================================================
+
+import asyncio
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+DIARY_CONTEXT_CHARS = int(os.getenv("DIARY_CONTEXT_CHARS", 4000))
+DIARY_MESSAGE_CHARS = int(os.getenv("DIARY_MESSAGE_CHARS", 400))
+DIARY_SESSION_LINES = int(os.getenv("DIARY_SESSION_LINES", 20))
+DIARY_DIGEST_LINES = int(os.getenv("DIARY_DIGEST_LINES", 80))
+DIARY_FLUSH_INTERVAL = float(os.getenv("DIARY_FLUSH_INTERVAL", 5))
+DIARY_DIGEST_RETENTION_DAYS = 3
+
+def day_start(ts=None):
+    return (ts or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def digest_id(email, day):
+    return f"{email}|{day.strftime('%Y-%m-%d')}"
+
+def todays_messages_pipeline(email, since):
+    """Line shape: {sid, role, content, ts}. Sirf user ke aaj active sessions (user_email + last_activity index)."""
+    return [
+        {"$match": {"user_email": email, "last_activity": {"$gte": since}, "title": {"$not": {"$regex": "^Tool:"}}}},
+        {"$project": {"_id": 0, "session_id": 1, "messages": {"$slice": [
+            {"$filter": {"input": {"$ifNull": ["$messages", []]}, "as": "m", "cond": {"$gte": ["$$m.timestamp", since]}}},
+            -DIARY_SESSION_LINES,
+        ]}}},
+        {"$unwind": "$messages"},
+        {"$sort": {"messages.timestamp": -1}},
+        {"$limit": DIARY_DIGEST_LINES},
+        {"$project": {
+            "sid": "$session_id", "role": "$messages.role", "ts": "$messages.timestamp",
+            "content": {"$substrCP": [{"$ifNull": ["$messages.content", ""]}, 0, DIARY_MESSAGE_CHARS]},
+        }},
+        {"$sort": {"ts": 1}},
+    ]
+
+def render_day(lines, budget=DIARY_CONTEXT_CHARS):
+    """Budget sessions mein baant-ta hai (chhote sessions ka bacha hua hissa bado ko), har session ke latest lines.
+
+    Pehle ek hi session aata tha; ab din ki har baatcheet diary mein dikhti hai.
+    """
+    sessions = defaultdict(list)
+    for line in lines: sessions[line["sid"]].append(f"{line['role']}: {line['content']}\n")
+    order = list(sessions)   # pehli baat kis session mein hui, us order mein
+    kept, remaining = {}, budget
+    for n, sid in enumerate(sorted(order, key=lambda s: sum(map(len, sessions[s])))):
+        share, used, picked = remaining // (len(order) - n), 0, []
+        for text in reversed(sessions[sid]):
+            if used + len(text) > share:
+                # Latest line hi share se lambi ho toh session gayab na ho, uska aakhri hissa rakh lo
+                if not picked and share > 0: picked.append(text[-share:]); used = share
+                break
+            picked.append(text)
+            used += len(text)
+        kept[sid] = "".join(reversed(picked))
+        remaining -= used
+    return "\n".join(kept[sid] for sid in order if kept[sid])
+
+class DiaryDigest:
+    def __init__(self, digests, chats):
+        self.digests = digests
+        self.chats = chats
+        self._pending = defaultdict(list)   # (email, day) -> [line, ...]
+
+    async def ensure_indexes(self):
+        await self.digests.create_index("expires_at", expireAfterSeconds=0)
+
+    def add(self, email, session_id, role, content, ts=None):
+        """Chat request path pe sirf list append."""
+        ts = ts or datetime.utcnow()
+        self._pending[(email, day_start(ts))].append({"sid": session_id, "role": role, "content": (content or "")[:DIARY_MESSAGE_CHARS], "ts": ts})
+
+    async def flush(self):
+        if not self._pending: return 0
+        pending, self._pending = self._pending, defaultdict(list)
+        ops = [UpdateOne(
+            {"_id": digest_id(email, day)},
+            {"$push": {"lines": {"$each": lines, "$slice": -DIARY_DIGEST_LINES}},
+             "$inc": {"count": len(lines)},
+             "$set": {"updated_at": datetime.utcnow()},
+             "$setOnInsert": {"user_email": email, "date": day.strftime('%Y-%m-%d'), "expires_at": day + timedelta(days=DIARY_DIGEST_RETENTION_DAYS)}},
+            upsert=True,
+        ) for (email, day), lines in pending.items()]
+        try: await self.digests.bulk_write(ops, ordered=False)
+        except Exception as e:
+            print(f"Diary Digest Flush Error: {e}")
+            for key, lines in pending.items(): self._pending[key][:0] = lines
+            return 0
+        return len(ops)
+
+    async def flush_forever(self, interval=DIARY_FLUSH_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    async def aggregate_lines(self, email, since):
+        return await self.chats.aggregate(todays_messages_pipeline(email, since)).to_list(length=DIARY_DIGEST_LINES)
+
+    async def context_for(self, emails, day=None):
+        """Batch: {email: diary context text}. Digest se; jinka digest nahi aur aaj active the, unke liye pipeline."""
+        day = day or day_start()
+        found = {}
+        async for doc in self.digests.find({"_id": {"$in": [digest_id(e, day) for e in emails]}}, {"user_email": 1, "lines": 1}):
+            found[doc["user_email"]] = doc.get("lines", [])
+        missing = [e for e in emails if e not in found]
+        if missing:
+            active = await self.chats.distinct("user_email", {"user_email": {"$in": missing}, "last_activity": {"$gte": day}})
+            for email in active: found[email] = await self.aggregate_lines(email, day)
+        return {email: render_day(lines) for email, lines in found.items() if lines}
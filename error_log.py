@@ -0,0 +1,128 @@
+# ==================================================================================
+#  FILE: error_log.py
+#  DESCRIPTION: Fingerprinted Error Log (In-Memory Buffer + Batched $inc Upserts + Capped Samples)
+# ==================================================================================
+
+import asyncio
+import hashlib
+import os
+import re
+from datetime import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import CollectionInvalid
+
+ERROR_FLUSH_INTERVAL = float(os.getenv("ERROR_FLUSH_INTERVAL", 10))
+# Ek flush window mein har fingerprint ke itne raw samples hi save hote hain
+ERROR_SAMPLES_PER_FLUSH = int(os.getenv("ERROR_SAMPLES_PER_FLUSH", 1))
+ERROR_SAMPLES_BYTES = int(os.getenv("ERROR_SAMPLES_BYTES", 16 * 1024 * 1024))
+ERROR_BUFFER_LIMIT = int(os.getenv("ERROR_BUFFER_LIMIT", 1000))
+OVERFLOW_FINGERPRINT = "overflow"
+
+# Traceback ke woh hisse jo har occurrence mein badalte hain
+_NORMALIZERS = [
+    (re.compile(r"0x[0-9a-fA-F]+"), "0x?"),
+    (re.compile(r"line \d+"), "line ?"),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "'?'"),
+    (re.compile(r"\b\d+(\.\d+)?\b"), "?"),
+]
+
+def normalize_trace(trace):
+    lines = [line.strip() for line in (trace or "").strip().splitlines() if line.strip()]
+    # Source code lines skip: sirf 'File ...' frames aur aakhri exception line
+    frames = [line for line in lines if line.startswith("File ")]
+    text = "\n".join(frames + lines[-1:])
+    for pattern, repl in _NORMALIZERS: text = pattern.sub(repl, text)
+    return text
+
+def fingerprint(trace, mode=""):
+    return hashlib.sha1(f"{mode}\n{normalize_trace(trace)}".encode()).hexdigest()[:16]
+
+class ErrorLog:
+    """Errors ko fingerprint karke memory mein ginta hai, phir batch mein Mongo mein flush karta hai.
+
+    groups: ek doc per fingerprint -> count, first_seen, last_seen, latest error/trace
+    samples: capped collection, raw occurrences (purane apne aap hat jaate hain)
+    """
+
+    def __init__(self, groups, samples):
+        self.groups = groups
+        self.samples = samples
+        self._buffer = {}   # fingerprint -> pending aggregate
+        self._samples = []
+        self.dropped = 0
+
+    async def ensure_indexes(self):
+        try: await self.samples.database.create_collection(self.samples.name, capped=True, size=ERROR_SAMPLES_BYTES)
+        except CollectionInvalid: pass   # Pehle se bana hua hai
+        await self.groups.create_index([("count", -1)])
+        await self.groups.create_index([("last_seen", -1)])
+
+    def record(self, error, trace, endpoint, mode=""):
+        """Request path pe sirf memory update. Koi DB write nahi."""
+        now = datetime.utcnow()
+        fp = fingerprint(trace, mode)
+        entry = self._buffer.get(fp)
+        if entry is None:
+            if len(self._buffer) >= ERROR_BUFFER_LIMIT:
+                # Naye fingerprints ki baadh: sab ek bucket mein gino, memory bounded rahe
+                fp, error, trace = OVERFLOW_FINGERPRINT, "Too many distinct errors in one flush window", ""
+                entry = self._buffer.get(fp)
+            if entry is None:
+                entry = self._buffer[fp] = {"count": 0, "first_seen": now, "sampled": 0}
+        entry.update({"error": error, "trace": trace, "endpoint": endpoint, "mode": mode, "last_seen": now})
+        entry["count"] += 1
+        if entry["sampled"] < ERROR_SAMPLES_PER_FLUSH:
+            entry["sampled"] += 1
+            self._samples.append({"fingerprint": fp, "error": error, "trace": trace, "endpoint": endpoint, "mode": mode, "timestamp": now})
+
+    async def flush(self):
+        if not self._buffer: return 0
+        pending, samples = self._buffer, self._samples
+        self._buffer, self._samples = {}, []
+        ops = [UpdateOne(
+            {"_id": fp},
+            {
+                "$inc": {"count": e["count"]},
+                "$min": {"first_seen": e["first_seen"]},
+                "$max": {"last_seen": e["last_seen"]},
+                "$set": {"error": e["error"], "trace": e["trace"], "endpoint": e["endpoint"], "mode": e["mode"]},
+            },
+            upsert=True,
+        ) for fp, e in pending.items()]
+        try: await self.groups.bulk_write(ops, ordered=False)
+        except Exception as e:
+            print(f"Error Log Flush Error: {e}")
+            self._requeue(pending)
+            return 0
+        if samples:
+            # Samples best-effort hain; fail ho toh counts phir bhi sahi rehte hain
+            try: await self.samples.insert_many(samples, ordered=False)
+            except Exception as e: print(f"Error Sample Flush Error: {e}")
+        return len(ops)
+
+    def _requeue(self, pending):
+        # DB down hai toh counts wapas buffer mein (samples chhod do), agli flush mein try
+        for fp, e in pending.items():
+            current = self._buffer.get(fp)
+            if current is None:
+                if len(self._buffer) >= ERROR_BUFFER_LIMIT:
+                    self.dropped += e["count"]
+                    continue
+                e["sampled"] = ERROR_SAMPLES_PER_FLUSH
+                self._buffer[fp] = e
+            else:
+                current["count"] += e["count"]
+                current["first_seen"] = min(current["first_seen"], e["first_seen"])
+
+    async def flush_forever(self, interval=ERROR_FLUSH_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    async def top(self, limit=10):
+        return await self.groups.find({}, {"trace": 0}).sort("count", -1).limit(limit).to_list(length=limit)
+
+    async def recent_samples(self, limit=10):
+        # Capped collection mein insertion order hi time order hai
+        return await self.samples.find({}).sort("$natural", -1).limit(limit).to_list(length=limit)
@@ -0,0 +1,118 @@
+# ==================================================================================
+#  FILE: github_client.py
+#  DESCRIPTION: Async GitHub API Client (ETag Cache + Token Pool + Rate Limit Tracking)
+# ==================================================================================
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+import httpx
+
+from metrics import metrics
+
+GITHUB_API = "https://api.github.com"
+GITHUB_TIMEOUT = float(os.getenv("GITHUB_TIMEOUT", 10))
+GITHUB_CACHE_SIZE = int(os.getenv("GITHUB_CACHE_SIZE", 500))
+# Itne seconds tak cached response bina revalidate kiye de dete hain
+GITHUB_FRESH_SECONDS = int(os.getenv("GITHUB_FRESH_SECONDS", 60))
+ANONYMOUS = "anonymous"
+
+def load_github_tokens():
+    keys = os.getenv("GITHUB_TOKEN_POOL", "").split(",")
+    tokens = [k.strip() for k in keys if k.strip()]
+    if not tokens and os.getenv("GITHUB_TOKEN"): tokens = [os.getenv("GITHUB_TOKEN")]
+    return tokens
+
+class GitHubClient:
+    """GitHub REST client jo ETag/If-None-Match se revalidate karta hai.
+
+    304 responses GitHub ke rate limit mein count nahi hote (agar same token se bheje gaye hon),
+    isliye har cached entry yaad rakhti hai ki kis token se fetch hui thi.
+    """
+
+    def __init__(self, tokens=None):
+        self.tokens = tokens if tokens is not None else load_github_tokens()
+        self._cache = OrderedDict()   # path -> {"etag", "last_modified", "data", "status", "token", "checked_at"}
+        self.rate = {}                # token label -> {"limit", "remaining", "reset"}
+
+    def _label(self, token):
+        return f"token_{self.tokens.index(token) + 1}" if token else ANONYMOUS
+
+    def _available(self, token):
+        info = self.rate.get(self._label(token))
+        if not info or info["remaining"] > 0: return True
+        return time.time() >= info["reset"]
+
+    def _pick_token(self, preferred=None):
+        if preferred in self.tokens and self._available(preferred): return preferred
+        candidates = [t for t in self.tokens if self._available(t)]
+        if not candidates: return None if self._available(None) or not self.tokens else self.tokens[0]
+        # Jis token ka sabse zyada budget bacha hai wahi use karo
+        return max(candidates, key=lambda t: self.rate.get(self._label(t), {}).get("remaining", 5000))
+
+    def _record_rate(self, token, resp):
+        remaining = resp.headers.get("x-ratelimit-remaining")
+        if remaining is None: return
+        self.rate[self._label(token)] = {
+            "limit": int(resp.headers.get("x-ratelimit-limit", 0)),
+            "remaining": int(remaining),
+            "reset": int(resp.headers.get("x-ratelimit-reset", 0)),
+        }
+
+    def _store(self, path, entry):
+        self._cache[path] = entry
+        self._cache.move_to_end(path)
+        while len(self._cache) > GITHUB_CACHE_SIZE: self._cache.popitem(last=False)
+
+    async def get(self, http_client, path):
+        """Returns (status_code, json_data). Rate limit khatam ho toh stale cache de deta hai."""
+        cached = self._cache.get(path)
+        if cached and time.time() - cached["checked_at"] < GITHUB_FRESH_SECONDS:
+            return cached["status"], cached["data"]
+
+        token = self._pick_token(cached["token"] if cached else None)
+        headers = {"Accept": "application/vnd.github+json", "User-Agent": "Shanvika-AI"}
+        if token: headers["Authorization"] = f"Bearer {token}"
+        if cached and cached["token"] == token:
+            if cached.get("etag"): headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"): headers["If-Modified-Since"] = cached["last_modified"]
+
+        with metrics.span("upstream_seconds", provider="github", model="rest", key=self._label(token)) as labels:
+            resp = await http_client.get(f"{GITHUB_API}{path}", headers=headers)
+            labels["status"] = str(resp.status_code)
+        self._record_rate(token, resp)
+
+        if resp.status_code == 304 and cached:
+            cached["checked_at"] = time.time()
+            self._cache.move_to_end(path)
+            return cached["status"], cached["data"]
+
+        if resp.status_code in (403, 429) and resp.headers.get("x-ratelimit-remaining") == "0":
+            if cached: return cached["status"], cached["data"]
+            if self._pick_token() != token: return await self.get(http_client, path)
+            return resp.status_code, {"message": "GitHub rate limit exceeded"}
+
+        data = resp.json()
+        if resp.status_code in (200, 404):
+            self._store(path, {
+                "etag": resp.headers.get("etag"), "last_modified": resp.headers.get("last-modified"),
+                "data": data, "status": resp.status_code, "token": token, "checked_at": time.time(),
+            })
+        return resp.status_code, data
+
+    async def fetch_profile(self, username):
+        """User aur repos dono endpoints ek saath (concurrently) fetch karta hai."""
+        async with httpx.AsyncClient(timeout=GITHUB_TIMEOUT) as http_client:
+            (user_status, user_data), (_, repos_data) = await asyncio.gather(
+                self.get(http_client, f"/users/{username}"),
+                self.get(http_client, f"/users/{username}/repos?sort=updated&per_page=10"),
+            )
+        if user_status != 200: return None, []
+        return user_data, repos_data if isinstance(repos_data, list) else []
+
+    def rate_limit_status(self):
+        return {label: dict(info) for label, info in self.rate.items()}
+
+github_client = GitHubClient()
@@ -1,10 +1,16 @@
 # tools_lab/image_generation.py
 
 import aiohttp
+import asyncio
+import json
 import random
 import os
+import uuid
 import urllib.parse
 
+from metrics import metrics, key_label
+from upstreams import HF_INFERENCE_URL, POLLINATIONS_URL
+
 # --- PROMPT ENHANCERS ---
 # Ye prompts ko chupke se modify karke quality badhayenge
 REALISTIC_SUFFIX = ", hyperrealistic, 8k resolution, highly detailed, photorealistic, cinematic lighting, sharp focus, raw photo, shot on dslr"
@@ -13,6 +19,8 @@ PAINTING_SUFFIX = ", beautiful digital painting, brushstrokes, artistic style, c
 NEGATIVE_PROMPT = "cartoon, anime, blurry, deformed, disfigured, bad anatomy, ugly, pixelated, low quality, watermark, text, signature"
 
 # --- TIER 1: FREE MODE ENGINE (Pollinations AI Optimized) ---
+FREE_REQUEST_TIMEOUT = float(os.getenv("IMAGE_FREE_TIMEOUT", 60))
+
 async def generate_image_free(prompt: str, style_mode: str = "realistic"):
     try:
         # 1. Prompt Engineering based on style
@@ -28,22 +36,36 @@ async def generate_image_free(prompt: str, style_mode: str = "realistic"):
         
         # Pollinations URL construct (using Turbo model for speed & quality)
         # Hum negative prompt bhi pass kar rahe hain taaki quality improve ho
-        image_url = f"https://pollinations.ai/p/{encoded_prompt}?negative_prompt={encoded_negative}&model=turbo&width=1024&height=1024&seed={random.randint(0, 999999)}"
+        image_url = f"{POLLINATIONS_URL}/p/{encoded_prompt}?negative_prompt={encoded_negative}&model=turbo&width=1024&height=1024&seed={random.randint(0, 999999)}"
         
         # Check if URL actually works
-        async with aiohttp.ClientSession() as session:
-            async with session.get(image_url) as resp:
-                if resp.status == 200:
-                    return image_url
-                else:
-                    return "⚠️ Free tier server busy. Try Pro mode."
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=FREE_REQUEST_TIMEOUT)) as session:
+            with metrics.span("upstream_seconds", provider="pollinations", model="turbo"):
+                async with session.get(image_url) as resp:
+                    status = resp.status
+            if status == 200:
+                return image_url
+            else:
+                return "⚠️ Free tier server busy. Try Pro mode."
                     
     except Exception as e:
         print(f"Free Image Gen Error: {e}")
         return f"⚠️ Generation failed: {str(e)}"
 
 # --- TIER 2: PRO MODE ENGINE (HF Serverless API - The Real Deal) ---
-async def generate_image_pro(prompt: str, style_mode: str = "realistic"):
+PRO_MODEL_ID = "stabilityai/stable-diffusion-xl-base-1.0"
+PRO_REQUEST_TIMEOUT = float(os.getenv("IMAGE_PRO_TIMEOUT", 120))
+PRO_MAX_WAIT = float(os.getenv("IMAGE_PRO_MAX_WAIT", 300))   # Model warm-up ke liye total kitna ruk sakte hain
+PRO_MAX_ATTEMPTS = int(os.getenv("IMAGE_PRO_MAX_ATTEMPTS", 6))
+
+def parse_estimated_time(body: bytes, default: float = 20.0):
+    # HF 503 body: {"error": "Model ... is currently loading", "estimated_time": 23.4}
+    try:
+        return max(1.0, float(json.loads(body).get("estimated_time", default)))
+    except Exception:
+        return default
+
+async def generate_image_pro(prompt: str, style_mode: str = "realistic", on_progress=None):
     # Iske liye tumhe .env mein HUGGINGFACE_PRO_TOKEN dalna padega
     # (Apne main HF account se ek WRITE token bana lena)
     hf_token = os.getenv("HUGGINGFACE_PRO_TOKEN")
@@ -53,8 +75,7 @@ async def generate_image_pro(prompt: str, style_mode: str = "realistic"):
     # PRO MODEL SELECTION:
     # Realistic ke liye SDXL 1.0 Base use karenge (Best for realism on HF API)
     # Painting ke liye bhi ye acha hai, bas prompt badal denge.
-    model_id = "stabilityai/stable-diffusion-xl-base-1.0"
-    api_url = f"https://api-inference.huggingface.co/models/{model_id}"
+    api_url = f"{HF_INFERENCE_URL}/{PRO_MODEL_ID}"
     
     headers = {"Authorization": f"Bearer {hf_token}"}
     
@@ -76,33 +97,56 @@ async def generate_image_pro(prompt: str, style_mode: str = "realistic"):
         }
     }
 
+    async def report(stage, **info):
+        if on_progress:
+            try: await on_progress(stage, **info)
+            except Exception as e: print(f"Image Progress Error: {e}")
+
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(api_url, headers=headers, json=payload) as resp:
-                if resp.status != 200:
-                    err = await resp.read()
-                    print(f"HF Pro API Error: {err}")
-                    # Agar model load ho raha hai (503 error)
-                    if resp.status == 503:
-                         return "⚠️ Pro Model is waking up (loading). Please try again in 30 seconds."
+        waited = 0.0
+        timeout = aiohttp.ClientTimeout(total=PRO_REQUEST_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            for attempt in range(1, PRO_MAX_ATTEMPTS + 1):
+                await report("generating", attempt=attempt)
+                with metrics.span("upstream_seconds", provider="huggingface", model=PRO_MODEL_ID, key=key_label(hf_token)) as labels:
+                    async with session.post(api_url, headers=headers, json=payload) as resp:
+                        body = await resp.read()
+                        if resp.status != 200: labels["status"] = str(resp.status)
+                if resp.status == 200:
+                    image_bytes = body
+                    break
+                err = body
+                print(f"HF Pro API Error: {err}")
+                if resp.status != 503:
                     return f"⚠️ Pro API Error: {resp.status}"
-                
-                image_bytes = await resp.read()
-                
-                # Image ko temporarily save karna padega taaki frontend ko bhej sakein
-                # (Production mein isko S3 bucket ya Cloudinary pe dalte hain, abhi local save karte hain)
-                filename = f"gen_{random.randint(1000,9999)}.png"
-                filepath = os.path.join("static", "generated_images", filename)
-                
-                # Ensure directory exists
-                os.makedirs(os.path.join("static", "generated_images"), exist_ok=True)
-                
-                with open(filepath, "wb") as f:
-                    f.write(image_bytes)
-                    
-                # Return local path accessible by frontend
-                return f"/static/generated_images/{filename}"
 
+                # 503 = model load ho raha hai. HF batata hai kitna time lagega, utna ruk ke retry.
+                eta = parse_estimated_time(err)
+                if attempt == PRO_MAX_ATTEMPTS or waited + eta > PRO_MAX_WAIT:
+                    return "⚠️ Pro Model is still waking up. Please try again in a minute."
+                await report("waiting_model", attempt=attempt, eta=eta)
+                await asyncio.sleep(eta)
+                waited += eta
+            else:
+                return "⚠️ Pro Model is still waking up. Please try again in a minute."
+
+        # Image ko temporarily save karna padega taaki frontend ko bhej sakein
+        # (Production mein isko S3 bucket ya Cloudinary pe dalte hain, abhi local save karte hain)
+        filename = f"gen_{uuid.uuid4().hex[:12]}.png"
+        filepath = os.path.join("static", "generated_images", filename)
+        
+        # Ensure directory exists
+        os.makedirs(os.path.join("static", "generated_images"), exist_ok=True)
+        
+        with open(filepath, "wb") as f:
+            f.write(image_bytes)
+            
+        # Return local path accessible by frontend
+        return f"/static/generated_images/{filename}"
+
+    except asyncio.TimeoutError:
+        print("Pro Image Gen Error: request timed out")
+        return "⚠️ Pro generation timed out. Please try again."
     except Exception as e:
          print(f"Pro Image Gen Error: {e}")
-         return f"⚠️ Pro generation failed: {str(e)}"
\ No newline at end of file
+         return f"⚠️ Pro generation failed: {str(e)}"
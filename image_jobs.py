@@ -0,0 +1,131 @@
+# ==================================================================================
+#  FILE: image_jobs.py
+#  DESCRIPTION: Background Job Queue for Image Generation (Free + Pro Tiers)
+# ==================================================================================
+
+import asyncio
+import os
+import time
+import uuid
+
+from image_generation import generate_image_free, generate_image_pro
+
+# Har tier ke liye kitni generations ek saath chal sakti hain (per worker process)
+TIER_CONCURRENCY = {
+    "free": int(os.getenv("IMAGE_FREE_CONCURRENCY", 4)),
+    "pro": int(os.getenv("IMAGE_PRO_CONCURRENCY", 2)),
+}
+JOB_TTL_SECONDS = int(os.getenv("IMAGE_JOB_TTL", 3600))
+FINISHED_STATES = ("done", "error")
+
+class ImageJobQueue:
+    """In-process job queue: submit() turant job_id deta hai, workers background mein image banate hain.
+
+    Jobs sirf isi process ki memory mein rehte hain, isliye polling usi worker pe aani chahiye
+    jisne job liya tha (single worker / sticky sessions).
+    """
+
+    def __init__(self, on_success=None):
+        self.jobs = {}
+        self.on_success = on_success
+        self._queues = {}
+        self._workers = []
+        self._changed = {}
+
+    def _ensure_workers(self):
+        # Workers lazily start hote hain kyunki event loop import time pe available nahi hota
+        if self._workers: return
+        for tier, limit in TIER_CONCURRENCY.items():
+            self._queues[tier] = asyncio.Queue()
+            for _ in range(max(1, limit)):
+                self._workers.append(asyncio.create_task(self._worker(tier)))
+
+    def _prune(self):
+        cutoff = time.time() - JOB_TTL_SECONDS
+        for job_id in [j for j, job in self.jobs.items() if job["status"] in FINISHED_STATES and job["updated_at"] < cutoff]:
+            self.jobs.pop(job_id, None)
+            self._changed.pop(job_id, None)
+
+    def _update(self, job, **fields):
+        job.update(fields, updated_at=time.time())
+        # Purana event set karke naya bana do, taaki SSE listeners jaag jaayein
+        event = self._changed.get(job["id"])
+        self._changed[job["id"]] = asyncio.Event()
+        if event: event.set()
+
+    def submit(self, user_email, prompt, style="realistic", tier="free"):
+        self._ensure_workers()
+        self._prune()
+        tier = tier if tier in TIER_CONCURRENCY else "free"
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        job = {
+            "id": job_id, "user_email": user_email, "prompt": prompt, "style": style, "tier": tier,
+            "status": "queued", "message": "Queued", "eta": None, "attempt": 0,
+            "image_url": None, "error": None, "created_at": now, "updated_at": now,
+        }
+        self.jobs[job_id] = job
+        self._changed[job_id] = asyncio.Event()
+        self._queues[tier].put_nowait(job_id)
+        return job
+
+    def get(self, job_id, user_email=None):
+        job = self.jobs.get(job_id)
+        if not job or (user_email and job["user_email"] != user_email): return None
+        return job
+
+    def public_view(self, job):
+        view = {k: job[k] for k in ("id", "status", "message", "eta", "attempt", "tier", "image_url", "error")}
+        view["queue_position"] = self._queue_position(job) if job["status"] == "queued" else 0
+        return view
+
+    def _queue_position(self, job):
+        queued = [j for j in self.jobs.values() if j["tier"] == job["tier"] and j["status"] == "queued"]
+        queued.sort(key=lambda j: j["created_at"])
+        return next((i + 1 for i, j in enumerate(queued) if j["id"] == job["id"]), 0)
+
+    async def wait_for_change(self, job_id, timeout=15.0):
+        event = self._changed.get(job_id)
+        if not event: return False
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _worker(self, tier):
+        queue = self._queues[tier]
+        while True:
+            job_id = await queue.get()
+            job = self.jobs.get(job_id)
+            try:
+                if job: await self._run(job)
+            except Exception as e:
+                print(f"Image Job Error: {e}")
+                if job: self._update(job, status="error", message="Generation failed", error=f"⚠️ Generation failed: {str(e)}")
+            finally:
+                queue.task_done()
+
+    async def _run(self, job):
+        self._update(job, status="running", message="Generating image...")
+
+        async def on_progress(stage, attempt=0, eta=None):
+            if stage == "waiting_model":
+                self._update(job, status="waiting_model", attempt=attempt, eta=eta, message=f"Pro model is waking up, retrying in ~{int(eta)}s")
+            else:
+                self._update(job, status="running", attempt=attempt, eta=None, message="Generating image...")
+
+        if job["tier"] == "pro":
+            image_url = await generate_image_pro(job["prompt"], job["style"], on_progress=on_progress)
+        else:
+            image_url = await generate_image_free(job["prompt"], job["style"])
+
+        # Agar koi error message aaya ho (start with ⚠️)
+        if image_url.startswith("⚠️"):
+            self._update(job, status="error", message="Generation failed", error=image_url)
+            return
+
+        self._update(job, status="done", message="Done", eta=None, image_url=image_url)
+        if self.on_success:
+            try: await self.on_success(job)
+            except Exception as e: print(f"Image Job Callback Error: {e}")
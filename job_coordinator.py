@@ -0,0 +1,218 @@
+# ==================================================================================
+#  FILE: job_coordinator.py
+#  DESCRIPTION: Multi-Worker Job Coordination (Mongo Lease Leader Election + Run Records + Chunks)
+# ==================================================================================
+#  - Leader: job_locks mein ek lease doc. Heartbeat se renew; leader mar gaya toh lease expire
+#    hote hi koi aur worker le leta hai (takeover).
+#  - Sirf leader scheduled jobs fire karta hai. Har fire ek run record (_id = job|slot, unique),
+#    toh lease overlap mein do leaders bhi same slot do baar nahi chala sakte.
+#  - Run users ke _id ranges (chunks) mein bant-ta hai; har worker pending chunks claim karta hai
+#    (apni chunk lease ke saath), toh workers badhane se capacity badhti hai, duplicate kaam nahi.
+# ==================================================================================
+
+import asyncio
+import os
+import socket
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from metrics import metrics
+
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 30))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", 10))
+JOB_CHUNK_LEASE_SECONDS = float(os.getenv("JOB_CHUNK_LEASE_SECONDS", 300))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 5))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_RECORD_RETENTION_DAYS = int(os.getenv("JOB_RECORD_RETENTION_DAYS", 30))
+LEADER_LOCK = "scheduler-leader"
+
+class JobCoordinator:
+    """Collections: locks {_id, owner, expires_at, term}, runs {_id: job|slot, ...}, chunks {_id: run|i, ...}.
+
+    Job handler: async fn(user_filter) -> processed count. Chunk retry pe dobara chal sakta hai,
+    isliye handler per-user idempotent hona chahiye.
+    """
+
+    def __init__(self, locks, runs, chunks, units, worker_id=None):
+        self.locks = locks
+        self.runs = runs
+        self.chunks = chunks
+        self.units = units   # jis collection ke _id ranges pe chunks bante hain (users)
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.jobs = {}        # name -> (handler, chunk_size)
+        self.is_leader = False
+        self.term = 0
+
+    async def ensure_indexes(self):
+        await self.chunks.create_index([("status", 1), ("lease_until", 1)])
+        await self.chunks.create_index("run_id")
+        await self.runs.create_index([("job", 1), ("started_at", -1)])
+        await self.runs.create_index("expires_at", expireAfterSeconds=0)
+        await self.chunks.create_index("expires_at", expireAfterSeconds=0)
+
+    def register(self, name, handler, chunk_size=100):
+        self.jobs[name] = (handler, chunk_size)
+
+    # ==================================================================================
+    # [CATEGORY] LEADER ELECTION
+    # ==================================================================================
+    async def try_acquire(self):
+        """Lease lo ya renew karo. Returns True agar ab hum leader hain."""
+        now = datetime.utcnow()
+        lease = {"owner": self.worker_id, "expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS), "heartbeat_at": now}
+        try:
+            doc = await self.locks.find_one_and_update(
+                {"_id": LEADER_LOCK, "$or": [{"owner": self.worker_id}, {"expires_at": {"$lt": now}}]},
+                {"$set": lease, "$inc": {"term": 0 if self.is_leader else 1}},
+                upsert=True, return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Doc hai aur kisi aur ki valid lease hai: upsert ne naya _id banane ki koshish ki
+            doc = None
+        except Exception as e:
+            # Mongo na mile toh leadership chhod do; lease expire hone se pehle koi aur nahi lega
+            print(f"Leader Lease Error: {e}")
+            doc = None
+        was_leader, self.is_leader = self.is_leader, bool(doc and doc.get("owner") == self.worker_id)
+        if self.is_leader:
+            self.term = doc.get("term", 0)
+            if not was_leader: print(f"👑 Scheduler leader: {self.worker_id} (term {self.term})")
+        elif was_leader: print(f"Scheduler leadership lost: {self.worker_id}")
+        return self.is_leader
+
+    async def release(self):
+        # Shutdown pe lease chhod do taaki doosra worker turant le sake (expiry ka wait nahi)
+        if not self.is_leader: return
+        self.is_leader = False
+        try: await self.locks.update_one({"_id": LEADER_LOCK, "owner": self.worker_id}, {"$set": {"expires_at": datetime.utcnow()}})
+        except Exception as e: print(f"Leader Release Error: {e}")
+
+    async def heartbeat_forever(self, interval=JOB_HEARTBEAT_SECONDS):
+        while True:
+            if await self.try_acquire(): await self._recover()
+            await asyncio.sleep(interval)
+
+    # ==================================================================================
+    # [CATEGORY] RUNS & CHUNKS
+    # ==================================================================================
+    async def fire(self, name, slot=None):
+        """Scheduler callback. Har worker mein fire hota hai; sirf leader run banata hai."""
+        if not self.is_leader or name not in self.jobs: return None
+        slot = slot or datetime.utcnow().replace(second=0, microsecond=0)
+        run_id = f"{name}|{slot.strftime('%Y-%m-%dT%H:%M')}"
+        now = datetime.utcnow()
+        try:
+            await self.runs.insert_one({
+                "_id": run_id, "job": name, "slot": slot, "status": "planning", "leader": self.worker_id, "term": self.term,
+                "started_at": now, "chunks_total": 0, "chunks_done": 0, "chunks_failed": 0, "processed": 0,
+                "expires_at": now + timedelta(days=JOB_RECORD_RETENTION_DAYS),
+            })
+        except DuplicateKeyError:
+            return None   # yeh slot kisi aur leader ne le liya
+        await self._plan(run_id, name)
+        return run_id
+
+    async def _plan(self, run_id, name):
+        # Boundaries: har chunk_size-th _id (sirf _id index padhta hai). Chunk ids deterministic,
+        # toh naya leader adhoori planning dobara kare toh duplicate chunks nahi bante.
+        _, chunk_size = self.jobs[name]
+        bounds, i = [], 0
+        async for doc in self.units.find({}, {"_id": 1}).sort("_id", 1):
+            if i % chunk_size == 0: bounds.append(doc["_id"])
+            i += 1
+        now = datetime.utcnow()
+        docs = [{
+            "_id": f"{run_id}|{n}", "run_id": run_id, "job": name, "lo": lo, "hi": bounds[n + 1] if n + 1 < len(bounds) else None,
+            "status": "pending", "attempts": 0, "lease_until": now, "created_at": now, "expires_at": now + timedelta(days=JOB_RECORD_RETENTION_DAYS),
+        } for n, lo in enumerate(bounds)]
+        if docs:
+            try: await self.chunks.insert_many(docs, ordered=False)
+            except Exception as e:
+                if "E11000" not in str(e): raise
+        await self.runs.update_one({"_id": run_id, "status": "planning"}, {"$set": {"status": "running" if docs else "done", "chunks_total": len(docs), **({} if docs else {"finished_at": now, "duration_s": 0.0})}})
+
+    async def _recover(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=JOB_LEASE_SECONDS)
+        try:
+            # Purana leader run insert karke chunks banane se pehle mar gaya ho
+            async for run in self.runs.find({"status": "planning", "started_at": {"$lt": cutoff}}, {"job": 1}):
+                if run["job"] in self.jobs: await self._plan(run["_id"], run["job"])
+            # Aakhri attempt pe worker crash: chunk "running" mein atka rehta, run kabhi khatam na hota
+            while True:
+                chunk = await self.chunks.find_one_and_update(
+                    {"status": "running", "lease_until": {"$lt": datetime.utcnow()}, "attempts": {"$gte": JOB_MAX_ATTEMPTS}},
+                    {"$set": {"status": "failed", "finished_at": datetime.utcnow(), "error": "lease expired on last attempt"}},
+                )
+                if not chunk: break
+                await self._finish_chunk(chunk["run_id"], "failed", 0)
+        except Exception as e: print(f"Job Recovery Error: {e}")
+
+    async def _claim(self):
+        now = datetime.utcnow()
+        return await self.chunks.find_one_and_update(
+            {"status": {"$in": ["pending", "running"]}, "lease_until": {"$lte": now}, "attempts": {"$lt": JOB_MAX_ATTEMPTS}},
+            {"$set": {"status": "running", "owner": self.worker_id, "lease_until": now + timedelta(seconds=JOB_CHUNK_LEASE_SECONDS), "started_at": now}, "$inc": {"attempts": 1}},
+            sort=[("created_at", 1)], return_document=ReturnDocument.AFTER,
+        )
+
+    async def _renew_chunk_lease(self, chunk_id):
+        while True:
+            await asyncio.sleep(JOB_CHUNK_LEASE_SECONDS / 3)
+            until = datetime.utcnow() + timedelta(seconds=JOB_CHUNK_LEASE_SECONDS)
+            await self.chunks.update_one({"_id": chunk_id, "owner": self.worker_id, "status": "running"}, {"$set": {"lease_until": until}})
+
+    async def run_chunk(self, chunk):
+        handler, _ = self.jobs[chunk["job"]]
+        user_filter = {"_id": {"$gte": chunk["lo"]} if chunk["hi"] is None else {"$gte": chunk["lo"], "$lt": chunk["hi"]}}
+        renew = asyncio.create_task(self._renew_chunk_lease(chunk["_id"]))
+        started = time.perf_counter()
+        try:
+            with metrics.span("job_chunk_seconds", job=chunk["job"]):
+                processed = await handler(user_filter)
+            status, error = "done", None
+        except Exception as e:
+            traceback.print_exc()
+            processed = 0
+            # Attempts bache hain toh lease turant chhodo, koi bhi worker dobara utha le
+            status, error = ("failed" if chunk["attempts"] >= JOB_MAX_ATTEMPTS else "pending"), str(e)[:500]
+        finally: renew.cancel()
+
+        duration = round(time.perf_counter() - started, 3)
+        update = {"status": status, "finished_at": datetime.utcnow(), "duration_s": duration, "processed": processed or 0, "error": error}
+        if status == "pending": update["lease_until"] = datetime.utcnow()
+        result = await self.chunks.update_one({"_id": chunk["_id"], "owner": self.worker_id, "status": "running"}, {"$set": update})
+        # Lease kisi aur ko mil chuki ho (hum bahut slow the) toh run counters woh worker update karega
+        if result.modified_count and status != "pending": await self._finish_chunk(chunk["run_id"], status, processed or 0)
+        return status
+
+    async def _finish_chunk(self, run_id, status, processed):
+        field = "chunks_done" if status == "done" else "chunks_failed"
+        run = await self.runs.find_one_and_update({"_id": run_id}, {"$inc": {field: 1, "processed": processed}}, return_document=ReturnDocument.AFTER)
+        if run and run["chunks_done"] + run["chunks_failed"] >= run["chunks_total"] and run["status"] == "running":
+            finished = datetime.utcnow()
+            await self.runs.update_one({"_id": run_id, "status": "running"}, {"$set": {
+                "status": "done" if not run["chunks_failed"] else "partial",
+                "finished_at": finished, "duration_s": round((finished - run["started_at"]).total_seconds(), 3),
+            }})
+
+    async def work_forever(self, poll=JOB_POLL_SECONDS):
+        """Har worker (leader ho ya nahi) pending chunks uthata hai."""
+        while True:
+            try:
+                chunk = await self._claim()
+                if chunk:
+                    await self.run_chunk(chunk)
+                    continue   # aur kaam ho sakta hai, turant agla claim
+            except Exception as e: print(f"Job Worker Error: {e}")
+            await asyncio.sleep(poll)
+
+    async def recent_runs(self, limit=20):
+        return await self.runs.find({}, {"expires_at": 0}).sort("started_at", -1).limit(limit).to_list(length=limit)
+
+    async def leader(self):
+        return await self.locks.find_one({"_id": LEADER_LOCK})
@@ -4,53 +4,49 @@
 # ==================================================================================
 
 # [CATEGORY] 1. IMPORTS
+import time
+STARTUP_BEGAN = time.perf_counter()
 from fastapi import FastAPI, Request, UploadFile, File, Form, Depends, HTTPException, status, BackgroundTasks
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse, Response, FileResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.sessions import SessionMiddleware
 from authlib.integrations.starlette_client import OAuth
 from pydantic import BaseModel
 from motor.motor_asyncio import AsyncIOMotorClient
-from apscheduler.schedulers.background import BackgroundScheduler
+from bson import ObjectId
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import asyncio
 import uuid
 import os
 import json
 import httpx 
-import base64 
-from groq import Groq
-from duckduckgo_search import DDGS
-import google.generativeai as genai 
-import io
-import PyPDF2
-from docx import Document
-import PIL.Image 
+import gzip
 import random 
 import re 
-from pdf2docx import Converter 
-import tempfile 
-from pinecone import Pinecone, ServerlessSpec
-import numpy as np
-import hashlib 
-from passlib.context import CryptContext
+from collections import OrderedDict
 from datetime import datetime, timedelta
-import edge_tts 
-# main.py ke top par
-from image_generation import generate_image_free, generate_image_pro
+# Heavy SDKs (groq, genai, pinecone, edge_tts, duckduckgo_search) pehli zarurat pe import hote hain
+from image_jobs import ImageJobQueue
+from currency_engine import rate_table
+from session_store import SessionStore, ServerSessionMiddleware
+from password_security import hash_password, verify_password, login_throttle
+from static_assets import PrecompressedStaticFiles, asset_url
+from metrics import metrics, key_label
+from error_log import ErrorLog
+from usage_counters import UsageCounter
+from job_coordinator import JobCoordinator
+from diary_context import DiaryDigest, day_start
+from memory_store import MemoryStore, vector_id, normalize as normalize_memory
+from memory_consolidation import MemoryConsolidator
+from vector_index import EMBED_BATCH, embed_batch, upsert_vectors, delete_vectors, query_memories, check_consistency
+from admission import Admission, MongoBuckets, MemoryBuckets, ACTION_COSTS, ADMISSION_STORE, client_ip
+from model_router import router
+from upstreams import OPENROUTER_CHAT_URL, BREVO_EMAIL_URL, PINECONE_HOST, configure_genai
+from context_builder import build_messages, render_context_history, turns_after_summary, HISTORY_TAIL, SessionSummarizer
 
 # Local Tool Imports
-from tools_lab import (
-    generate_prompt_only, generate_qr_code, 
-    analyze_resume, review_github, currency_tool,
-    summarize_youtube, generate_password_tool, fix_grammar_tool,
-    generate_interview_questions, handle_mock_interview,
-    solve_math_problem, smart_todo_maker, build_pro_resume,
-    sing_with_me_tool, run_agent_task, generate_flashcards_tool,
-    cold_email_tool, fitness_coach_tool, feynman_explainer_tool, 
-    code_debugger_tool, movie_talker_tool, anime_talker_tool
-)
+from tool_registry import TOOLS, get_tool, run_tool, stream_tool
 
 # ==================================================================================
 # [CATEGORY] 2. CONFIGURATION & KEYS
@@ -94,20 +90,30 @@ DEFAULT_SYSTEM_INSTRUCTIONS = load_system_instructions()
 # ==================================================================================
 # [CATEGORY] 4. DATABASE & SECURITY SETUP
 # ==================================================================================
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 pc = None
 index = None
-try:
-    if PINECONE_API_KEY:
-        pc = Pinecone(api_key=PINECONE_API_KEY)
-        index_name = "shanvika-memory"
-        existing_indexes = pc.list_indexes().names()
-        if index_name not in existing_indexes:
-            try: pc.create_index(name=index_name, dimension=768, metric='cosine', spec=ServerlessSpec(cloud='aws', region='us-east-1'))
-            except: pass
-        index = pc.Index(index_name)
-except: pass
+
+def connect_pinecone():
+    # Network calls (list_indexes / create_index) -> startup ke baad background thread mein
+    global pc, index
+    if not PINECONE_API_KEY: return
+    from pinecone import Pinecone, ServerlessSpec
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+    if PINECONE_HOST:
+        index = pc.Index(host=PINECONE_HOST)
+        return
+    index_name = "shanvika-memory"
+    existing_indexes = pc.list_indexes().names()
+    if index_name not in existing_indexes:
+        try: pc.create_index(name=index_name, dimension=768, metric='cosine', spec=ServerlessSpec(cloud='aws', region='us-east-1'))
+        except: pass
+    index = pc.Index(index_name)
+
+async def init_external_clients():
+    started = time.perf_counter()
+    try: await asyncio.to_thread(connect_pinecone)
+    except Exception as e: print(f"Pinecone Init Error: {e}")
+    print(f"⏱️ External clients ready in {(time.perf_counter() - started) * 1000:.0f} ms")
 
 client = AsyncIOMotorClient(MONGO_URL)
 db = client.shanvika_db
@@ -116,9 +122,41 @@ chats_collection = db.chats
 otp_collection = db.otps 
 feedback_collection = db.feedback 
 diary_collection = db.diary
+diary_digests_collection = db.diary_digests
+memories_collection = db.memories
+memory_consolidations_collection = db.memory_consolidations
 gallery_collection = db.gallery 
-tool_usage_collection = db.tool_usage
-error_logs_collection = db.error_logs
+usage_buckets_collection = db.usage_buckets
+usage_counter = UsageCounter(usage_buckets_collection)
+error_groups_collection = db.error_groups
+error_samples_collection = db.error_samples
+error_log = ErrorLog(error_groups_collection, error_samples_collection)
+sessions_collection = db.sessions
+session_store = SessionStore(sessions_collection)
+job_locks_collection = db.job_locks
+job_runs_collection = db.job_runs
+job_chunks_collection = db.job_chunks
+admission_buckets_collection = db.admission_buckets
+# Memories apne collection mein; user doc chhota rehta hai
+memory_store = MemoryStore(memories_collection, users_collection)
+# Din bhar ke chat turns ka digest; raat ka diary job yahi padhta hai
+diary_digest = DiaryDigest(diary_digests_collection, chats_collection)
+# Token buckets Mongo mein taaki saare workers/replicas ek hi limit dekhein
+admission = Admission(MongoBuckets(admission_buckets_collection) if ADMISSION_STORE == "mongo" else MemoryBuckets())
+
+async def ensure_indexes():
+    try:
+        await chats_collection.create_index([("user_email", 1), ("last_activity", -1), ("_id", -1)])
+        await chats_collection.create_index("session_id")
+        await session_store.ensure_indexes()
+        await error_log.ensure_indexes()
+        await usage_counter.ensure_indexes()
+        await job_coordinator.ensure_indexes()
+        await admission.ensure_indexes()
+        await diary_digest.ensure_indexes()
+        await memory_store.ensure_indexes()
+        await memory_consolidator.ensure_indexes()
+    except Exception as e: print(f"Index Setup Error: {e}")
 
 # ==================================================================================
 # [CATEGORY] 5. HELPER FUNCTIONS
@@ -128,9 +166,18 @@ def get_random_groq_key():
     possible_keys = [k.strip() for k in keys if k.strip()]
     return random.choice(possible_keys) if possible_keys else os.getenv("GROQ_API_KEY")
 
-def get_groq():
+GROQ_CHAT_MODEL = "llama-3.3-70b-versatile"
+
+def groq_chat(messages, model=GROQ_CHAT_MODEL):
+    """Groq completion + upstream latency. Key na ho toh None."""
     key = get_random_groq_key()
-    return Groq(api_key=key) if key else None
+    if not key: return None
+    from groq import Groq
+    with metrics.span("upstream_seconds", provider="groq", model=model, key=key_label(key)):
+        return Groq(api_key=key).chat.completions.create(messages=messages, model=model).choices[0].message.content
+
+# Purani baaton ki rolling summary: chhota, sasta model kaafi hai
+session_summarizer = SessionSummarizer(chats_collection, lambda messages: groq_chat(messages, model="llama-3.1-8b-instant"))
 
 def get_random_gemini_key():
     keys = os.getenv("GEMINI_API_KEY_POOL", "").split(",")
@@ -144,33 +191,62 @@ def get_random_openrouter_key():
 
 async def get_current_user(request: Request): return request.session.get('user')
 
-def verify_password(plain, hashed): return pwd_context.verify(hashlib.sha256(plain.encode()).hexdigest(), hashed) if plain and hashed else False
-def get_password_hash(password): return pwd_context.hash(hashlib.sha256(password.encode()).hexdigest())
+async def user_is_pro(email):
+    if email == ADMIN_EMAIL: return True
+    doc = await users_collection.find_one({"email": email}, {"is_pro": 1})
+    return bool(doc and doc.get("is_pro"))
+
+async def admit_request(request, user, cost, shed=False):
+    """Returns (tier, None) ya (tier, 429 response). shed=True pe admit hone ke baad admission.release(tier) zaroori."""
+    ip = client_ip(request)
+    tier = await admission.tier_for(user, user_is_pro) if user else "guest"
+    decision = await admission.admit(user['email'] if user else f"anon:{ip}", ip, tier, cost, shed=shed)
+    if decision.ok: return tier, None
+    message = "⚠️ Server is busy right now. Please try again in a moment." if decision.reason == "overloaded" else f"⚠️ Too many requests. Please wait {decision.retry_after}s and try again."
+    # Chat UI 'reply' padhta hai, baaki pages 'message'
+    return tier, JSONResponse({"status": "error", "reply": message, "message": message}, 429, headers={"Retry-After": str(decision.retry_after)})
 
 def send_email(to, subject, body):
     api = os.getenv("BREVO_API_KEY")
     if not api: return False
     try:
-        httpx.post("https://api.brevo.com/v3/smtp/email", headers={"api-key": api, "content-type": "application/json"}, json={"sender": {"email": os.getenv("MAIL_USERNAME"), "name": "Shanvika"}, "to": [{"email": to}], "subject": subject, "htmlContent": body})
+        httpx.post(BREVO_EMAIL_URL, headers={"api-key": api, "content-type": "application/json"}, json={"sender": {"email": os.getenv("MAIL_USERNAME"), "name": "Shanvika"}, "to": [{"email": to}], "subject": subject, "htmlContent": body})
         return True
     except: return False
 
 def get_embedding(text):
     try:
+        import google.generativeai as genai
         key = get_random_gemini_key()
-        if key: genai.configure(api_key=key)
-        return genai.embed_content(model="models/embedding-001", content=text, task_type="retrieval_document")['embedding']
+        configure_genai(genai, key)
+        with metrics.span("upstream_seconds", provider="gemini", model="embedding-001", key=key_label(key)):
+            return genai.embed_content(model="models/embedding-001", content=text, task_type="retrieval_document")['embedding']
     except: return []
 
+def get_embeddings(texts):
+    # Ek Gemini call mein poora batch (har text ke liye alag call nahi)
+    try:
+        key = get_random_gemini_key()
+        with metrics.span("upstream_seconds", provider="gemini", model="embedding-001:batch", key=key_label(key)):
+            return embed_batch(texts, key)
+    except Exception as e:
+        print(f"Batch Embedding Error: {e}")
+        return []
+
 def search_vector_db(query, user_email):
     if not index: return ""
     vec = get_embedding(query)
     if not vec: return ""
-    res = index.query(vector=vec, top_k=3, include_metadata=True, filter={"email": user_email})
-    return "\n".join([m['metadata']['text'] for m in res['matches']])
+    # User ka apna namespace: query ka kaam user ki memories jitna, poore index jitna nahi
+    with metrics.span("upstream_seconds", provider="pinecone", model="query"):
+        return "\n".join(query_memories(index, user_email, vec))
 
 async def perform_research_task(query):
-    try: return "📊 **Research:**\n\n" + "\n\n".join([f"🔹 **{r['title']}**\n{r['body']}" for r in DDGS().text(query, max_results=3)])
+    from duckduckgo_search import DDGS
+    try:
+        with metrics.span("upstream_seconds", provider="duckduckgo", model="text"):
+            results = await asyncio.to_thread(lambda: DDGS().text(query, max_results=3))
+        return "📊 **Research:**\n\n" + "\n\n".join([f"🔹 **{r['title']}**\n{r['body']}" for r in results])
     except: return "⚠️ Research failed."
 
 async def extract_and_save_memory(user_email: str, user_message: str):
@@ -194,67 +270,124 @@ async def extract_and_save_memory(user_email: str, user_message: str):
         data = {"model": selected_model, "messages": [{"role": "user", "content": extraction_prompt}]}
         
         async with httpx.AsyncClient() as http_client:
-            resp = await http_client.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=data, timeout=15.0)
+            with metrics.span("upstream_seconds", provider="openrouter", model=selected_model, key=key_label(openrouter_key)):
+                resp = await http_client.post(OPENROUTER_CHAT_URL, headers=headers, json=data, timeout=15.0)
             response = resp.json()['choices'][0]['message']['content'].strip()
 
         if "NO_DATA" not in response and len(response) > 5:
             clean_memory = response.replace("User", "You").replace("user", "You").replace("Shanvika", "me")
             
-            # 🚀 Duplicate Check: Agar pehle se save hai toh dobara nahi karegi
-            db_user = await users_collection.find_one({"email": user_email})
-            if db_user and clean_memory in db_user.get("memories", []):
+            # 🚀 Duplicate Check: unique (email, text_hash) index; pehle se save hai toh dobara embed bhi nahi
+            stored = await memory_store.add(user_email, clean_memory, source="auto")
+            if not stored:
                 return 
             
-            await users_collection.update_one({"email": user_email}, {"$push": {"memories": clean_memory}})
-            if index:
-                vec = get_embedding(clean_memory)
-                if vec:
-                    mem_id = f"{user_email}_{hashlib.md5(clean_memory.encode()).hexdigest()}"
-                    index.upsert(vectors=[(mem_id, vec, {"text": clean_memory, "email": user_email})])
+            # Vector stored (normalized) text se: delete bhi usi se id banata hai
+            await save_memory_vectors(user_email, [stored])
     except Exception as e: print(f"Auto-Memory Error: {e}")
 
+# Sidebar history ka chhota per-user LRU cache (sirf pehla page). Har hit pe user ki latest chat ka
+# (_id, last_activity) stamp match hota hai, toh doosre worker pe hua write bhi turant dikhta hai.
+HISTORY_CACHE_TTL = int(os.getenv("HISTORY_CACHE_TTL", 60))
+HISTORY_CACHE_SIZE = int(os.getenv("HISTORY_CACHE_SIZE", 5000))
+HISTORY_PAGE_SIZE = 50
+history_cache = OrderedDict()   # email -> {"page", "limit", "stamp", "at"}
+
+def invalidate_history_cache(user_email):
+    history_cache.pop(user_email, None)
+
+async def history_stamp(user_email):
+    # (user_email, last_activity, _id) index se ek doc: poora page banane se bahut sasta
+    doc = await chats_collection.find_one({"user_email": user_email}, {"last_activity": 1}, sort=[("last_activity", -1), ("_id", -1)])
+    return (doc["_id"], doc.get("last_activity")) if doc else None
+
+def encode_history_cursor(chat):
+    last = chat.get("last_activity")
+    return f"{last.isoformat() if last else ''}|{chat['_id']}"
+
+def decode_history_cursor(cursor):
+    last, _, oid = cursor.partition("|")
+    return (datetime.fromisoformat(last) if last else None), ObjectId(oid)
+
+async def fetch_history_page(user_email, cursor=None, limit=HISTORY_PAGE_SIZE):
+    query = {"user_email": user_email}
+    if cursor:
+        last, oid = decode_history_cursor(cursor)
+        if last:
+            # Purane docs jinke paas last_activity nahi hai wo sabse end mein aate hain
+            query["$or"] = [{"last_activity": {"$lt": last}}, {"last_activity": last, "_id": {"$lt": oid}}, {"last_activity": None}]
+        else:
+            query.update({"last_activity": None, "_id": {"$lt": oid}})
+    projection = {"_id": 1, "session_id": 1, "title": 1, "last_activity": 1}
+    docs = await chats_collection.find(query, projection).sort([("last_activity", -1), ("_id", -1)]).limit(limit + 1).to_list(length=limit + 1)
+    history = [{"id": c["session_id"], "title": c.get("title", "New Chat"), "last_activity": c.get("last_activity")} for c in docs[:limit]]
+    next_cursor = encode_history_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return {"history": history, "next_cursor": next_cursor}
+
 # ==================================================================================
 # [CATEGORY] 6. SCHEDULER TASKS
 # ==================================================================================
-scheduler = BackgroundScheduler()
+# Jobs users ke _id ranges (chunks) mein chalte hain; chunk retry ho sakta hai, isliye har user pe idempotent
+JOB_DIARY_CHUNK = int(os.getenv("JOB_DIARY_CHUNK", 50))
+JOB_PROACTIVE_CHUNK = int(os.getenv("JOB_PROACTIVE_CHUNK", 200))
+JOB_MIGRATION_CHUNK = int(os.getenv("JOB_MIGRATION_CHUNK", 500))
+JOB_CONSOLIDATION_CHUNK = int(os.getenv("JOB_CONSOLIDATION_CHUNK", 50))
+
+async def generate_daily_diary(user_filter=None):
+    today_start = day_start()
+    today = today_start.strftime('%Y-%m-%d')
+    users = await users_collection.find(user_filter or {}, {"email": 1, "name": 1}).to_list(length=None)
+    emails = [u['email'] for u in users]
+    # Pura chunk ek saath: pehle se bani diaries aur aaj ke digests do queries mein (per-user find_one nahi)
+    written = set(await diary_collection.distinct("user_email", {"user_email": {"$in": emails}, "date": today}))
+    contexts = await diary_digest.context_for([e for e in emails if e not in written], today_start)
+    processed = 0
+    for user in users:
+        messages_text = contexts.get(user['email'])
+        if not messages_text: continue
+        try:
+            prompt = f"You are Shanvika. Write a short, emotional, personal diary entry based on today's chat with {user.get('name', 'User')}. Chat:\n{messages_text}"
+            diary_entry = await asyncio.to_thread(groq_chat, [{"role": "user", "content": prompt}])
+            if not diary_entry: continue
+            await diary_collection.update_one(
+                {"user_email": user['email'], "date": today},
+                {"$setOnInsert": {"content": diary_entry, "mood": "Reflective", "timestamp": datetime.utcnow()}},
+                upsert=True,
+            )
+            processed += 1
+        except Exception as e: print(f"Diary Error ({user['email']}): {e}")
+    return processed
 
-async def generate_daily_diary():
-    try:
-        users_cursor = users_collection.find({})
-        async for user in users_cursor:
-            today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            chat_doc = await chats_collection.find_one({
-                "user_email": user['email'],
-                "messages.timestamp": {"$gte": today_start}
-            })
-            if not chat_doc: continue 
-            messages_text = ""
-            for m in chat_doc.get("messages", []):
-                msg_time = m.get("timestamp")
-                if msg_time and msg_time >= today_start:
-                    messages_text += f"{m['role']}: {m['content']}\n"
-            if not messages_text: continue
-            client = get_groq()
-            if not client: continue
-            prompt = f"You are Shanvika. Write a short, emotional, personal diary entry based on today's chat with {user.get('name', 'User')}. Chat:\n{messages_text[:4000]}"
-            diary_entry = client.chat.completions.create(messages=[{"role": "user", "content": prompt}], model="llama-3.3-70b-versatile").choices[0].message.content
-            await diary_collection.insert_one({"user_email": user['email'], "date": datetime.utcnow().strftime('%Y-%m-%d'), "content": diary_entry, "mood": "Reflective", "timestamp": datetime.utcnow()})
-    except Exception as e: print(f"Diary Error: {e}")
-
-async def check_proactive_messaging():
-    try:
-        users_cursor = users_collection.find({})
-        async for user in users_cursor:
+async def check_proactive_messaging(user_filter=None):
+    processed = 0
+    async for user in users_collection.find(user_filter or {}, {"email": 1, "name": 1, "last_proactive_email": 1}):
+        try:
             last_chat = await chats_collection.find_one({"user_email": user['email']}, sort=[("messages.timestamp", -1)])
             if not last_chat or not last_chat.get("messages"): continue
             last_time = last_chat['messages'][-1].get('timestamp')
             if not last_time: continue 
-            if (datetime.utcnow() - last_time) > timedelta(hours=24):
-                last_email = user.get("last_proactive_email")
-                if last_email and (datetime.utcnow() - last_email) < timedelta(hours=48): continue
-                if send_email(user['email'], f"Kaha ho {user.get('name')}? 🥺", "Miss you!"):
-                    await users_collection.update_one({"email": user['email']}, {"$set": {"last_proactive_email": datetime.utcnow()}})
-    except Exception as e: print(f"Proactive Error: {e}")
+            now = datetime.utcnow()
+            if (now - last_time) > timedelta(hours=24):
+                # Pehle claim, phir email: chunk retry ya doosra worker same user ko dobara mail nahi karega
+                claim = await users_collection.update_one(
+                    {"email": user['email'], "$or": [{"last_proactive_email": None}, {"last_proactive_email": {"$lt": now - timedelta(hours=48)}}]},
+                    {"$set": {"last_proactive_email": now}},
+                )
+                if not claim.modified_count: continue
+                if await asyncio.to_thread(send_email, user['email'], f"Kaha ho {user.get('name')}? 🥺", "Miss you!"): processed += 1
+                else: await users_collection.update_one({"email": user['email'], "last_proactive_email": now}, {"$set": {"last_proactive_email": user.get("last_proactive_email")}})
+        except Exception as e: print(f"Proactive Error ({user['email']}): {e}")
+    return processed
+
+scheduler = AsyncIOScheduler()
+job_coordinator = JobCoordinator(job_locks_collection, job_runs_collection, job_chunks_collection, users_collection)
+job_coordinator.register("daily_diary", generate_daily_diary, chunk_size=JOB_DIARY_CHUNK)
+job_coordinator.register("proactive_messaging", check_proactive_messaging, chunk_size=JOB_PROACTIVE_CHUNK)
+# One-time: users.memories arrays -> memories collection. /admin/jobs/memories_migration/run se chalao
+job_coordinator.register("memories_migration", lambda user_filter=None: memory_store.migrate_users(user_filter, on_migrated=rekey_migrated_vectors), chunk_size=JOB_MIGRATION_CHUNK)
+# Near-duplicate memories ("You like anime" / "You love anime") ko ek canonical fact mein merge
+memory_consolidator = MemoryConsolidator(memories_collection, memory_consolidations_collection, users_collection, lambda: index, get_embeddings)
+job_coordinator.register("memory_consolidation", memory_consolidator.consolidate_users, chunk_size=JOB_CONSOLIDATION_CHUNK)
 
 # ==================================================================================
 # [CATEGORY] 7. PYDANTIC MODELS
@@ -265,12 +398,14 @@ class OTPRequest(BaseModel): email: str
 class OTPVerifyRequest(BaseModel): email: str; otp: str
 class LoginRequest(BaseModel): identifier: str; password: str
 class InstructionRequest(BaseModel): instruction: str
-class MemoryRequest(BaseModel): memory_text: str
+class MemoryRequest(BaseModel): memory_text: str = ""; memory_id: str | None = None
+class BulkMemoryRequest(BaseModel): memories: list[str] = []; ids: list[str] = []
 class RenameRequest(BaseModel): session_id: str; new_title: str
 class FeedbackRequest(BaseModel): message_id: str; user_email: str; type: str; category: str; comment: str | None = None
 class UpdateProfileRequest(BaseModel): name: str
 class GalleryDeleteRequest(BaseModel): url: str
 class ToolRequest(BaseModel): topic: str
+class ToolStreamRequest(BaseModel): message: str; session_id: str
 
 # ==================================================================================
 # [CATEGORY] 8. APP SETUP & AUTH
@@ -288,21 +423,89 @@ except Exception as e:
     print(f"Arcade module offline (Safe Mode Active): {e}")
 
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
-app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY, https_only=True, same_site="lax")
+app.add_middleware(ServerSessionMiddleware, store=session_store, https_only=True, same_site="lax")
 
 if not os.path.exists("static"): 
     os.makedirs("static")
-app.mount("/static", StaticFiles(directory=os.path.join(os.getcwd(), "static")), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory=os.path.join(os.getcwd(), "static")), name="static")
 
 templates = Jinja2Templates(directory="templates")
+# Templates mein {{ asset_url('css/style.css') }} -> build_assets.py wala hashed URL
+templates.env.globals["asset_url"] = asset_url
+
+@app.get("/sw.js")
+async def service_worker():
+    # Root se serve karo taaki poori site SW ke scope mein aaye
+    return FileResponse(os.path.join("static", "sw.js"), media_type="application/javascript", headers={"Cache-Control": "no-cache", "Service-Worker-Allowed": "/"})
 
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
+    # Scheduler har worker mein hai, par fire() sirf leader pe run banata hai; chunks sab workers uthate hain.
+    # Interval ki jagah cron: har worker ka slot same minute pe padta hai (run _id = job|slot)
     try:
-        scheduler.add_job(lambda: asyncio.run(generate_daily_diary()), 'cron', hour=23, minute=59)
-        scheduler.add_job(lambda: asyncio.run(check_proactive_messaging()), 'interval', hours=4)
+        scheduler.add_job(job_coordinator.fire, 'cron', hour=23, minute=59, args=["daily_diary"], id="daily_diary")
+        scheduler.add_job(job_coordinator.fire, 'cron', hour='*/4', minute=0, args=["proactive_messaging"], id="proactive_messaging")
+        scheduler.add_job(job_coordinator.fire, 'cron', hour=3, minute=30, args=["memory_consolidation"], id="memory_consolidation")
         scheduler.start()
-    except: pass
+    except Exception as e: print(f"Scheduler Error: {e}")
+    asyncio.create_task(job_coordinator.heartbeat_forever())
+    asyncio.create_task(job_coordinator.work_forever())
+
+@app.on_event("startup")
+async def setup_indexes():
+    await ensure_indexes()
+
+@app.on_event("startup")
+async def start_external_clients():
+    # Server pehle listen karne lage, Pinecone baad mein connect ho
+    asyncio.create_task(init_external_clients())
+    print(f"⏱️ App ready in {(time.perf_counter() - STARTUP_BEGAN) * 1000:.0f} ms")
+
+@app.get("/health")
+async def health(): return {"status": "ok", "vector_db": index is not None}
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+@app.get("/metrics")
+async def metrics_endpoint(request: Request):
+    # Token set ho toh scraper ko "Authorization: Bearer <token>" bhejna padega
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        return Response(status_code=401)
+    return Response(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+async def start_currency_refresh():
+    # Exchange rates memory mein rakho aur schedule pe refresh karte raho
+    asyncio.create_task(rate_table.refresh_forever())
+
+@app.on_event("startup")
+async def start_error_log_flush():
+    asyncio.create_task(error_log.flush_forever())
+
+@app.on_event("startup")
+async def start_usage_flush():
+    asyncio.create_task(usage_counter.flush_forever())
+
+@app.on_event("startup")
+async def start_diary_digest_flush():
+    asyncio.create_task(diary_digest.flush_forever())
+
+@app.on_event("shutdown")
+async def flush_error_log():
+    await error_log.flush()
+
+@app.on_event("shutdown")
+async def flush_usage_counters():
+    await usage_counter.flush()
+
+@app.on_event("shutdown")
+async def flush_diary_digest():
+    await diary_digest.flush()
+
+@app.on_event("shutdown")
+async def release_scheduler_leadership():
+    if scheduler.running: scheduler.shutdown(wait=False)
+    await job_coordinator.release()
 
 @app.middleware("http")
 async def fix_google_oauth_redirect(request: Request, call_next):
@@ -329,7 +532,8 @@ async def auth_callback(request: Request):
     try:
         token = await oauth.google.authorize_access_token(request)
         user = token.get('userinfo')
-        request.session['user'] = user
+        # Session mein sirf zaruri fields, poora userinfo nahi
+        request.session['user'] = {"email": user['email'], "name": user.get('name'), "picture": user.get('picture')}
         await users_collection.update_one({"email": user['email']}, {"$set": {"name": user.get('name'), "picture": user.get('picture'), "username": user['email'].split('@')[0]}}, upsert=True)
         return RedirectResponse("/")
     except: return RedirectResponse("/login")
@@ -361,16 +565,25 @@ async def verify_otp_endpoint(req: OTPVerifyRequest):
 @app.post("/api/complete_signup")
 async def complete_signup(req: SignupRequest, request: Request):
     if await users_collection.find_one({"username": req.username}): return JSONResponse({"status": "error"}, 400)
-    await users_collection.insert_one({"email": req.email, "username": req.username, "password_hash": get_password_hash(req.password), "name": req.full_name, "picture": "", "memories": [], "custom_instruction": ""})
+    await users_collection.insert_one({"email": req.email, "username": req.username, "password_hash": await hash_password(req.password), "name": req.full_name, "picture": "", "custom_instruction": ""})
     request.session['user'] = {"email": req.email, "name": req.full_name}
     return {"status": "success"}
 
 @app.post("/api/login_manual")
 async def login_manual(req: LoginRequest, request: Request):
-    user = await users_collection.find_one({"$or": [{"email": req.identifier}, {"username": req.identifier}]})
-    if user and verify_password(req.password, user.get('password_hash')):
+    # Baar baar galat password -> thodi der ke liye lock
+    wait = login_throttle.retry_after(req.identifier)
+    if wait: return JSONResponse({"status": "error", "message": "Too many attempts. Try again later."}, 429, headers={"Retry-After": str(wait)})
+
+    user = await users_collection.find_one({"$or": [{"email": req.identifier}, {"username": req.identifier}]}, {"email": 1, "name": 1, "password_hash": 1})
+    ok, new_hash = await verify_password(req.password, user.get('password_hash')) if user else (False, None)
+    if ok:
+        login_throttle.reset(req.identifier)
+        # BCRYPT_ROUNDS badla ho toh login pe hi naya hash save kar do
+        if new_hash: await users_collection.update_one({"_id": user["_id"]}, {"$set": {"password_hash": new_hash}})
         request.session['user'] = {"email": user['email'], "name": user['name']}
         return {"status": "success"}
+    login_throttle.record_failure(req.identifier)
     return JSONResponse({"status": "error"}, 400)
 
 # ==================================================================================
@@ -419,9 +632,12 @@ async def admin_page(request: Request):
     total_chats = await chats_collection.count_documents({})
     banned_count = await users_collection.count_documents({"is_banned": True})
     
-    top_tools = await tool_usage_collection.find({}).sort("count", -1).limit(6).to_list(length=None)
+    top_tools = await usage_counter.top_tools(days=30)
+    usage_hourly = await usage_counter.series("hour", 24)
+    usage_daily = await usage_counter.series("day", 14)
     max_tool_count = top_tools[0]['count'] if top_tools else 0
-    recent_errors = await error_logs_collection.find({}).sort("timestamp", -1).limit(10).to_list(length=None)
+    top_errors = await error_log.top(10)
+    recent_errors = await error_log.recent_samples(10)
     
     users_cursor = users_collection.find({}).sort("_id", -1).limit(50)
     users_list = []
@@ -442,7 +658,9 @@ async def admin_page(request: Request):
     return templates.TemplateResponse("admin.html", {
         "request": request, "total_users": total_users, "total_chats": total_chats,
         "banned_count": banned_count, "users": users_list, "admin_email": ADMIN_EMAIL,
-        "top_tools": top_tools, "max_tool_count": max_tool_count, "recent_errors": recent_errors     
+        "top_tools": top_tools, "max_tool_count": max_tool_count, "recent_errors": recent_errors,
+        "top_errors": top_errors, "usage_hourly": usage_hourly, "usage_daily": usage_daily,
+        "latency_summary": metrics.summary()[:25]
     })
 
 @app.get("/tools", response_class=HTMLResponse)
@@ -451,137 +669,17 @@ async def tools_dashboard_page(request: Request):
     if not user: return RedirectResponse("/login")
     return templates.TemplateResponse("tools_dashboard.html", {"request": request, "user": user})
 
-@app.get("/tools/flashcards", response_class=HTMLResponse)
-async def flashcards_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/flashcards.html", {"request": request, "user": user})
-
-@app.get("/tools/image_gen", response_class=HTMLResponse)
-async def image_gen_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/image_gen.html", {"request": request, "user": user})
-
-@app.get("/tools/prompt_writer", response_class=HTMLResponse)
-async def prompt_writer_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/prompt_writer.html", {"request": request, "user": user})
-
-@app.get("/tools/qr_generator", response_class=HTMLResponse)
-async def qr_generator_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/qr_generator.html", {"request": request, "user": user})
-
-@app.get("/tools/resume_analyzer", response_class=HTMLResponse)
-async def resume_analyzer_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/resume_analyzer.html", {"request": request, "user": user})
-
-@app.get("/tools/github_review", response_class=HTMLResponse)
-async def github_review_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/github_review.html", {"request": request, "user": user})
+# Har tool ka page registry se generate hota hai (tool_registry.TOOLS)
+def make_tool_page(template_name):
+    async def tool_page(request: Request):
+        user = request.session.get('user')
+        if not user: return RedirectResponse("/login")
+        return templates.TemplateResponse(template_name, {"request": request, "user": user})
+    return tool_page
 
-@app.get("/tools/currency_converter", response_class=HTMLResponse)
-async def currency_converter_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/currency_converter.html", {"request": request, "user": user})
-
-@app.get("/tools/youtube_summarizer", response_class=HTMLResponse)
-async def youtube_summarizer_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/youtube_summarizer.html", {"request": request, "user": user})
-
-@app.get("/tools/password_generator", response_class=HTMLResponse)
-async def password_generator_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/password_generator.html", {"request": request, "user": user})
-
-@app.get("/tools/grammar_fixer", response_class=HTMLResponse)
-async def grammar_fixer_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/grammar_fixer.html", {"request": request, "user": user})
-
-@app.get("/tools/interview_questions", response_class=HTMLResponse)
-async def interview_questions_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/interview_questions.html", {"request": request, "user": user})
-
-@app.get("/tools/mock_interviewer", response_class=HTMLResponse)
-async def mock_interviewer_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/mock_interviewer.html", {"request": request, "user": user})
-
-@app.get("/tools/math_solver", response_class=HTMLResponse)
-async def math_solver_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/math_solver.html", {"request": request, "user": user})
-
-@app.get("/tools/smart_todo", response_class=HTMLResponse)
-async def smart_todo_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/smart_todo.html", {"request": request, "user": user})
-
-@app.get("/tools/resume_builder", response_class=HTMLResponse)
-async def resume_builder_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/resume_builder.html", {"request": request, "user": user})
-
-@app.get("/tools/sing_with_me", response_class=HTMLResponse)
-async def sing_with_me_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/sing_with_me.html", {"request": request, "user": user})
-
-@app.get("/tools/cold_email", response_class=HTMLResponse)
-async def cold_email_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/cold_email.html", {"request": request, "user": user})
-
-@app.get("/tools/fitness_coach", response_class=HTMLResponse)
-async def fitness_coach_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/fitness_coach.html", {"request": request, "user": user})
-
-@app.get("/tools/feynman_explainer", response_class=HTMLResponse)
-async def feynman_explainer_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/feynman_explainer.html", {"request": request, "user": user})
-
-@app.get("/tools/code_debugger", response_class=HTMLResponse)
-async def code_debugger_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/code_debugger.html", {"request": request, "user": user})
-
-@app.get("/tools/movie_talker", response_class=HTMLResponse)
-async def movie_talker_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/movie_talker.html", {"request": request, "user": user})
-
-@app.get("/tools/anime_talker", response_class=HTMLResponse)
-async def anime_talker_page(request: Request):
-    user = request.session.get('user')
-    if not user: return RedirectResponse("/login")
-    return templates.TemplateResponse("tools/anime_talker.html", {"request": request, "user": user})
+for tool_spec in TOOLS.values():
+    if tool_spec.template:
+        app.add_api_route(f"/tools/{tool_spec.name}", make_tool_page(tool_spec.template), methods=["GET"], response_class=HTMLResponse, name=f"{tool_spec.name}_page")
 
 # ==================================================================================
 # [CATEGORY] 10. API ROUTES
@@ -614,13 +712,26 @@ async def save_instruction(req: InstructionRequest, request: Request):
     return {"status": "success"}
 
 @app.get("/api/history")
-async def get_history(request: Request):
+async def get_history(request: Request, cursor: str | None = None, limit: int = HISTORY_PAGE_SIZE):
     user = await get_current_user(request)
-    if not user: return {"history": []}
-    cursor = chats_collection.find({"user_email": user['email']}).sort("_id", -1).limit(50)
-    history = []
-    async for chat in cursor: history.append({"id": chat["session_id"], "title": chat.get("title", "New Chat")})
-    return {"history": history}
+    if not user: return {"history": [], "next_cursor": None}
+    limit = max(1, min(limit, 100))
+    if cursor:
+        try: return await fetch_history_page(user['email'], cursor, limit)
+        except Exception: return JSONResponse({"status": "error", "message": "Invalid cursor"}, 400)
+
+    # Pehla page har page-view pe load hota hai, isliye cache se do (stamp badla toh dobara banao)
+    email = user['email']
+    stamp = await history_stamp(email)
+    cached = history_cache.get(email)
+    if cached and cached["limit"] == limit and cached["stamp"] == stamp and time.time() - cached["at"] < HISTORY_CACHE_TTL:
+        history_cache.move_to_end(email)
+        return cached["page"]
+    page = await fetch_history_page(email, None, limit)
+    history_cache[email] = {"page": page, "limit": limit, "stamp": stamp, "at": time.time()}
+    history_cache.move_to_end(email)
+    while len(history_cache) > HISTORY_CACHE_SIZE: history_cache.popitem(last=False)
+    return page
 
 @app.get("/api/new_chat")
 async def create_chat(request: Request): return {"session_id": str(uuid.uuid4())[:8], "messages": []}
@@ -633,6 +744,12 @@ class AdvancedImageGenRequest(BaseModel):
     style: str = "realistic"  # 'realistic' ya 'painting'
     tier: str = "free"        # 'free' ya 'pro'
 
+async def track_image_usage(job):
+    # Usage track karne ke liye (admin panel ke charts isi se bante hain)
+    usage_counter.incr("image_gen", job['tier'])
+
+image_job_queue = ImageJobQueue(on_success=track_image_usage)
+
 @app.post("/api/image_gen")
 async def advanced_image_gen_api(req: AdvancedImageGenRequest, request: Request):
     try:
@@ -642,35 +759,84 @@ async def advanced_image_gen_api(req: AdvancedImageGenRequest, request: Request)
 
         if not req.prompt:
             return {"status": "error", "message": "⚠️ Prompt cannot be empty."}
-        
-        image_url = ""
-        
-        # Free ya Pro engine select karna
-        if req.tier == "pro":
-            image_url = await generate_image_pro(req.prompt, req.style)
-        else:
-            image_url = await generate_image_free(req.prompt, req.style)
 
-        # Agar koi error message aaya ho (start with ⚠️)
-        if image_url.startswith("⚠️"):
-            return {"status": "error", "message": image_url}
-        
-        # Usage track karne ke liye (Optional, admin panel ke liye achha rahega)
-        await tool_usage_collection.update_one(
-            {"tool_name": f"image_gen_{req.tier}"}, 
-            {"$inc": {"count": 1}}, 
-            upsert=True
-        )
+        # Engine/pool client ke "tier" field se nahi, account ke asli tier se (free user pro pool na le sake)
+        tier = await admission.tier_for(user, user_is_pro)
+        if req.tier == "pro" and tier != "pro":
+            return JSONResponse({"status": "error", "message": "⚠️ Pro image engine sirf Pro users ke liye hai."}, 403)
+        engine = "pro" if req.tier == "pro" else "free"
+
+        _, rejected = await admit_request(request, user, ACTION_COSTS[f"image_gen:{engine}"])
+        if rejected: return rejected
         
-        return {"status": "success", "image_url": image_url}
+        # Request ko hold nahi karte, job queue mein daal ke turant ID return karte hain
+        job = image_job_queue.submit(user['email'], req.prompt, req.style, engine)
+        return JSONResponse({"status": "queued", "job_id": job["id"], **image_job_queue.public_view(job)}, 202)
 
     except Exception as e:
         return {"status": "error", "message": f"⚠️ Server Error: {str(e)}"}
 
+@app.get("/api/image_gen/{job_id}")
+async def image_gen_status(job_id: str, request: Request):
+    user = await get_current_user(request)
+    if not user: return JSONResponse({"status": "error", "message": "⚠️ Login required."}, 400)
+    job = image_job_queue.get(job_id, user['email'])
+    if not job: return JSONResponse({"status": "error", "message": "⚠️ Job not found."}, 404)
+    return image_job_queue.public_view(job)
+
+@app.get("/api/image_gen/{job_id}/events")
+async def image_gen_events(job_id: str, request: Request):
+    user = await get_current_user(request)
+    if not user: return JSONResponse({"status": "error", "message": "⚠️ Login required."}, 400)
+    job = image_job_queue.get(job_id, user['email'])
+    if not job: return JSONResponse({"status": "error", "message": "⚠️ Job not found."}, 404)
+
+    async def event_stream():
+        while True:
+            view = image_job_queue.public_view(job)
+            yield f"data: {json.dumps(view)}\n\n"
+            if view["status"] in ("done", "error") or await request.is_disconnected(): break
+            # Change ka wait karo; timeout pe bhi current state dobara bhej dete hain (keep-alive)
+            await image_job_queue.wait_for_change(job_id)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+TRANSCRIPT_PAGE_SIZE = 50
+
+def compressed_json(request: Request, payload, status_code=200, headers=None):
+    # Transcript mein base64 images/QR hote hain, isliye gzip karke bhejte hain
+    body = json.dumps(jsonable_encoder(payload)).encode()
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    if len(body) > 1024 and "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, status_code=status_code, media_type="application/json", headers=headers)
+
 @app.get("/api/chat/{session_id}")
-async def get_chat(session_id: str):
-    chat = await chats_collection.find_one({"session_id": session_id})
-    return {"messages": chat.get("messages", [])} if chat else {"messages": []}
+async def get_chat(session_id: str, request: Request, before: int | None = None, limit: int = TRANSCRIPT_PAGE_SIZE):
+    user = await get_current_user(request)
+    if not user: return JSONResponse({"messages": []}, 401)
+    limit = max(1, min(limit, 200))
+
+    # Pehle sirf meta (owner, version, count) laao, messages nahi
+    meta = await chats_collection.find_one({"session_id": session_id}, {"user_email": 1, "version": 1, "count": {"$size": {"$ifNull": ["$messages", []]}}})
+    if not meta or meta.get("user_email") != user['email']: return JSONResponse({"messages": []}, 404)
+
+    total = meta.get("count", 0)
+    end = total if before is None else max(0, min(before, total))
+    start = max(0, end - limit)
+    version = meta.get("version", total)
+    etag = f'W/"{session_id}-{version}-{total}-{start}-{end}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag: return Response(status_code=304, headers=headers)
+
+    messages = []
+    if end > start:
+        chat = await chats_collection.find_one({"session_id": session_id}, {"_id": 0, "messages": {"$slice": [start, end - start]}})
+        messages = chat.get("messages", []) if chat else []
+    payload = {"messages": messages, "before": start if start > 0 else None, "total": total}
+    return compressed_json(request, payload, headers=headers)
 
 @app.post("/api/rename_chat")
 async def rename_chat(req: RenameRequest): return {"status": "ok"}
@@ -678,44 +844,75 @@ async def rename_chat(req: RenameRequest): return {"status": "ok"}
 async def delete_all_chats(request: Request): return {"status": "ok"}
 
 @app.get("/api/memories")
-async def get_memories(request: Request):
+async def get_memories(request: Request, before: str | None = None, limit: int = 50):
     user = await get_current_user(request)
-    if not user: return {"memories": []}
-    data = await users_collection.find_one({"email": user['email']})
-    mems = data.get("memories", []) if data else []
-    return {"memories": mems[::-1]}
+    if not user: return {"memories": [], "items": [], "next": None, "total": 0}
+    # Keyset page (newest first); "next" ko agli call mein ?before= bhejo
+    items, next_cursor = await memory_store.page(user['email'], before, limit)
+    total = await memory_store.count(user['email']) if not before else None
+    return jsonable_encoder({"memories": [m["text"] for m in items], "items": items, "next": next_cursor, "total": total})
+
+async def save_memory_vectors(email, texts):
+    if not index or not texts: return
+    try:
+        vectors = []
+        for i in range(0, len(texts), EMBED_BATCH):
+            batch = texts[i:i + EMBED_BATCH]
+            embeddings = await asyncio.to_thread(get_embeddings, batch)
+            vectors.extend((vector_id(email, t), vec, {"text": t, "email": email}) for t, vec in zip(batch, embeddings) if vec)
+        if vectors: await asyncio.to_thread(upsert_vectors, index, email, vectors)
+    except Exception as e: print(f"Vector Save Error: {e}")
+
+async def delete_memory_vectors(email, texts):
+    if not index or not texts: return
+    try: await asyncio.to_thread(delete_vectors, index, email, [vector_id(email, t) for t in texts])
+    except Exception as e: print(f"Vector Delete Error: {e}")
+
+async def rekey_migrated_vectors(email, raw_texts, stored_texts):
+    # Purane vectors raw text ke md5 se keyed the; jahan normalize ne text badla wahan woh id ab kabhi delete nahi hoti
+    stale = [t for t in raw_texts if t != normalize_memory(t)]
+    if not stale: return
+    await delete_memory_vectors(email, stale)
+    raw = set(raw_texts)
+    await save_memory_vectors(email, [t for t in stored_texts if t not in raw])
 
 @app.post("/api/add_memory")
 async def add_memory(req: MemoryRequest, request: Request):
     user = await get_current_user(request)
     if not user: return JSONResponse({"status": "error"}, 400)
-    await users_collection.update_one({"email": user['email']}, {"$push": {"memories": req.memory_text}})
-    if index:
-        try:
-            vec = get_embedding(req.memory_text)
-            if vec:
-                mem_id = f"{user['email']}_{hashlib.md5(req.memory_text.encode()).hexdigest()}"
-                index.upsert(vectors=[(mem_id, vec, {"text": req.memory_text, "email": user['email']})])
-        except Exception as e: print(f"Vector Save Error: {e}")
+    stored = await memory_store.add(user['email'], req.memory_text)
+    if stored: await save_memory_vectors(user['email'], [stored])
     return {"status": "success"}
 
+@app.post("/api/add_memories")
+async def add_memories(req: BulkMemoryRequest, request: Request):
+    user = await get_current_user(request)
+    if not user: return JSONResponse({"status": "error"}, 400)
+    # Sirf jo sach mein naye bane, unhi ka embed (duplicates pe Gemini call nahi)
+    added = await memory_store.add_many(user['email'], req.memories[:200])
+    await save_memory_vectors(user['email'], added)
+    return {"status": "success", "added": len(added)}
+
 @app.post("/api/delete_memory")
 async def delete_memory(req: MemoryRequest, request: Request):
     user = await get_current_user(request)
     if not user: return JSONResponse({"status": "error"}, 400)
     
-    # 1. MongoDB se delete karo
-    await users_collection.update_one({"email": user['email']}, {"$pull": {"memories": req.memory_text}})
+    # 1. MongoDB se delete karo (id ho toh id se, warna text hash se)
+    deleted = await memory_store.delete_many(user['email'], ids=[req.memory_id] if req.memory_id else (), texts=() if req.memory_id else [req.memory_text])
     
     # 2. Pinecone (Vector DB) se bhi hamesha ke liye delete karo
-    if index:
-        try:
-            mem_id = f"{user['email']}_{hashlib.md5(req.memory_text.encode()).hexdigest()}"
-            index.delete(ids=[mem_id])
-        except Exception as e: print(f"Vector Delete Error: {e}")
-        
+    await delete_memory_vectors(user['email'], deleted)
     return {"status": "ok"}
 
+@app.post("/api/delete_memories")
+async def delete_memories(req: BulkMemoryRequest, request: Request):
+    user = await get_current_user(request)
+    if not user: return JSONResponse({"status": "error"}, 400)
+    deleted = await memory_store.delete_many(user['email'], ids=req.ids[:500], texts=req.memories[:500])
+    await delete_memory_vectors(user['email'], deleted)
+    return {"status": "ok", "deleted": len(deleted)}
+
 @app.post("/api/delete_gallery_item")
 async def delete_gallery_item(req: GalleryDeleteRequest, request: Request):
     return {"status": "ok"}
@@ -742,27 +939,17 @@ async def manual_trigger_diary(request: Request):
     user = await get_current_user(request)
     if not user: return JSONResponse({"status": "error", "message": "Login required"}, 400)
     
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    chat_doc = await chats_collection.find_one({
-        "user_email": user['email'],
-        "messages.timestamp": {"$gte": today_start}
-    })
+    # Is worker ke buffered turns pehle likh do, taaki abhi wali baat bhi digest mein ho
+    await diary_digest.flush()
+    messages_text = (await diary_digest.context_for([user['email']])).get(user['email'])
     
-    if not chat_doc or not chat_doc.get("messages"): 
+    if not messages_text: 
         return JSONResponse({"status": "error", "message": "Aaj humne koi baat hi nahi ki! Pehle thodi baatein toh karo. 🥺"})
-        
-    messages_text = ""
-    for m in chat_doc.get("messages", []):
-        msg_time = m.get("timestamp")
-        if msg_time and msg_time >= today_start:
-            messages_text += f"{m['role']}: {m['content']}\n"
             
-    client = get_groq()
-    if not client: return JSONResponse({"status": "error", "message": "AI is sleeping."})
+    prompt = f"You are Shanvika. Write a short, emotional, personal diary entry based on today's chat with Shantanu. Act like a real person writing in her private diary. Chat:\n{messages_text}"
     
-    prompt = f"You are Shanvika. Write a short, emotional, personal diary entry based on today's chat with Shantanu. Act like a real person writing in her private diary. Chat:\n{messages_text[:4000]}"
-    
-    diary_entry = client.chat.completions.create(messages=[{"role": "user", "content": prompt}], model="llama-3.3-70b-versatile").choices[0].message.content
+    diary_entry = await asyncio.to_thread(groq_chat, [{"role": "user", "content": prompt}])
+    if not diary_entry: return JSONResponse({"status": "error", "message": "AI is sleeping."})
     
     # Aaj ki date
     today_date = datetime.utcnow().strftime('%Y-%m-%d')
@@ -778,16 +965,30 @@ async def manual_trigger_diary(request: Request):
 
 @app.post("/api/chat")
 async def chat_endpoint(req: ChatRequest, request: Request, background_tasks: BackgroundTasks):
+    user = await get_current_user(request)
+    if not user: return {"reply": "⚠️ Login required."}
+    tool_spec = get_tool(req.mode)
+    cost = tool_spec.cost if tool_spec else ACTION_COSTS.get(req.mode, ACTION_COSTS["custom"])
+    # Overload pe turant 429 (queue mein latakne se behtar); pro ka in-flight headroom sabse bada
+    tier, rejected = await admit_request(request, user, cost, shed=True)
+    if rejected: return rejected
+    try: return await chat_reply(req, request, background_tasks)
+    finally: admission.release(tier)
+
+async def chat_reply(req: ChatRequest, request: Request, background_tasks: BackgroundTasks):
     try:
         user = await get_current_user(request)
         if not user: return {"reply": "⚠️ Login required."}
         
         sid, mode, msg = req.session_id, req.mode, req.message
+        # Label mein sirf jaane-pehchaane modes, taaki custom_<id> se series na phatein
+        stage_mode = mode if mode in TOOLS or mode in ("chat", "research") else "custom"
         
         if mode == "chat":
             background_tasks.add_task(extract_and_save_memory, user['email'], msg)
 
-        db_user = await users_collection.find_one({"email": user['email']})
+        with metrics.span("chat_stage_seconds", stage="user_lookup", mode=stage_mode):
+            db_user = await users_collection.find_one({"email": user['email']}, {"memories": 0})
         
         if db_user and db_user.get("is_banned"):
             return {"reply": "🚫 You have been banned by the Admin. Access Denied."}
@@ -795,9 +996,11 @@ async def chat_endpoint(req: ChatRequest, request: Request, background_tasks: Ba
         user_custom_prompt = db_user.get("custom_instruction", "")
         retrieved_memory = ""
         
-        if index: retrieved_memory = search_vector_db(msg, user['email'])
+        if index:
+            with metrics.span("chat_stage_seconds", stage="memory_search", mode=stage_mode):
+                retrieved_memory = await asyncio.to_thread(search_vector_db, msg, user['email'])
         if not retrieved_memory:
-            recent_mems = db_user.get("memories", [])[-5:]
+            recent_mems = await memory_store.recent_texts(user['email'], 5)
             if recent_mems: retrieved_memory = "\n".join(recent_mems)
 
         FINAL_SYSTEM_PROMPT = user_custom_prompt if user_custom_prompt and user_custom_prompt.strip() else DEFAULT_SYSTEM_INSTRUCTIONS
@@ -813,98 +1016,100 @@ async def chat_endpoint(req: ChatRequest, request: Request, background_tasks: Ba
         FINAL_SYSTEM_PROMPT += f"\n\n[IMPORTANT CONTEXT]: You are Shanvika. {name_instruction} DO NOT call the user 'Shanvika' ever. DO NOT save memories about your own name."
         # 🚀 MAGIC CODE KHATAM
         
-        if retrieved_memory:
-            FINAL_SYSTEM_PROMPT += f"\n\n[USER LONG-TERM MEMORY]:\n{retrieved_memory}\n(Use this information to personalize the conversation)"
-
-        chat_doc = await chats_collection.find_one({"session_id": sid})
+        with metrics.span("chat_stage_seconds", stage="history_fetch", mode=stage_mode):
+            # Poora messages array nahi: sirf tail + count + summary fields
+            chat_doc = await chats_collection.find_one({"session_id": sid}, {
+                "summary": 1, "summary_upto": 1, "messages": {"$slice": -HISTORY_TAIL},
+                "count": {"$size": {"$ifNull": ["$messages", []]}},
+            })
         if not chat_doc:
             title_prefix = "Chat" if mode == "chat" else f"Tool: {mode.replace('_', ' ').title()}"
-            await chats_collection.insert_one({"session_id": sid, "user_email": user['email'], "title": f"{title_prefix} - {msg[:15]}...", "messages": []})
-            chat_doc = {"messages": []}
+            await chats_collection.insert_one({"session_id": sid, "user_email": user['email'], "title": f"{title_prefix} - {msg[:15]}...", "messages": [], "last_activity": datetime.utcnow()})
+            chat_doc = {"messages": [], "count": 0}
+        total_messages = chat_doc.get("count", len(chat_doc.get("messages", [])))
 
-        await chats_collection.update_one({"session_id": sid}, {"$push": {"messages": {"role": "user", "content": msg, "timestamp": datetime.utcnow()}}})
+        with metrics.span("chat_stage_seconds", stage="persist_user", mode=stage_mode):
+            await chats_collection.update_one({"session_id": sid}, {"$push": {"messages": {"role": "user", "content": msg, "timestamp": datetime.utcnow()}}, "$set": {"last_activity": datetime.utcnow()}, "$inc": {"version": 1}})
+        invalidate_history_cache(user['email'])
 
         reply = ""
+        tool_spec = get_tool(mode)
         context_history = ""
         
-        if mode in ["sing_with_me", "movie_talker", "anime_talker"]:
-            for m in chat_doc.get("messages", [])[-6:]: 
-                context_history += f"{m['role']}: {m['content']} | "
-
-        await tool_usage_collection.update_one({"tool_name": mode}, {"$inc": {"count": 1}}, upsert=True)
-
-        if mode == "image_gen": reply = await generate_image_hf(msg) 
-        elif mode == "prompt_writer": reply = await generate_prompt_only(msg)
-        elif mode == "qr_generator": reply = await generate_qr_code(msg)
-        elif mode == "resume_analyzer": reply = await analyze_resume(req.file_data, msg)
-        elif mode == "github_review": reply = await review_github(msg)
-        elif mode == "currency_converter": reply = await currency_tool(msg)
-        elif mode == "youtube_summarizer": reply = await summarize_youtube(msg)
-        elif mode == "password_generator": reply = await generate_password_tool(msg)
-        elif mode == "grammar_fixer": reply = await fix_grammar_tool(msg)
-        elif mode == "interview_questions": reply = await generate_interview_questions(msg)
-        elif mode == "mock_interviewer": reply = await handle_mock_interview(msg)
-        elif mode == "math_solver": reply = await solve_math_problem(req.file_data, msg)
-        elif mode == "smart_todo": reply = await smart_todo_maker(msg)
-        elif mode == "resume_builder": reply = await build_pro_resume(msg)
-        elif mode == "sing_with_me": reply = await sing_with_me_tool(msg, context_history) 
-        elif mode == "cold_email": reply = await cold_email_tool(msg)
-        elif mode == "fitness_coach": reply = await fitness_coach_tool(msg)
-        elif mode == "feynman_explainer": reply = await feynman_explainer_tool(msg)
-        elif mode == "code_debugger": reply = await code_debugger_tool(msg)
-        elif mode == "movie_talker": reply = await movie_talker_tool(msg, context_history)
-        elif mode == "anime_talker": reply = await anime_talker_tool(msg, context_history)
-        elif mode == "research":
-            data = await perform_research_task(msg)
-            client = get_groq()
-            reply = client.chat.completions.create(messages=[{"role": "system", "content": FINAL_SYSTEM_PROMPT}, {"role": "user", "content": f"Context: {data}\nQ: {msg}"}], model="llama-3.3-70b-versatile").choices[0].message.content if client else data
-        
-        # 🚀 YAHAN HAI WOH CUSTOM TOOL WALA ELIF LOGIC!
-        elif mode.startswith("custom_"):
-            custom_tool = next((t for t in db_user.get("custom_tools", []) if t["id"] == mode), None)
-            if custom_tool:
-                custom_instruction = custom_tool["instruction"]
-                tool_prompt = f"{FINAL_SYSTEM_PROMPT}\n\n[STRICT TOOL INSTRUCTION]: Act exactly as the following tool:\n{custom_instruction}"
-                client = get_groq()
-                if client:
-                    clean_history = [{"role": m["role"], "content": m["content"]} for m in (chat_doc.get("messages", []) + [{"role": "user", "content": msg}])[-15:]]
-                    reply = client.chat.completions.create(model="llama-3.3-70b-versatile", messages=[{"role": "system", "content": tool_prompt}, *clean_history]).choices[0].message.content
-                else: reply = "⚠️ API Error."
-            else:
-                reply = "⚠️ Custom tool deleted or not found."
-        # 🚀 KHATAM CUSTOM TOOL LOGIC
-        
-        else: 
-            client = get_groq()
-            if client: 
-                clean_history = [{"role": m["role"], "content": m["content"]} for m in (chat_doc.get("messages", []) + [{"role": "user", "content": msg}])[-15:]]
-                reply = client.chat.completions.create(model="llama-3.3-70b-versatile", messages=[{"role": "system", "content": FINAL_SYSTEM_PROMPT}, *clean_history]).choices[0].message.content
-            else: reply = "⚠️ API Error."
-
-        await chats_collection.update_one({"session_id": sid}, {"$push": {"messages": {"role": "assistant", "content": reply, "timestamp": datetime.utcnow()}}})
+        if tool_spec and tool_spec.needs_context:
+            context_history = render_context_history(chat_doc.get("messages", [])[-6:])
+
+        # Prompt token budget ke andar: system -> memories -> recent turns -> purani summary
+        summary = chat_doc.get("summary", "")
+        # Summary ho toh usme fold ho chuke turns dobara nahi bhejte (wahi budget bachane ke liye summary hai)
+        recent = turns_after_summary(chat_doc.get("messages", []), total_messages, chat_doc.get("summary_upto", 0) if summary else 0)
+        conversation = [{"role": m["role"], "content": m["content"]} for m in recent] + [{"role": "user", "content": msg}]
+
+        # Memory counter; Mongo mein har kuch seconds mein ek bulk_write (hot "chat" doc pe $inc nahi)
+        usage_counter.incr(stage_mode, "pro" if db_user.get("is_pro") or user['email'] == ADMIN_EMAIL else "free")
+
+        with metrics.span("chat_stage_seconds", stage="tool" if tool_spec else "llm", mode=stage_mode):
+            if tool_spec: reply = await run_tool(tool_spec, message=msg, file_data=req.file_data, context_history=context_history, session_id=sid)
+            elif mode == "research":
+                data = await perform_research_task(msg)
+                prompt_messages, _ = build_messages(FINAL_SYSTEM_PROMPT, [{"role": "user", "content": f"Context: {data}\nQ: {msg}"}], memory=retrieved_memory)
+                reply = await asyncio.to_thread(groq_chat, prompt_messages) or data
+            
+            # 🚀 YAHAN HAI WOH CUSTOM TOOL WALA ELIF LOGIC!
+            elif mode.startswith("custom_"):
+                custom_tool = next((t for t in db_user.get("custom_tools", []) if t["id"] == mode), None)
+                if custom_tool:
+                    custom_instruction = custom_tool["instruction"]
+                    tool_prompt = f"{FINAL_SYSTEM_PROMPT}\n\n[STRICT TOOL INSTRUCTION]: Act exactly as the following tool:\n{custom_instruction}"
+                    prompt_messages, _ = build_messages(tool_prompt, conversation, memory=retrieved_memory, summary=summary)
+                    reply = await asyncio.to_thread(groq_chat, prompt_messages) or "⚠️ API Error."
+                else:
+                    reply = "⚠️ Custom tool deleted or not found."
+            # 🚀 KHATAM CUSTOM TOOL LOGIC
+            
+            else: 
+                prompt_messages, _ = build_messages(FINAL_SYSTEM_PROMPT, conversation, memory=retrieved_memory, summary=summary)
+                reply = await asyncio.to_thread(groq_chat, prompt_messages) or "⚠️ API Error."
+
+        with metrics.span("chat_stage_seconds", stage="persist_reply", mode=stage_mode):
+            reply_set = {"last_activity": datetime.utcnow()}
+            # Tool session ka title bhi isi write mein: alag update last_activity nahi badalta, sidebar stamp miss kar deta
+            if total_messages < 2 and mode != "chat": reply_set["title"] = f"Tool: {mode.replace('_', ' ').title()}"
+            await chats_collection.update_one({"session_id": sid}, {"$push": {"messages": {"role": "assistant", "content": reply, "timestamp": datetime.utcnow()}}, "$set": reply_set, "$inc": {"version": 1}})
         
-        if len(chat_doc['messages']) < 2 and mode != "chat":
-             await chats_collection.update_one({"session_id": sid}, {"$set": {"title": f"Tool: {mode.replace('_', ' ').title()}"}})
+        if not tool_spec:
+            diary_digest.add(user['email'], sid, "user", msg)
+            diary_digest.add(user['email'], sid, "assistant", reply)
+
+        invalidate_history_cache(user['email'])
+
+        # User message + reply abhi push hue, isliye +2
+        if session_summarizer.needs_update(chat_doc, total_messages + 2):
+            background_tasks.add_task(session_summarizer.update, sid)
 
         return {"reply": reply}
         
     except Exception as e: 
-        error_msg = str(e)
         import traceback
-        full_trace = traceback.format_exc()
-        await error_logs_collection.insert_one({
-            "error": error_msg, 
-            "trace": full_trace, 
-            "endpoint": f"/api/chat ({req.mode})", 
-            "timestamp": datetime.utcnow()
-        })
+        # Sirf memory mein count; Mongo mein batch flush hota hai (outage mein write storm nahi)
+        error_log.record(str(e), traceback.format_exc(), f"/api/chat ({req.mode})", mode=req.mode)
         return {"reply": f"⚠️ Server Error: We ran into a small issue."}
 
+# TTS ko sirf bolne layak text: HTML tags, markdown symbols, emoji hatao (Devanagari rehne do)
+TTS_TAG_RE = re.compile(r'<[^>]*>')
+TTS_STRIP_RE = re.compile(r'[^\w\s\u0900-\u097F,.?!]')
+
+def clean_tts_text(text):
+    return TTS_STRIP_RE.sub('', TTS_TAG_RE.sub('', text))
+
 @app.post("/api/speak")
 async def text_to_speech_endpoint(request: Request):
     try:
+        _, rejected = await admit_request(request, await get_current_user(request), ACTION_COSTS["speak"])
+        if rejected: return rejected
         data = await request.json()
-        clean_text = re.sub(r'[^\w\s\u0900-\u097F,.?!]', '', re.sub(r'<[^>]*>', '', data.get("text", ""))) 
+        clean_text = clean_tts_text(data.get("text", ""))
+        import edge_tts
         communicate = edge_tts.Communicate(clean_text, "en-IN-NeerjaNeural")
         async def audio_stream():
             async for chunk in communicate.stream():
@@ -916,10 +1121,38 @@ async def text_to_speech_endpoint(request: Request):
 async def api_generate_flashcards(req: ToolRequest, request: Request):
     user = await get_current_user(request)
     if not user: return JSONResponse({"status": "error", "message": "Login required"}, 400)
-    raw_json_str = await generate_flashcards_tool(req.topic)
+    _, rejected = await admit_request(request, user, TOOLS["flashcards"].cost)
+    if rejected: return rejected
+    raw_json_str = await run_tool(TOOLS["flashcards"], message=req.topic)
     try: return {"status": "success", "data": json.loads(raw_json_str)}
     except: return {"status": "error", "message": "AI couldn't format the flashcards properly.", "raw": raw_json_str}
 
+async def save_tool_exchange(email, sid, mode, msg, reply):
+    # /api/chat jaisa hi transcript: tool page ki history sidebar isi se bhar-ti hai
+    now = datetime.utcnow()
+    await chats_collection.update_one(
+        {"session_id": sid, "user_email": email},
+        {"$push": {"messages": {"$each": [{"role": "user", "content": msg, "timestamp": now}, {"role": "assistant", "content": reply, "timestamp": now}]}},
+         "$set": {"last_activity": now}, "$inc": {"version": 2},
+         "$setOnInsert": {"title": f"Tool: {mode.replace('_', ' ').title()}"}},
+        upsert=True,
+    )
+    invalidate_history_cache(email)
+
+@app.post("/api/tools/youtube_summary/stream")
+async def api_stream_youtube_summary(req: ToolStreamRequest, request: Request):
+    user = await get_current_user(request)
+    if not user: return JSONResponse({"status": "error", "message": "Login required"}, 400)
+    spec = TOOLS["youtube_summarizer"]
+    _, rejected = await admit_request(request, user, spec.cost)
+    if rejected: return rejected
+    async def event_stream():
+        # Har chunk ka summary aate hi bhej do, last mein final bullet points (run_tool wala bulkhead + timeout)
+        async for stage, text in stream_tool(spec, message=req.message):
+            if stage != "partial": await save_tool_exchange(user['email'], req.session_id, spec.name, req.message, text)
+            yield f"data: {json.dumps({'stage': stage, 'text': text})}\n\n"
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 # ==================================================================================
 # [CATEGORY] ARCADE DATABASE APIs (NEW)
 # ==================================================================================
@@ -998,6 +1231,7 @@ async def ban_user(request: Request, email: str = Form(...)):
     user = request.session.get('user')
     if not user or user.get('email') != ADMIN_EMAIL: return RedirectResponse("/")
     await users_collection.update_one({"email": email}, {"$set": {"is_banned": True}})
+    await session_store.revoke_user(email)
     return RedirectResponse("/admin", status_code=303)
 
 @app.post("/admin/unban_user")
@@ -1007,6 +1241,50 @@ async def unban_user(request: Request, email: str = Form(...)):
     await users_collection.update_one({"email": email}, {"$set": {"is_banned": False}})
     return RedirectResponse("/admin", status_code=303)
 
+@app.get("/admin/router")
+async def router_status(request: Request):
+    user = request.session.get('user')
+    if not user or user.get('email') != ADMIN_EMAIL: return JSONResponse({"error": "forbidden"}, 403)
+    return {"models": router.snapshot(), "hedges": router.hedges}
+
+@app.get("/admin/jobs")
+async def jobs_status(request: Request):
+    user = request.session.get('user')
+    if not user or user.get('email') != ADMIN_EMAIL: return JSONResponse({"error": "forbidden"}, 403)
+    return jsonable_encoder({"worker": job_coordinator.worker_id, "leader": await job_coordinator.leader(), "runs": await job_coordinator.recent_runs()})
+
+@app.get("/admin/memory_consolidations")
+async def memory_consolidations(request: Request, email: str | None = None):
+    user = request.session.get('user')
+    if not user or user.get('email') != ADMIN_EMAIL: return JSONResponse({"error": "forbidden"}, 403)
+    return jsonable_encoder({"merges": await memory_consolidator.recent(email)}, custom_encoder={ObjectId: str})
+
+@app.post("/admin/memory_consolidations/{audit_id}/restore")
+async def restore_memory_consolidation(audit_id: str, request: Request):
+    user = request.session.get('user')
+    if not user or user.get('email') != ADMIN_EMAIL: return JSONResponse({"error": "forbidden"}, 403)
+    if not ObjectId.is_valid(audit_id): return JSONResponse({"error": "bad id"}, 400)
+    # Galat merge (naya fact hat gaya) undo: hataye gaye memories + vectors wapas
+    return {"status": "ok", "restored": await memory_consolidator.restore(ObjectId(audit_id))}
+
+@app.get("/admin/vectors/check")
+async def vectors_check(request: Request, email: str | None = None):
+    user = request.session.get('user')
+    if not user or user.get('email') != ADMIN_EMAIL: return JSONResponse({"error": "forbidden"}, 403)
+    if not index: return JSONResponse({"error": "pinecone not connected"}, 503)
+    # Poora rebuild / --fix CLI se: python vector_index.py reindex | check --fix
+    return await check_consistency(memories_collection, index, email)
+
+@app.post("/admin/jobs/{name}/run")
+async def run_job_now(name: str, request: Request):
+    user = request.session.get('user')
+    if not user or user.get('email') != ADMIN_EMAIL: return JSONResponse({"error": "forbidden"}, 403)
+    if name not in job_coordinator.jobs: return JSONResponse({"error": "unknown job"}, 404)
+    # Run sirf leader bana sakta hai; yeh worker leader nahi toh dobara try karo (load balancer doosre pe bhejega)
+    run_id = await job_coordinator.fire(name)
+    if not run_id: return JSONResponse({"status": "not_leader_or_already_running", "worker": job_coordinator.worker_id}, 409)
+    return {"status": "started", "run_id": run_id}
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 10000))
@@ -0,0 +1,202 @@
+# ==================================================================================
+#  FILE: memory_consolidation.py
+#  DESCRIPTION: Periodic Memory Consolidation (NumPy Cosine Clustering + Batched Vector Deletes + Audit)
+# ==================================================================================
+#  - Auto-extraction "You like anime" / "You love anime" / "You are an anime fan" jaise
+#    near-duplicates alag alag save karta hai: har ek alag Pinecone vector, prompt mein alag line.
+#  - Job per user: memories ke embeddings (Pinecone fetch: user namespace, phir legacy shared
+#    namespace; jo kahin nahi mile unka batch embed + namespace mein upsert), ek matrix multiply
+#    se poori cosine similarity matrix, threshold se upar wale clusters.
+#  - Cluster ka canonical = sabse recent memory (updated_at/created_at): "Delhi mein rehta hu" ke
+#    baad "Mumbai shift ho gaya" aaya toh naya fact bachta hai. Baaki Mongo + Pinecone se batch
+#    mein delete; har merge ka audit doc memory_consolidations mein, hataye gaye poore docs ke
+#    saath, taaki restore() se wapas laaye ja sakein.
+#  - Sirf un users pe chalta hai jinki pichhli consolidation ke baad nayi memory aayi.
+# ==================================================================================
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+from memory_store import text_hash, vector_id
+from vector_index import EMBED_BATCH, PINECONE_LEGACY_FALLBACK, delete_vectors, namespace_for, upsert_vectors
+
+CONSOLIDATION_THRESHOLD = float(os.getenv("MEMORY_CONSOLIDATION_THRESHOLD", 0.9))
+CONSOLIDATION_MAX_MEMORIES = int(os.getenv("MEMORY_CONSOLIDATION_MAX", 1000))
+VECTOR_BATCH = 100   # Pinecone fetch ek call mein itne ids
+AUDIT_RETENTION_DAYS = 90
+
+def cluster_by_similarity(vectors, threshold=CONSOLIDATION_THRESHOLD, rank=None):
+    """vectors: (n, d) array. Returns [(canonical_idx, [member_idx, ...], [similarity, ...]), ...] sirf 2+ wale clusters.
+
+    Greedy seeds: jis memory ke sabse zyada padosi hain woh pehle seed banti hai. Seed ke padosi
+    (sabse milte-julte pehle) cluster mein tabhi aate hain jab cluster ke har member se threshold
+    ke upar hon: A~B, B~C par A!~C waale alag facts ek nahi bante, seed B ho tab bhi.
+    rank: har vector ka number (bada = naya); cluster mein sabse bada canonical. Na do toh medoid.
+    """
+    import numpy as np
+    x = np.asarray(vectors, dtype=np.float32)
+    if x.ndim != 2 or len(x) < 2: return []
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    x = x / np.where(norms == 0, 1, norms)
+    sim = x @ x.T
+    adjacent = sim >= threshold
+    np.fill_diagonal(adjacent, False)
+
+    clusters = []
+    free = np.ones(len(x), dtype=bool)
+    for seed in np.argsort(-adjacent.sum(axis=1), kind="stable"):
+        if not free[seed]: continue
+        candidates = np.flatnonzero(adjacent[seed] & free)
+        members = []
+        for i in candidates[np.argsort(-sim[seed, candidates], kind="stable")]:
+            if adjacent[i, members].all(): members.append(i)
+        if not members: continue
+        group = np.array([seed, *members])
+        free[group] = False
+        if rank is None:
+            # Medoid: group ke andar average similarity sabse zyada
+            canonical = group[np.argmax(sim[np.ix_(group, group)].mean(axis=1))]
+        else:
+            canonical = max(group, key=lambda i: rank[i])
+        others = group[group != canonical]
+        clusters.append((int(canonical), others.tolist(), sim[canonical, others].round(4).tolist()))
+    return clusters
+
+def _recency(doc):
+    # Duplicate dobara aaye toh updated_at badhta hai: woh bhi "naya kaha gaya" maana jaaye
+    return (doc.get("updated_at") or doc.get("created_at") or datetime.min, doc["_id"])
+
+def _fetched_values(response):
+    # Pinecone SDK versions: FetchResponse object ya plain dict
+    vectors = response.get("vectors", {}) if isinstance(response, dict) else getattr(response, "vectors", None) or {}
+    out = {}
+    for vid, vec in vectors.items():
+        values = vec.get("values") if isinstance(vec, dict) else getattr(vec, "values", None)
+        if values: out[vid] = values
+    return out
+
+class MemoryConsolidator:
+    def __init__(self, memories, audits, users, get_index, embed):
+        self.memories = memories
+        self.audits = audits
+        self.users = users
+        self.get_index = get_index   # main.index startup ke baad set hota hai, isliye getter
+        self.embed = embed           # sync fn(texts) -> [vector, ...] (ek batch call)
+
+    async def ensure_indexes(self):
+        await self.audits.create_index([("email", 1), ("run_at", -1)])
+        await self.audits.create_index("expires_at", expireAfterSeconds=0)
+
+    async def _fetch(self, index, ids, namespace=None):
+        found = {}
+        for i in range(0, len(ids), VECTOR_BATCH):
+            kwargs = {"namespace": namespace} if namespace else {}
+            try: found.update(_fetched_values(await asyncio.to_thread(index.fetch, ids=ids[i:i + VECTOR_BATCH], **kwargs)))
+            except Exception as e: print(f"Consolidation Fetch Error: {e}")
+        return found
+
+    async def _embeddings(self, index, email, docs):
+        ids = [vector_id(email, d["text"]) for d in docs]
+        found = await self._fetch(index, ids, namespace_for(email))
+        missing = [vid for vid in ids if vid not in found]
+        # Reindex abhi poora nahi hua: purane shared namespace mein wahi id (query_memories jaisa fallback)
+        if missing and PINECONE_LEGACY_FALLBACK: found.update(await self._fetch(index, missing))
+
+        # Jo kahin nahi mile (embed fail hua tha): batch mein bana lo aur namespace mein likh do, agli raat dobara nahi
+        todo = [(vid, d["text"]) for d, vid in zip(docs, ids) if vid not in found]
+        fresh = []
+        for i in range(0, len(todo), EMBED_BATCH):
+            chunk = todo[i:i + EMBED_BATCH]
+            vectors = await asyncio.to_thread(self.embed, [text for _, text in chunk]) or []
+            fresh.extend((vid, vec, {"text": text, "email": email}) for (vid, text), vec in zip(chunk, vectors) if vec)
+        if fresh:
+            found.update((vid, vec) for vid, vec, _ in fresh)
+            try: await asyncio.to_thread(upsert_vectors, index, email, fresh)
+            except Exception as e: print(f"Consolidation Upsert Error: {e}")
+        return [found.get(vid) or None for vid in ids]
+
+    async def consolidate_user(self, email, threshold=CONSOLIDATION_THRESHOLD):
+        """Returns kitni memories merge (delete) huin."""
+        index = self.get_index()
+        if not index: return 0
+        docs = await self.memories.find({"email": email}, {"text": 1, "source": 1, "created_at": 1, "updated_at": 1, "merged_count": 1}).sort("_id", -1).limit(CONSOLIDATION_MAX_MEMORIES).to_list(length=CONSOLIDATION_MAX_MEMORIES)
+        if len(docs) < 2: return 0
+        vectors = await self._embeddings(index, email, docs)
+        usable = [(d, v) for d, v in zip(docs, vectors) if v]
+        dims = {len(v) for _, v in usable}
+        if len(usable) < 2 or len(dims) != 1: return 0
+        docs, vectors = [d for d, _ in usable], [v for _, v in usable]
+
+        order = sorted(range(len(docs)), key=lambda i: _recency(docs[i]))
+        rank = [0] * len(docs)
+        for position, i in enumerate(order): rank[i] = position
+        clusters = await asyncio.to_thread(cluster_by_similarity, vectors, threshold, rank)
+        if not clusters: return 0
+
+        now = datetime.utcnow()
+        audits, drop, bumps = [], [], []
+        for canonical, others, scores in clusters:
+            keep = docs[canonical]
+            # Poora doc audit mein: restore() isi se memory wapas banata hai
+            merged = [{
+                "id": docs[i]["_id"], "text": docs[i]["text"], "similarity": s, "source": docs[i].get("source"),
+                "created_at": docs[i].get("created_at"), "updated_at": docs[i].get("updated_at"), "merged_count": docs[i].get("merged_count", 0),
+            } for i, s in zip(others, scores)]
+            drop.extend(docs[i] for i in others)
+            audits.append({
+                "email": email, "run_at": now, "threshold": threshold,
+                "canonical": {"id": keep["_id"], "text": keep["text"]}, "merged": merged,
+                "expires_at": now + timedelta(days=AUDIT_RETENTION_DAYS),
+            })
+            # Canonical ko pata rahe ki kitne facts isme mile hain
+            bumps.append(UpdateOne({"_id": keep["_id"]}, {"$inc": {"merged_count": len(others)}, "$set": {"updated_at": now}}))
+
+        # Audit pehle: delete ke beech crash ho toh bhi record rahe ki kya hataya ja raha tha
+        await self.audits.insert_many(audits, ordered=False)
+        await self.memories.bulk_write(bumps, ordered=False)
+        await self.memories.delete_many({"email": email, "_id": {"$in": [d["_id"] for d in drop]}})
+        try: await asyncio.to_thread(delete_vectors, index, email, [vector_id(email, d["text"]) for d in drop])
+        except Exception as e: print(f"Consolidation Vector Delete Error: {e}")
+        return len(drop)
+
+    async def consolidate_users(self, user_filter=None):
+        """Job chunk handler. Idempotent: dobara chale toh clusters pehle hi merge ho chuke hain."""
+        # Pinecone abhi connect nahi hua: users ko "consolidated" mark mat karo, agle run mein honge
+        if not self.get_index(): return 0
+        merged = 0
+        async for user in self.users.find(user_filter or {}, {"email": 1, "memories_consolidated_at": 1}):
+            email, since = user.get("email"), user.get("memories_consolidated_at")
+            if not email: continue
+            if since and not await self.memories.find_one({"email": email, "created_at": {"$gt": since}}, {"_id": 1}): continue
+            started = datetime.utcnow()
+            try:
+                merged += await self.consolidate_user(email)
+                await self.users.update_one({"_id": user["_id"]}, {"$set": {"memories_consolidated_at": started}})
+            except Exception as e: print(f"Memory Consolidation Error ({email}): {e}")
+        return merged
+
+    async def restore(self, audit_id):
+        """Ek merge undo: hataye gaye docs (same _id) wapas aur unke vectors bhi. Returns kitne wapas aaye."""
+        audit = await self.audits.find_one({"_id": audit_id, "restored_at": {"$exists": False}})
+        if not audit: return 0
+        email, restored = audit["email"], []
+        for m in audit.get("merged", []):
+            doc = {"email": email, "text": m["text"], "text_hash": text_hash(m["text"]), "source": m.get("source"),
+                   "created_at": m.get("created_at"), "updated_at": m.get("updated_at"), "merged_count": m.get("merged_count", 0)}
+            # Beech mein user ne wahi baat dobara save kar di ho toh unique index pe wahi doc rehne do
+            result = await self.memories.update_one({"email": email, "text_hash": doc["text_hash"]}, {"$setOnInsert": {"_id": m["id"], **doc}}, upsert=True)
+            if result.upserted_id is not None: restored.append(m["text"])
+        await self.memories.update_one({"_id": audit["canonical"]["id"]}, {"$inc": {"merged_count": -len(audit.get("merged", []))}})
+        await self.audits.update_one({"_id": audit_id}, {"$set": {"restored_at": datetime.utcnow()}, "$unset": {"expires_at": ""}})
+        index = self.get_index()
+        if index and restored:
+            docs = [{"text": t} for t in restored]
+            await self._embeddings(index, email, docs)   # namespace/legacy mein na mile toh embed + upsert
+        return len(restored)
+
+    async def recent(self, email=None, limit=50):
+        query = {"email": email} if email else {}
+        return await self.audits.find(query, {"expires_at": 0}).sort("run_at", -1).limit(limit).to_list(length=limit)
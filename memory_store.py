@@ -0,0 +1,154 @@
+# ==================================================================================
+#  FILE: memory_store.py
+#  DESCRIPTION: User Memories Collection (Hash Dedupe + Keyset Pagination + Bulk Ops + Migration)
+# ==================================================================================
+#  - Pehle memories user doc ke andar ek unbounded array thi: har users.find_one usko bhi
+#    laata tha, dedupe Python mein scan karke hota tha.
+#  - Ab har memory ek doc: {_id, email, text, text_hash, source, created_at, updated_at}.
+#    Unique (email, text_hash) index hi dedupe hai; same baat dobara aaye toh sirf updated_at badhta hai.
+#  - Listing keyset pagination se (_id < cursor), skip/offset nahi.
+#  - migrate_users: purane users.memories arrays ko batches mein yahan laata hai (job chunk handler).
+# ==================================================================================
+
+import hashlib
+import re
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+MEMORY_PAGE_SIZE = 50
+MEMORY_MAX_CHARS = 1000
+MIGRATION_BATCH = 100
+
+_SPACES_RE = re.compile(r"\s+")
+
+def normalize(text):
+    return _SPACES_RE.sub(" ", (text or "").strip())[:MEMORY_MAX_CHARS]
+
+def text_hash(text):
+    # Case/whitespace ka farak duplicate hi maana jaaye ("I like tea" == "i like  tea")
+    return hashlib.sha1(normalize(text).casefold().encode()).hexdigest()
+
+def vector_id(email, text):
+    # Pinecone ids pehle se isi format mein hain; badla toh purane vectors delete nahi honge
+    return f"{email}_{hashlib.md5(text.encode()).hexdigest()}"
+
+def _object_ids(ids):
+    out = []
+    for i in ids or []:
+        try: out.append(ObjectId(i))
+        except (InvalidId, TypeError): pass
+    return out
+
+class MemoryStore:
+    def __init__(self, memories, users):
+        self.memories = memories
+        self.users = users
+
+    async def ensure_indexes(self):
+        await self.memories.create_index([("email", 1), ("text_hash", 1)], unique=True)
+        await self.memories.create_index([("email", 1), ("_id", -1)])
+
+    # ==================================================================================
+    # [CATEGORY] WRITES
+    # ==================================================================================
+    def _upsert(self, email, text, source, now, created_at=None):
+        # _id client pe banta hai: bulk mein bhi texts ka order = _id order (pagination isi pe hai)
+        return (
+            {"email": email, "text_hash": text_hash(text)},
+            {"$setOnInsert": {"_id": ObjectId(), "text": text, "source": source, "created_at": created_at or now}, "$set": {"updated_at": now}},
+        )
+
+    async def add(self, email, text, source="manual"):
+        """Returns stored (normalized) text agar nayi memory bani, None agar pehle se thi (ya text khaali).
+
+        Vector isi text se embed/key karo: delete stored text se hi id banata hai.
+        """
+        text = normalize(text)
+        if not text: return None
+        try:
+            result = await self.memories.update_one(*self._upsert(email, text, source, datetime.utcnow()), upsert=True)
+        except DuplicateKeyError:
+            return None   # do requests ne ek saath same memory upsert ki; ek jeeta
+        return text if result.upserted_id is not None else None
+
+    async def add_many(self, email, texts, source="manual", created_at=None):
+        """Ek bulk_write. Returns sirf naye docs ke stored texts (duplicates chup-chaap skip)."""
+        now = datetime.utcnow()
+        ops, kept, seen = [], [], set()
+        for text in map(normalize, texts):
+            key = text_hash(text)
+            if not text or key in seen: continue
+            seen.add(key)
+            query, update = self._upsert(email, text, source, now, created_at)
+            kept.append((update["$setOnInsert"]["_id"], text))
+            ops.append(UpdateOne(query, update, upsert=True))
+        if not ops: return []
+        try:
+            result = await self.memories.bulk_write(ops, ordered=False)
+            upserted = set((result.upserted_ids or {}).values())
+        except BulkWriteError as e:
+            # Sirf unique-index race wale errors ho toh baaki ops ho chuke hain
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])): raise
+            upserted = {u["_id"] for u in e.details.get("upserted", [])}
+        # _id client pe bana tha: jo _id upsert hua wahi text naya hai
+        return [text for _id, text in kept if _id in upserted]
+
+    async def delete_many(self, email, ids=(), texts=()):
+        """ids ya texts se delete. Returns deleted docs ke texts (Pinecone cleanup ke liye)."""
+        clauses = []
+        if ids: clauses.append({"_id": {"$in": _object_ids(ids)}})
+        if texts: clauses.append({"text_hash": {"$in": [text_hash(t) for t in texts]}})
+        if not clauses: return []
+        query = {"email": email, "$or": clauses}
+        docs = await self.memories.find(query, {"text": 1}).to_list(length=None)
+        if not docs: return []
+        await self.memories.delete_many({"email": email, "_id": {"$in": [d["_id"] for d in docs]}})
+        return [d["text"] for d in docs]
+
+    # ==================================================================================
+    # [CATEGORY] READS
+    # ==================================================================================
+    async def page(self, email, before=None, limit=MEMORY_PAGE_SIZE):
+        """Newest first. Returns (items, next_cursor); next_cursor None matlab aakhri page."""
+        limit = max(1, min(limit, 200))
+        query = {"email": email}
+        cursor_ids = _object_ids([before]) if before else []
+        if cursor_ids: query["_id"] = {"$lt": cursor_ids[0]}
+        docs = await self.memories.find(query, {"text": 1, "created_at": 1, "updated_at": 1}).sort("_id", -1).limit(limit + 1).to_list(length=limit + 1)
+        more = len(docs) > limit
+        items = [{"id": str(d["_id"]), "text": d["text"], "created_at": d.get("created_at"), "updated_at": d.get("updated_at")} for d in docs[:limit]]
+        return items, (items[-1]["id"] if more else None)
+
+    async def recent_texts(self, email, n=5):
+        # Oldest -> newest order, jaise purana memories[-5:] deta tha
+        docs = await self.memories.find({"email": email}, {"text": 1}).sort("_id", -1).limit(n).to_list(length=n)
+        return [d["text"] for d in reversed(docs)]
+
+    async def count(self, email):
+        return await self.memories.count_documents({"email": email})
+
+    # ==================================================================================
+    # [CATEGORY] MIGRATION (users.memories array -> memories collection)
+    # ==================================================================================
+    async def migrate_users(self, user_filter=None, on_migrated=None):
+        """Job chunk handler. Idempotent: upserts dedupe karte hain, array tabhi hatta hai jab woh badla na ho.
+
+        on_migrated(email, raw_texts, stored_texts): purane vectors raw text se keyed the, naye docs
+        normalized text rakhte hain; caller inke vectors re-key karta hai.
+        """
+        query = {**(user_filter or {}), "memories": {"$exists": True}}
+        migrated = 0
+        async for user in self.users.find(query, {"email": 1, "memories": 1}).batch_size(MIGRATION_BATCH):
+            texts = [t for t in user.get("memories") or [] if isinstance(t, str)]
+            if texts and user.get("email"):
+                # Array ka order hi created order tha; add_many usi order mein _id deta hai
+                added = await self.add_many(user["email"], texts, source="migration")
+                if on_migrated: await on_migrated(user["email"], texts, added)
+            # Beech mein kisi purane worker ne naya push kiya ho toh array match nahi karega, agle run mein aayega
+            result = await self.users.update_one({"_id": user["_id"], "memories": user.get("memories")}, {"$unset": {"memories": ""}})
+            migrated += result.modified_count
+        return migrated
@@ -0,0 +1,106 @@
+# ==================================================================================
+#  FILE: metrics.py
+#  DESCRIPTION: In-Process Latency Histograms + Prometheus Text Exposition
+# ==================================================================================
+
+import hashlib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Prometheus-style cumulative buckets (seconds)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Percentiles ke liye har series ke last itne samples rakhte hain
+RESERVOIR_SIZE = 2048
+
+METRIC_HELP = {
+    "chat_stage_seconds": "Time spent in each /api/chat stage",
+    "tool_seconds": "End-to-end tool execution time",
+    "upstream_seconds": "Upstream provider call latency",
+    "job_chunk_seconds": "Background job chunk execution time",
+    "admission_seconds": "Admission control check time by tier and result",
+}
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound: self.counts[i] += 1
+
+    def percentile(self, pct):
+        if not self.recent: return 0.0
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+class MetricsRegistry:
+    def __init__(self):
+        self._series = {}   # (name, sorted label items) -> Histogram
+        # Tools thread mein bhi chalte hain, isliye lock
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None)))
+        with self._lock:
+            hist = self._series.get(key)
+            if hist is None: hist = self._series[key] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """with metrics.span("chat_stage_seconds", stage="llm", mode=mode): ...  (error pe status=error label)"""
+        started = time.perf_counter()
+        status = "ok"
+        try: yield labels
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            labels.setdefault("status", status)
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def render_prometheus(self):
+        lines, seen = [], set()
+        with self._lock: items = sorted(self._series.items())
+        for (name, labels), hist in items:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            sep = "," if base else ""
+            for bound, count in zip(BUCKETS, hist.counts):
+                lines.append(f'{name}_bucket{{{base}{sep}le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{base}{sep}le="+Inf"}} {hist.count}')
+            lines.append(f"{name}_sum{{{base}}} {hist.sum:.6f}")
+            lines.append(f"{name}_count{{{base}}} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, name=None):
+        """Admin page ke liye: har series ka count + p50/p95/p99 (milliseconds)."""
+        with self._lock: items = list(self._series.items())
+        rows = []
+        for (metric, labels), hist in items:
+            if name and metric != name: continue
+            rows.append({
+                "metric": metric, "labels": dict(labels), "count": hist.count,
+                "p50": round(hist.percentile(50) * 1000, 1), "p95": round(hist.percentile(95) * 1000, 1), "p99": round(hist.percentile(99) * 1000, 1),
+            })
+        return sorted(rows, key=lambda r: -r["p95"])
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def key_label(key):
+    # API key kabhi label mein nahi jaati, sirf uska chhota hash
+    return hashlib.sha256(key.encode()).hexdigest()[:6] if key else "none"
+
+metrics = MetricsRegistry()
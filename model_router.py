@@ -0,0 +1,201 @@
+# ==================================================================================
+#  FILE: model_router.py
+#  DESCRIPTION: Latency-Aware LLM Router (Rolling p50/p95 + Circuit Breaker + Hedged Requests)
+# ==================================================================================
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+
+from metrics import metrics, key_label
+from upstreams import OPENROUTER_CHAT_URL
+
+ROUTER_WINDOW = int(os.getenv("ROUTER_WINDOW", 50))            # har model ke last itne calls dekhte hain
+ROUTER_EXPLORE_RATE = float(os.getenv("ROUTER_EXPLORE_RATE", 0.05))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", 3))        # itne lagataar fail -> circuit open
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", 30))     # pehli baar open; har re-open pe double
+BREAKER_MAX_COOLDOWN = float(os.getenv("BREAKER_MAX_COOLDOWN", 600))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", 0.5))
+HEDGE_MAX_DELAY = float(os.getenv("HEDGE_MAX_DELAY", 8))
+HEDGE_MIN_SAMPLES = 10   # isse kam samples pe p95 bharose layak nahi
+PRIOR_LATENCY = 3.0      # naye model ka assumed p50, taaki usko bhi traffic mile
+
+# Task type -> candidates (provider, model). Order = tie-break jab stats barabar hon.
+ROUTES = {
+    "fast": [("groq", "llama-3.1-8b-instant"), ("openrouter", "zhipu/glm-4-flash"), ("openrouter", "stepfun/step-1-flash"), ("openrouter", "meta-llama/llama-3-8b-instruct:free")],
+    "heavy": [("groq", "llama-3.3-70b-versatile"), ("openrouter", "meta-llama/llama-3.1-8b-instruct:free"), ("openrouter", "qwen/qwen-2.5-7b-instruct:free")],
+    "coding": [("openrouter", "deepseek/deepseek-chat:free"), ("openrouter", "deepseek/deepseek-coder"), ("groq", "llama-3.3-70b-versatile")],
+    "vision": [("openrouter", "nvidia/nemotron-mini-4b-instruct"), ("groq", "llama-3.3-70b-versatile")],
+}
+TASK_TIMEOUTS = {"fast": 20, "heavy": 60, "coding": 90, "vision": 60}
+# Sirf in tasks pe hedged second request (baaki pe double cost ka faayda nahi)
+HEDGED_TASKS = set(filter(None, os.getenv("ROUTER_HEDGED_TASKS", "fast").split(",")))
+
+class RouterError(Exception):
+    pass
+
+def _pick_key(pool_env, single_env):
+    keys = [k.strip() for k in os.getenv(pool_env, "").split(",") if k.strip()]
+    return random.choice(keys) if keys else os.getenv(single_env)
+
+def call_groq(model, messages, timeout):
+    key = _pick_key("GROQ_API_KEY_POOL", "GROQ_API_KEY")
+    if not key: raise RouterError("Groq key missing")
+    from groq import Groq
+    with metrics.span("upstream_seconds", provider="groq", model=model, key=key_label(key)):
+        return Groq(api_key=key, timeout=timeout, max_retries=0).chat.completions.create(messages=messages, model=model).choices[0].message.content
+
+def call_openrouter(model, messages, timeout):
+    key = _pick_key("OPENROUTER_API_KEY_POOL", "OPENROUTER_API_KEY")
+    if not key: raise RouterError("OpenRouter key missing")
+    headers = {"Authorization": f"Bearer {key}", "HTTP-Referer": "https://shanvika.ai", "X-Title": "Shanvika AI", "Content-Type": "application/json"}
+    with metrics.span("upstream_seconds", provider="openrouter", model=model, key=key_label(key)):
+        response = requests.post(OPENROUTER_CHAT_URL, headers=headers, json={"model": model, "messages": messages}, timeout=timeout)
+    response.raise_for_status()
+    return response.json()['choices'][0]['message']['content']
+
+PROVIDERS = {"groq": call_groq, "openrouter": call_openrouter}
+
+class ModelStats:
+    """Ek (provider, model) ki rolling latency + error rate + circuit breaker state."""
+
+    def __init__(self):
+        self.latencies = deque(maxlen=ROUTER_WINDOW)   # sirf successful calls
+        self.outcomes = deque(maxlen=ROUTER_WINDOW)    # True/False
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.cooldown = BREAKER_COOLDOWN
+
+    def percentile(self, pct):
+        if not self.latencies: return PRIOR_LATENCY
+        values = sorted(self.latencies)
+        return values[min(len(values) - 1, int(pct / 100 * len(values)))]
+
+    @property
+    def error_rate(self):
+        return (self.outcomes.count(False) / len(self.outcomes)) if self.outcomes else 0.0
+
+    def available(self, now):
+        return self.open_until <= now
+
+    def score(self):
+        # Kam = behtar. Errors wale model ko latency ke upar penalty
+        return self.percentile(50) * (1 + 4 * self.error_rate)
+
+class ModelRouter:
+    def __init__(self, routes=ROUTES, providers=PROVIDERS):
+        self.routes = routes
+        self.providers = providers
+        self.stats = {}
+        self.hedges = {}   # task_type -> kitni baar backup bheja
+        self._lock = threading.Lock()
+        # Hedge ke loser calls background mein khatam hote hain; pool bounded rakha hai
+        self._workers = int(os.getenv("ROUTER_WORKERS", 16))
+        self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="llm-router")
+        self._active = 0   # pool mein abhi chal rahe calls (queue mein pade nahi)
+
+    def _stats(self, candidate):
+        stats = self.stats.get(candidate)
+        if stats is None: stats = self.stats[candidate] = ModelStats()
+        return stats
+
+    def candidates(self, task_type):
+        """Healthy candidates, sabse tez pehle. Sab ke circuits open hon toh jo sabse pehle khulega woh."""
+        routes = self.routes.get(task_type) or self.routes["fast"]
+        now = time.time()
+        with self._lock:
+            healthy = [c for c in routes if self._stats(c).available(now)]
+            if not healthy:
+                return [min(routes, key=lambda c: self._stats(c).open_until)]
+            ranked = sorted(healthy, key=lambda c: (self._stats(c).score(), routes.index(c)))
+        if len(ranked) > 1 and random.random() < ROUTER_EXPLORE_RATE:
+            # Thoda traffic doosron pe bhi, taaki unke stats purane na padein
+            i = random.randrange(1, len(ranked))
+            ranked[0], ranked[i] = ranked[i], ranked[0]
+        return ranked
+
+    def record(self, candidate, seconds, ok):
+        with self._lock:
+            stats = self._stats(candidate)
+            stats.outcomes.append(ok)
+            if ok:
+                stats.latencies.append(seconds)
+                stats.consecutive_failures = 0
+                stats.cooldown = BREAKER_COOLDOWN
+                stats.open_until = 0.0
+                return
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= BREAKER_FAILURES:
+                # Cooldown ke baad ek trial call jaati hai; woh bhi fail toh cooldown double
+                stats.open_until = time.time() + stats.cooldown
+                stats.cooldown = min(BREAKER_MAX_COOLDOWN, stats.cooldown * 2)
+                stats.consecutive_failures = BREAKER_FAILURES - 1
+
+    def hedge_delay(self, candidate):
+        stats = self._stats(candidate)
+        if len(stats.latencies) < HEDGE_MIN_SAMPLES: return HEDGE_MAX_DELAY
+        return min(HEDGE_MAX_DELAY, max(HEDGE_MIN_DELAY, stats.percentile(95)))
+
+    def _attempt(self, candidate, messages, timeout, running=None):
+        provider, model = candidate
+        with self._lock: self._active += 1
+        if running: running.set()
+        started = time.perf_counter()
+        try:
+            text = self.providers[provider](model, messages, timeout)
+            if not text: raise RouterError("empty response")
+        except Exception:
+            self.record(candidate, time.perf_counter() - started, False)
+            raise
+        finally:
+            with self._lock: self._active -= 1
+        self.record(candidate, time.perf_counter() - started, True)
+        return text
+
+    def _has_idle_worker(self):
+        with self._lock: return self._active < self._workers
+
+    def complete(self, task_type, messages, hedge=None):
+        """Sabse tez healthy model se jawab. Fail ho toh agla; hedged tasks pe slow primary ke saath backup race."""
+        timeout = TASK_TIMEOUTS.get(task_type, 60)
+        hedge = task_type in HEDGED_TASKS if hedge is None else hedge
+        queue = self.candidates(task_type)
+        last_error = None
+        while queue:
+            primary = queue.pop(0)
+            running = threading.Event()
+            futures = {self._pool.submit(self._attempt, primary, messages, timeout, running): primary}
+            if hedge and queue:
+                # Hedge clock tab se jab primary sach mein chalne lage: pool queue mein intezaar "slow model" nahi hai
+                running.wait()
+                done, _ = wait(futures, timeout=self.hedge_delay(primary))
+                # Pool bhara hai (overload) toh backup bhi queue mein hi padega: extra upstream load, faayda nahi
+                if not done and self._has_idle_worker():
+                    backup = queue.pop(0)
+                    self.hedges[task_type] = self.hedges.get(task_type, 0) + 1
+                    futures[self._pool.submit(self._attempt, backup, messages, timeout)] = backup
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try: return future.result()
+                    except Exception as e: last_error = e
+        raise RouterError(f"All models failed for '{task_type}': {last_error}")
+
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            return [{
+                "provider": provider, "model": model, "calls": len(stats.outcomes),
+                "p50": round(stats.percentile(50), 2) if stats.latencies else None,
+                "p95": round(stats.percentile(95), 2) if stats.latencies else None,
+                "error_rate": round(stats.error_rate, 2),
+                "circuit": "open" if not stats.available(now) else "closed",
+            } for (provider, model), stats in self.stats.items()]
+
+router = ModelRouter()
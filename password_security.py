@@ -0,0 +1,81 @@
+# ==================================================================================
+#  FILE: password_security.py
+#  DESCRIPTION: Off-Loop Password Hashing (Bounded Pool + Rehash-on-Login + Throttling)
+# ==================================================================================
+
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", 2))
+LOGIN_MAX_FAILURES = int(os.getenv("LOGIN_MAX_FAILURES", 5))
+LOGIN_FAILURE_WINDOW = int(os.getenv("LOGIN_FAILURE_WINDOW", 15 * 60))
+LOGIN_LOCKOUT_BASE = int(os.getenv("LOGIN_LOCKOUT_BASE", 30))
+
+# min = max = BCRYPT_ROUNDS, taaki cost badalne pe purane hashes needs_update() mein pakde jaayein
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS, bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+# bcrypt GIL chhod deta hai, isliye threads kaafi hain. Pool chhota rakha hai taaki login storm CPU na kha jaaye.
+_hash_pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="pwd-hash")
+
+def _prehash(password):
+    # bcrypt 72 bytes tak hi dekhta hai, isliye pehle SHA-256
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def _verify_and_update(plain, hashed):
+    ok, new_hash = pwd_context.verify_and_update(_prehash(plain), hashed)
+    return ok, new_hash
+
+async def hash_password(password):
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, pwd_context.hash, _prehash(password))
+
+async def verify_password(plain, hashed):
+    """Returns (ok, new_hash). new_hash tabhi milta hai jab cost badal gayi ho aur rehash chahiye."""
+    if not plain or not hashed: return False, None
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, _verify_and_update, plain, hashed)
+    except ValueError:
+        return False, None
+
+class LoginThrottle:
+    """Per-identifier failed-attempt counter. Limit cross hone pe exponential lockout."""
+
+    def __init__(self):
+        self._failures = {}   # key -> {"count", "first_at", "locked_until"}
+
+    def _key(self, identifier):
+        return (identifier or "").strip().lower()
+
+    def retry_after(self, identifier):
+        entry = self._failures.get(self._key(identifier))
+        if not entry: return 0
+        return max(0, int(entry["locked_until"] - time.time()))
+
+    def record_failure(self, identifier):
+        key, now = self._key(identifier), time.time()
+        entry = self._failures.get(key)
+        if not entry or now - entry["first_at"] > LOGIN_FAILURE_WINDOW:
+            entry = {"count": 0, "first_at": now, "locked_until": 0}
+        entry["count"] += 1
+        if entry["count"] >= LOGIN_MAX_FAILURES:
+            entry["locked_until"] = now + min(3600, LOGIN_LOCKOUT_BASE * 2 ** (entry["count"] - LOGIN_MAX_FAILURES))
+        self._failures[key] = entry
+        if len(self._failures) > 50000: self._prune()
+
+    def reset(self, identifier):
+        self._failures.pop(self._key(identifier), None)
+
+    def _prune(self):
+        now = time.time()
+        for key in [k for k, e in self._failures.items() if now - e["first_at"] > LOGIN_FAILURE_WINDOW and e["locked_until"] < now]:
+            self._failures.pop(key, None)
+
+login_throttle = LoginThrottle()
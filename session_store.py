@@ -0,0 +1,127 @@
+# ==================================================================================
+#  FILE: session_store.py
+#  DESCRIPTION: Server-Side Sessions (Opaque Cookie + In-Memory LRU + Mongo TTL Store)
+# ==================================================================================
+
+import json
+import os
+import secrets
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+
+SESSION_COOKIE = os.getenv("SESSION_COOKIE", "shanvika_sid")
+SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", 14 * 24 * 3600))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", 10000))
+# LRU entry ka data itne seconds tak dobara parse nahi hota. Revoke (ban / logout-everywhere) ke liye har
+# hit pe sirf _id existence check hota hai, toh doosre worker ka revoke bhi turant lagta hai
+SESSION_CACHE_TTL = int(os.getenv("SESSION_CACHE_TTL", 15))
+SKIP_PREFIXES = ("/static/",)
+
+class SessionStore:
+    def __init__(self, collection):
+        self.collection = collection
+        self._cache = OrderedDict()   # sid -> {"data", "email", "expires_at", "checked_at"}
+
+    async def ensure_indexes(self):
+        try:
+            await self.collection.create_index("expires_at", expireAfterSeconds=0)
+            await self.collection.create_index("user_email")
+        except Exception as e: print(f"Session Index Error: {e}")
+
+    def _remember(self, sid, entry):
+        self._cache[sid] = entry
+        self._cache.move_to_end(sid)
+        while len(self._cache) > SESSION_CACHE_SIZE: self._cache.popitem(last=False)
+
+    async def load(self, sid):
+        now = time.time()
+        entry = self._cache.get(sid)
+        if entry and now - entry["checked_at"] < SESSION_CACHE_TTL and entry["expires_at"] > datetime.utcnow():
+            # revoke_user / delete session doc hi hata dete hain: _id index pe chhota sa read, data/JSON nahi
+            if not await self.collection.find_one({"_id": sid}, {"_id": 1}):
+                self._cache.pop(sid, None)
+                return None
+            self._cache.move_to_end(sid)
+            return entry["data"]
+        doc = await self.collection.find_one({"_id": sid, "expires_at": {"$gt": datetime.utcnow()}})
+        if not doc:
+            self._cache.pop(sid, None)
+            return None
+        entry = {"data": json.loads(doc["data"]), "email": doc.get("user_email"), "expires_at": doc["expires_at"], "checked_at": now}
+        self._remember(sid, entry)
+        # Sliding expiry: aadha time nikal gaya ho tabhi extend karo, har request pe write nahi
+        if doc["expires_at"] - datetime.utcnow() < timedelta(seconds=SESSION_MAX_AGE / 2):
+            await self.save(sid, entry["data"])
+        return entry["data"]
+
+    async def save(self, sid, data):
+        email = (data.get("user") or {}).get("email")
+        expires_at = datetime.utcnow() + timedelta(seconds=SESSION_MAX_AGE)
+        await self.collection.update_one(
+            {"_id": sid},
+            {"$set": {"data": json.dumps(data, default=str), "user_email": email, "expires_at": expires_at}},
+            upsert=True
+        )
+        self._remember(sid, {"data": data, "email": email, "expires_at": expires_at, "checked_at": time.time()})
+
+    async def delete(self, sid):
+        self._cache.pop(sid, None)
+        await self.collection.delete_one({"_id": sid})
+
+    async def revoke_user(self, email):
+        """User ke saare sessions turant khatam (ban / logout-everywhere)."""
+        for sid in [s for s, e in self._cache.items() if e["email"] == email]: self._cache.pop(sid, None)
+        result = await self.collection.delete_many({"user_email": email})
+        return result.deleted_count
+
+class ServerSessionMiddleware:
+    """SessionMiddleware ka drop-in replacement: cookie mein sirf random session ID, data server pe."""
+
+    def __init__(self, app, store, https_only=True, same_site="lax"):
+        self.app = app
+        self.store = store
+        self.flags = f"path=/; Max-Age={SESSION_MAX_AGE}; HttpOnly; SameSite={same_site}" + ("; Secure" if https_only else "")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        # Static files ko session ki zarurat nahi, Mongo/LRU lookup skip
+        if scope["path"].startswith(SKIP_PREFIXES):
+            scope["session"] = {}
+            await self.app(scope, receive, send)
+            return
+
+        sid = HTTPConnection(scope).cookies.get(SESSION_COOKIE)
+        data = None
+        if sid:
+            try: data = await self.store.load(sid)
+            except Exception as e: print(f"Session Load Error: {e}")
+        scope["session"] = dict(data or {})
+        initial = json.dumps(data or {}, sort_keys=True, default=str)
+        initial_user = (data or {}).get("user")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                session = scope["session"]
+                if json.dumps(session, sort_keys=True, default=str) != initial:
+                    headers = MutableHeaders(scope=message)
+                    if session:
+                        new_sid = sid if sid and data is not None else None
+                        # Login/user change pe naya ID (session fixation se bachne ke liye)
+                        if new_sid and session.get("user") != initial_user:
+                            await self.store.delete(new_sid)
+                            new_sid = None
+                        new_sid = new_sid or secrets.token_urlsafe(32)
+                        await self.store.save(new_sid, session)
+                        headers.append("Set-Cookie", f"{SESSION_COOKIE}={new_sid}; {self.flags}")
+                    elif sid:
+                        await self.store.delete(sid)
+                        headers.append("Set-Cookie", f"{SESSION_COOKIE}=null; path=/; expires=Thu, 01 Jan 1970 00:00:00 GMT; HttpOnly")
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
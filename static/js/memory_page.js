@@ -26,39 +26,57 @@ async function saveInstruction() {
     setTimeout(() => btn.textContent = "Save Persona", 2000);
 }
 
-async function loadMemories() {
-    const res = await fetch('/api/memories');
+// Keyset pagination: server "next" cursor deta hai, "Load more" usi se agla page laata hai
+let nextMemoryCursor = null;
+
+async function loadMemories(before = null) {
+    const url = before ? `/api/memories?before=${encodeURIComponent(before)}` : '/api/memories';
+    const res = await fetch(url);
     const data = await res.json();
     const list = document.getElementById('memoryList');
-    document.getElementById('memCount').textContent = data.memories.length;
+    nextMemoryCursor = data.next;
     
-    list.innerHTML = '';
+    if (!before) {
+        document.getElementById('memCount').textContent = data.total ?? data.items.length;
+        list.innerHTML = '';
+    }
+    document.getElementById('loadMoreMemories')?.remove();
     
-    if (data.memories.length === 0) {
+    if (!before && data.items.length === 0) {
         list.innerHTML = '<p style="text-align: center; color: #64748b; padding: 20px;">No memories saved yet. Chat with Shanvika to build memory!</p>';
         return;
     }
 
     // 🚀 BUGS FIXED HERE: Direct DOM manipulation instead of innerHTML strings
-    data.memories.forEach(mem => {
+    data.items.forEach(mem => {
         const div = document.createElement('div');
         div.className = 'memory-item';
         
         const textSpan = document.createElement('span');
         textSpan.className = 'memory-text';
-        textSpan.textContent = mem; // Safe text injection (won't break quotes)
+        textSpan.textContent = mem.text; // Safe text injection (won't break quotes)
         
         const deleteBtn = document.createElement('button');
         deleteBtn.className = 'delete-btn';
         deleteBtn.innerHTML = '<i class="ri-delete-bin-line"></i>';
         
-        // Exact exact string pass ho raha hai bina break hue!
-        deleteBtn.onclick = () => deleteMemory(mem); 
+        // Id se delete, text match ki zarurat nahi
+        deleteBtn.onclick = () => deleteMemory(mem.id); 
         
         div.appendChild(textSpan);
         div.appendChild(deleteBtn);
         list.appendChild(div);
     });
+
+    if (nextMemoryCursor) {
+        const more = document.createElement('button');
+        more.id = 'loadMoreMemories';
+        more.className = 'delete-btn';
+        more.style.width = '100%';
+        more.textContent = 'Load more';
+        more.onclick = () => loadMemories(nextMemoryCursor);
+        list.appendChild(more);
+    }
 }
 
 async function addMemoryManual() {
@@ -76,13 +94,13 @@ async function addMemoryManual() {
     loadMemories();
 }
 
-async function deleteMemory(text) {
+async function deleteMemory(id) {
     if(!confirm("Forget this memory?")) return;
     
     await fetch('/api/delete_memory', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ memory_text: text })
+        body: JSON.stringify({ memory_id: id })
     });
     
     loadMemories();
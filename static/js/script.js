@@ -152,23 +152,53 @@ async function createNewChat() {
     loadHistory();
 }
 
-async function loadChat(sid) {
-    currentSessionId = sid;
-    localStorage.setItem('session_id', sid);
-    const res = await fetch(`/api/chat/${sid}`);
-    const data = await res.json();
-    
+let loadedMessages = [];
+let transcriptBefore = null;
+
+function renderTranscript() {
     const chatBox = document.getElementById('chat-box');
     chatBox.innerHTML = '';
     
     // Nayi chat load hone par date reset
     lastMessageDate = null; 
     
-    data.messages.forEach(msg => {
+    if (transcriptBefore !== null) {
+        const more = document.createElement('button');
+        more.className = 'block mx-auto my-2 text-xs text-gray-400 hover:text-pink-400';
+        more.textContent = 'Load earlier messages';
+        more.onclick = loadEarlierMessages;
+        chatBox.appendChild(more);
+    }
+    loadedMessages.forEach(msg => {
         appendMessage(msg.role === 'user' ? 'user' : 'assistant', msg.content, msg.timestamp);
     });
 }
 
+async function loadChat(sid) {
+    currentSessionId = sid;
+    localStorage.setItem('session_id', sid);
+    // Sirf latest page aata hai; purane messages "before" cursor se
+    const res = await fetch(`/api/chat/${sid}`);
+    const data = await res.json();
+    loadedMessages = data.messages || [];
+    transcriptBefore = data.before ?? null;
+    renderTranscript();
+}
+
+async function loadEarlierMessages() {
+    if (transcriptBefore === null) return;
+    const sid = currentSessionId;
+    const res = await fetch(`/api/chat/${sid}?before=${transcriptBefore}`);
+    const data = await res.json();
+    if (sid !== currentSessionId) return;
+    loadedMessages = (data.messages || []).concat(loadedMessages);
+    transcriptBefore = data.before ?? null;
+    const chatBox = document.getElementById('chat-box');
+    const fromBottom = chatBox.scrollHeight - chatBox.scrollTop;
+    renderTranscript();
+    chatBox.scrollTop = chatBox.scrollHeight - fromBottom;
+}
+
 async function sendMessage() {
     const input = document.getElementById('user-input');
     const msg = input.value.trim();
@@ -480,12 +510,12 @@ async function playAudio(text) {
     } catch (e) { console.error(e); }
 }
 
-async function loadHistory() {
-    const res = await fetch('/api/history');
-    const data = await res.json();
+let historyCursor = null;
+let historyLoading = false;
+
+function renderHistoryItems(items) {
     const list = document.getElementById('history-list');
-    list.innerHTML = '';
-    data.history.forEach(chat => {
+    items.forEach(chat => {
         const div = document.createElement('div');
         div.className = 'history-item';
         // Yaha par nav-label class add ki hai taaki title hide ho sake
@@ -495,6 +525,35 @@ async function loadHistory() {
         list.appendChild(div);
     });
 }
+
+async function loadHistory() {
+    const res = await fetch('/api/history');
+    const data = await res.json();
+    document.getElementById('history-list').innerHTML = '';
+    renderHistoryItems(data.history);
+    historyCursor = data.next_cursor || null;
+}
+
+// Infinite scroll: neeche pahunchte hi agla page (keyset cursor se)
+async function loadMoreHistory() {
+    if (!historyCursor || historyLoading) return;
+    historyLoading = true;
+    try {
+        const res = await fetch(`/api/history?cursor=${encodeURIComponent(historyCursor)}`);
+        const data = await res.json();
+        renderHistoryItems(data.history || []);
+        historyCursor = data.next_cursor || null;
+    } catch (e) { console.error(e); }
+    historyLoading = false;
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    const list = document.getElementById('history-list');
+    if (!list) return;
+    list.addEventListener('scroll', () => {
+        if (list.scrollTop + list.clientHeight >= list.scrollHeight - 80) loadMoreHistory();
+    });
+});
 async function loadProfile() {
     const res = await fetch('/api/profile');
     const data = await res.json();
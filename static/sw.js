@@ -1,21 +1,87 @@
-const CACHE_NAME = 'shanvika-v1';
-const urlsToCache = [
-  '/',
-  '/static/css/style.css',
-  '/static/js/script.js',
-  '/static/manifest.json'
-];
+// Precache sirf app shell (CSS/JS) build_assets.py ke manifest se; images pehli baar dikhne pe cache hoti hain
+const MANIFEST_URL = '/static/dist/asset-manifest.json';
+const SHELL_URLS = ['/static/manifest.json'];
+const FALLBACK_URLS = ['/static/css/style.css', '/static/js/script.js', '/static/js/tools.js', '/static/manifest.json'];
+const SHELL_EXTENSIONS = ['.css', '.js'];
+// Visited pages (network-first). Naye version pe baaki purane caches ke saath saaf hota hai
+const PAGES_CACHE = 'shanvika-pages';
+
+async function loadAssetManifest() {
+  try {
+    const res = await fetch(MANIFEST_URL, { cache: 'no-store' });
+    if (res.ok) return await res.json();
+  } catch (e) {}
+  return null;
+}
+
+async function currentCacheName() {
+  const manifest = await loadAssetManifest();
+  return `shanvika-${manifest ? manifest.version : 'dev'}`;
+}
 
 self.addEventListener('install', (event) => {
-  event.waitUntil(
-    caches.open(CACHE_NAME)
-      .then((cache) => cache.addAll(urlsToCache))
-  );
+  event.waitUntil((async () => {
+    const manifest = await loadAssetManifest();
+    const version = manifest ? manifest.version : 'dev';
+    // Mobile pe pehli visit poora image set download na kare: sirf CSS/JS
+    const shell = manifest
+      ? Object.entries(manifest.files).filter(([path]) => SHELL_EXTENSIONS.some((ext) => path.endsWith(ext))).map(([, url]) => url)
+      : FALLBACK_URLS;
+    const cache = await caches.open(`shanvika-${version}`);
+    await cache.addAll(SHELL_URLS.concat(shell));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil((async () => {
+    // Naye version ke aate hi purane caches (aur purane HTML wale pages) hata do
+    const current = await currentCacheName();
+    const names = await caches.keys();
+    await Promise.all(names.filter((n) => n.startsWith('shanvika-') && n !== current).map((n) => caches.delete(n)));
+    await self.clients.claim();
+  })());
 });
 
+async function cacheFirst(request) {
+  const cached = await caches.match(request);
+  if (cached) return cached;
+  const response = await fetch(request);
+  // Hashed URL immutable hai: pehli baar aaya toh rakh lo (images yahin se cache hoti hain)
+  if (response.ok) {
+    // Activate ke baad sirf current version ka asset cache bachta hai; manifest dobara fetch nahi
+    const name = (await caches.keys()).find((n) => n.startsWith('shanvika-') && n !== PAGES_CACHE);
+    if (name) (await caches.open(name)).put(request, response.clone());
+  }
+  return response;
+}
+
+async function networkFirstPage(request) {
+  try {
+    const response = await fetch(request);
+    // Sirf seedhe 200 pages; login redirects / errors offline copy na banein
+    if (response.ok && !response.redirected) {
+      const cache = await caches.open(PAGES_CACHE);
+      cache.put(request, response.clone());
+    }
+    return response;
+  } catch (e) {
+    const cached = await caches.match(request, { ignoreSearch: true });
+    return cached || (await caches.match('/')) || Response.error();
+  }
+}
+
 self.addEventListener('fetch', (event) => {
-  event.respondWith(
-    caches.match(event.request)
-      .then((response) => response || fetch(event.request))
-  );
-});
\ No newline at end of file
+  const url = new URL(event.request.url);
+  if (event.request.method !== 'GET' || url.origin !== self.location.origin) return;
+
+  // Hashed assets kabhi badalte nahi: cache-first (repeat visit pe zero network requests)
+  if (url.pathname.startsWith('/static/dist/') || SHELL_URLS.includes(url.pathname)) {
+    event.respondWith(cacheFirst(event.request));
+    return;
+  }
+  // Pages: network-first, har successful page cache mein; offline ho toh wahi copy
+  if (event.request.mode === 'navigate') {
+    event.respondWith(networkFirstPage(event.request));
+  }
+});
@@ -0,0 +1,67 @@
+# ==================================================================================
+#  FILE: static_assets.py
+#  DESCRIPTION: Precompressed Static Files + Asset Manifest Lookup for Templates
+# ==================================================================================
+
+import json
+import mimetypes
+import os
+
+import anyio
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+
+MANIFEST_PATH = os.path.join("static", "dist", "asset-manifest.json")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+def load_asset_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f: return json.load(f)
+    except Exception:
+        # Build nahi chala (local dev) -> original paths hi use honge
+        return {"version": "dev", "files": {}}
+
+asset_manifest = load_asset_manifest()
+
+def asset_url(path):
+    """Template helper: asset_url('css/style.css') -> /static/dist/css/style.<hash>.css"""
+    path = path.lstrip("/")
+    if path.startswith("static/"): path = path[len("static/"):]
+    return asset_manifest["files"].get(path, f"/static/{path}")
+
+class PrecompressedStaticFiles(StaticFiles):
+    """dist/ ke hashed files ke liye .br/.gz variant serve karta hai aur immutable cache lagata hai."""
+
+    async def get_response(self, path, scope):
+        rel = path.replace(os.sep, "/")
+        if not rel.startswith("dist/") or rel.endswith("asset-manifest.json"):
+            response = await super().get_response(path, scope)
+            response.headers.setdefault("Cache-Control", "no-cache")
+            return response
+
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if encoding not in accept: continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if not stat_result: continue
+            response = self.file_response(full_path, stat_result, scope)
+            if response.status_code == 200:
+                # Content-type original file ka, encoding variant ka
+                response.headers["Content-Type"] = content_type_for(path)
+                response.headers["Content-Encoding"] = encoding
+            response.headers["Vary"] = "Accept-Encoding"
+            response.headers["Cache-Control"] = IMMUTABLE
+            return response
+
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE
+            response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+def content_type_for(path):
+    media_type, _ = mimetypes.guess_type(path)
+    if media_type and (media_type.startswith("text/") or media_type in ("application/javascript", "application/json")):
+        media_type += "; charset=utf-8"
+    return media_type or "application/octet-stream"
@@ -0,0 +1,28 @@
+# Repo ke modules flat top-level hain: `pytest` kahin se bhi chale, root import path pe rahe
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+class FakeIndex:
+    """Pinecone index ka in-memory stand-in: namespace -> {id: values}. "" = purana shared namespace."""
+
+    def __init__(self):
+        self.namespaces = {}
+
+    def fetch(self, ids, namespace=""):
+        found = self.namespaces.get(namespace, {})
+        return {"vectors": {i: {"values": found[i]} for i in ids if i in found}}
+
+    def upsert(self, vectors, namespace=""):
+        for vid, values, _ in vectors: self.namespaces.setdefault(namespace, {})[vid] = values
+
+    def delete(self, ids=None, namespace="", delete_all=False):
+        if delete_all: self.namespaces.pop(namespace, None)
+        for vid in ids or []: self.namespaces.get(namespace, {}).pop(vid, None)
+
+@pytest.fixture
+def fake_index():
+    return FakeIndex()
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+import admission
+from admission import Admission, MemoryBuckets
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now[0])
+    return now
+
+def test_memory_bucket_burst_then_refill(clock):
+    buckets = MemoryBuckets()
+    take = lambda cost=1: asyncio.run(buckets.take("user:a", 3, 0.5, cost))
+    assert [take()[0] for _ in range(4)] == [True, True, True, False]
+    clock[0] += 2   # 0.5/sec -> 1 token
+    assert take() == (True, 0)
+    assert take()[0] is False
+
+def test_memory_bucket_never_exceeds_capacity(clock):
+    buckets = MemoryBuckets()
+    asyncio.run(buckets.take("k", 5, 1.0, 1))
+    clock[0] += 3600
+    assert asyncio.run(buckets.take("k", 5, 1.0, 0)) == (True, 5)
+
+def test_denial_refunds_buckets_that_granted(clock):
+    gate = Admission(MemoryBuckets())
+    async def scenario():
+        # IP bucket (60) ko khaali karo, user bucket (free: 30) bhara hai
+        for _ in range(60): await gate.store.take("ip:1.2.3.4", *admission.IP_LIMIT, 1)
+        decision = await gate.admit("a@x", "1.2.3.4", "free", 1)
+        _, user_tokens = await gate.store.take("user:a@x", *admission.TIER_LIMITS["free"], 0)
+        return decision, user_tokens
+    decision, user_tokens = asyncio.run(scenario())
+    assert not decision.ok and decision.reason == "ip" and decision.retry_after >= 1
+    assert user_tokens == admission.TIER_LIMITS["free"][0]
+
+def test_inflight_cap_sheds_and_release_frees_slot(monkeypatch, clock):
+    monkeypatch.setitem(admission.MAX_INFLIGHT_PER_WORKER, "pro", 2)
+    gate = Admission(MemoryBuckets())
+    admit = lambda: asyncio.run(gate.admit("p@x", None, "pro", 1, shed=True))
+    assert admit().ok and admit().ok
+    shed = admit()
+    assert not shed.ok and shed.reason == "overloaded"
+    gate.release("pro")
+    assert admit().ok
+
+def test_cost_above_capacity_is_capped(clock):
+    gate = Admission(MemoryBuckets())
+    assert asyncio.run(gate.admit("g", None, "guest", 50)).ok
@@ -0,0 +1,51 @@
+from context_builder import build_messages, count_tokens, render_context_history, truncate_tokens, turns_after_summary
+
+def turn(role, n, word="word"):
+    return {"role": role, "content": " ".join([word] * n)}
+
+def test_truncate_tokens_keeps_head_and_tail_within_budget():
+    text = "START " + "filler " * 2000 + "ERROR at end"
+    out = truncate_tokens(text, 100)
+    assert out.startswith("START") and out.endswith("ERROR at end")
+    assert "[trimmed]" in out
+    assert count_tokens(out) <= 100 + count_tokens("\n...[trimmed]...\n")
+
+def test_truncate_tokens_short_text_unchanged():
+    assert truncate_tokens("chhota sa message", 50) == "chhota sa message"
+
+def test_build_messages_always_sends_current_message():
+    history = [turn("user", 20), turn("assistant", 20), turn("user", 5000, "huge")]
+    messages, stats = build_messages("system", history, budget=300)
+    assert messages[0]["role"] == "system"
+    assert messages[-1]["role"] == "user" and messages[-1]["content"].startswith("huge")
+    assert stats["turns"] == 1
+
+def test_build_messages_drops_oldest_turns_first():
+    history = [turn("user" if i % 2 == 0 else "assistant", 50, f"t{i}") for i in range(20)]
+    messages, stats = build_messages("system", history, budget=400)
+    kept = [m["content"].split()[0] for m in messages[1:]]
+    assert kept == [f"t{i}" for i in range(20 - len(kept), 20)]
+    assert stats["tokens"] <= 400
+
+def test_build_messages_reserves_room_for_summary_and_memory():
+    history = [turn("user" if i % 2 == 0 else "assistant", 50) for i in range(40)]
+    messages, stats = build_messages("system", history, memory="Likes chai", summary="They talked about exams.", budget=800)
+    system = messages[0]["content"]
+    assert "Likes chai" in system and "They talked about exams." in system
+    assert stats["summary"] and stats["tokens"] <= 800
+
+def test_turns_after_summary_skips_folded_turns():
+    messages = [{"role": "user", "content": str(i)} for i in range(30)]
+    tail = messages[-10:]
+    # Poori history 30, summary pehle 25 cover karti hai -> tail ke aakhri 5 hi bachte hain
+    assert turns_after_summary(tail, 30, 25) == messages[25:]
+    # Summary tail se pehle tak hi hai -> poora tail
+    assert turns_after_summary(tail, 30, 12) == tail
+    assert turns_after_summary(tail, 30) == tail
+
+def test_render_context_history_newest_within_budget():
+    messages = [turn("user", 30, f"m{i}") for i in range(10)]
+    out = render_context_history(messages, budget=200)
+    assert out.rstrip(" |").endswith("m9")
+    assert "m0" not in out
+    assert count_tokens(out) <= 200
@@ -0,0 +1,33 @@
+import pytest
+
+from currency_engine import RateTable, parse_currency_query, resolve_currency
+
+@pytest.mark.parametrize("query, expected", [
+    ("500 usd to inr", (500.0, "USD", "INR")),
+    ("$20 in rupees", (20.0, "USD", "INR")),
+    ("1.5 lakh inr to usd", (150000.0, "INR", "USD")),
+    ("Convert 2,500 euros into pounds?", (2500.0, "EUR", "GBP")),
+    ("10k yen to canadian dollars", (10000.0, "JPY", "CAD")),
+    ("100 dollar me rupaye", (100.0, "USD", "INR")),
+    ("usd to inr", (1.0, "USD", "INR")),
+])
+def test_parse_currency_query(query, expected):
+    assert parse_currency_query(query) == expected
+
+@pytest.mark.parametrize("query", ["what is the weather in delhi", "500 to inr", "hello", "20 usd to rupees please now ok"])
+def test_parse_currency_query_rejects_non_conversions(query):
+    assert parse_currency_query(query) is None
+
+def test_resolve_currency_aliases_and_iso_codes():
+    assert resolve_currency("Rs.") == "INR"
+    assert resolve_currency("australian dollars") == "AUD"
+    assert resolve_currency("chf") == "CHF"
+    assert resolve_currency("rupeez") is None
+
+def test_rate_table_normalizes_to_usd_base():
+    table = RateTable(sources=[])
+    table.load("EUR", {"EUR": 1.0, "USD": 1.1, "INR": 91.3})
+    assert table.rates["USD"] == pytest.approx(1.0)
+    assert table.convert(1.1, "USD", "EUR") == pytest.approx(1.0)
+    assert table.convert(100, "USD", "INR") == pytest.approx(8300.0)
+    assert table.convert(1, "USD", "XYZ") is None
@@ -0,0 +1,24 @@
+from diary_context import render_day
+
+def line(sid, role, content):
+    return {"sid": sid, "role": role, "content": content}
+
+def test_render_day_includes_every_session_in_first_seen_order():
+    lines = [line("a", "user", "subah ki baat"), line("b", "user", "dopahar ki baat"), line("a", "assistant", "reply")]
+    out = render_day(lines, budget=1000)
+    assert out.index("subah ki baat") < out.index("dopahar ki baat")
+    assert "assistant: reply" in out
+
+def test_render_day_keeps_latest_lines_of_long_session():
+    lines = [line("long", "user", f"message number {i:03d}") for i in range(100)] + [line("short", "user", "hi")]
+    out = render_day(lines, budget=300)
+    assert len(out) <= 300 + 2
+    assert "user: hi" in out
+    assert "message number 099" in out and "message number 000" not in out
+
+def test_render_day_oversized_latest_line_keeps_its_tail():
+    out = render_day([line("a", "user", "x" * 500 + "END")], budget=100)
+    assert out.endswith("END\n") and len(out) == 100
+
+def test_render_day_empty():
+    assert render_day([]) == ""
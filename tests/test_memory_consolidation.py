@@ -0,0 +1,48 @@
+import asyncio
+
+import numpy as np
+
+from memory_consolidation import MemoryConsolidator, cluster_by_similarity
+from memory_store import vector_id
+from vector_index import namespace_for
+
+def test_cluster_groups_near_duplicates_only():
+    vectors = [[1, 0, 0], [0.99, 0.05, 0], [0, 1, 0], [0, 0, 1]]
+    clusters = cluster_by_similarity(vectors, threshold=0.9)
+    assert len(clusters) == 1
+    canonical, others, scores = clusters[0]
+    assert sorted([canonical, *others]) == [0, 1]
+    assert scores[0] > 0.9
+
+def test_cluster_does_not_chain_through_middle_member():
+    # A~B aur B~C, par A aur C alag facts hain: ek cluster mein nahi aane chahiye
+    angle = np.radians(20)
+    a, b, c = [1, 0], [np.cos(angle), np.sin(angle)], [np.cos(2 * angle), np.sin(2 * angle)]
+    clusters = cluster_by_similarity([a, b, c], threshold=0.9)
+    assert clusters and not any({0, 2} <= {canonical, *others} for canonical, others, _ in clusters)
+
+def test_cluster_rank_picks_newest_as_canonical():
+    vectors = [[1, 0], [1, 0.01], [1, 0.02]]
+    assert cluster_by_similarity(vectors, 0.9, rank=[0, 2, 1])[0][0] == 1
+    assert cluster_by_similarity(vectors, 0.9)[0][0] == 1   # medoid
+
+def test_cluster_handles_degenerate_input():
+    assert cluster_by_similarity([]) == []
+    assert cluster_by_similarity([[1, 0]]) == []
+    assert cluster_by_similarity([[0, 0], [0, 0]], 0.9) == []
+
+def test_embeddings_use_legacy_then_batch_embed_and_write_back(fake_index):
+    email, index, calls = "a@x", fake_index, []
+    index.namespaces[namespace_for(email)] = {vector_id(email, "t0"): [1, 0]}
+    index.namespaces[""] = {vector_id(email, "t1"): [0, 1]}
+    def embed(texts):
+        calls.append(list(texts))
+        return [[1, 1]] * len(texts)
+    consolidator = MemoryConsolidator(None, None, None, lambda: index, embed)
+    docs = [{"text": f"t{i}"} for i in range(4)]
+
+    assert asyncio.run(consolidator._embeddings(index, email, docs)) == [[1, 0], [0, 1], [1, 1], [1, 1]]
+    assert calls == [["t2", "t3"]]
+    # Dobara chale toh namespace se hi milte hain, embed call nahi
+    asyncio.run(consolidator._embeddings(index, email, docs))
+    assert calls == [["t2", "t3"]]
@@ -0,0 +1,16 @@
+from memory_store import MEMORY_MAX_CHARS, normalize, text_hash, vector_id
+
+def test_normalize_collapses_whitespace_and_caps_length():
+    assert normalize("  I like \n\t tea  ") == "I like tea"
+    assert normalize(None) == ""
+    assert len(normalize("x" * (MEMORY_MAX_CHARS + 50))) == MEMORY_MAX_CHARS
+
+def test_text_hash_ignores_case_and_spacing():
+    assert text_hash("I like tea") == text_hash("i  like TEA ")
+    assert text_hash("I like tea") != text_hash("I like coffee")
+
+def test_vector_id_is_keyed_on_exact_text():
+    # Isiliye vectors hamesha stored (normalized) text se banne chahiye
+    assert vector_id("a@x", "I like tea") == vector_id("a@x", normalize(" I like  tea"))
+    assert vector_id("a@x", "I like tea") != vector_id("a@x", "I like  tea")
+    assert vector_id("a@x", "t").startswith("a@x_")
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+import model_router
+from model_router import ModelRouter, RouterError
+
+ROUTES = {"fast": [("p", "a"), ("p", "b"), ("p", "c")]}
+
+@pytest.fixture(autouse=True)
+def no_exploration(monkeypatch):
+    monkeypatch.setattr(model_router, "ROUTER_EXPLORE_RATE", 0)
+
+def make_router(behaviour):
+    """behaviour: model -> reply text, ya Exception instance (raise hoga)."""
+    calls = []
+    def provider(model, messages, timeout):
+        calls.append(model)
+        result = behaviour[model]
+        if isinstance(result, Exception): raise result
+        return result
+    return ModelRouter(routes=ROUTES, providers={"p": provider}), calls
+
+def test_candidates_ranked_by_latency_then_route_order():
+    router, _ = make_router({})
+    assert router.candidates("fast") == ROUTES["fast"]
+    for _ in range(5):
+        router.record(("p", "a"), 4.0, True)
+        router.record(("p", "b"), 0.5, True)
+    assert [m for _, m in router.candidates("fast")] == ["b", "c", "a"]   # c: prior 3s
+
+def test_error_rate_penalises_fast_but_flaky_model():
+    router, _ = make_router({})
+    for ok in (True, False, True, False):
+        router.record(("p", "a"), 0.5, ok)
+    router.record(("p", "b"), 1.2, True)
+    assert router.candidates("fast")[0] == ("p", "b")
+
+def test_breaker_opens_after_consecutive_failures_and_backs_off(monkeypatch):
+    router, _ = make_router({})
+    now = [1000.0]
+    monkeypatch.setattr(model_router.time, "time", lambda: now[0])
+    for _ in range(model_router.BREAKER_FAILURES): router.record(("p", "a"), 1, False)
+    assert ("p", "a") not in router.candidates("fast")
+    now[0] += model_router.BREAKER_COOLDOWN + 1
+    assert ("p", "a") in router.candidates("fast")
+    # Half-open trial bhi fail: cooldown double
+    router.record(("p", "a"), 1, False)
+    assert router.stats[("p", "a")].open_until == pytest.approx(now[0] + 2 * model_router.BREAKER_COOLDOWN)
+
+def test_all_circuits_open_returns_soonest_to_recover():
+    router, _ = make_router({})
+    for i, candidate in enumerate(ROUTES["fast"]):
+        router._stats(candidate).open_until = 10**12 - i
+    assert router.candidates("fast") == [("p", "c")]
+
+def test_complete_falls_through_to_next_model():
+    router, calls = make_router({"a": RouterError("down"), "b": "", "c": "jawab"})
+    assert router.complete("fast", [], hedge=False) == "jawab"
+    assert calls == ["a", "b", "c"]
+    assert router.stats[("p", "a")].outcomes[-1] is False
+
+def test_complete_raises_when_every_model_fails():
+    router, _ = make_router({m: RouterError("down") for _, m in ROUTES["fast"]})
+    with pytest.raises(RouterError):
+        router.complete("fast", [], hedge=False)
+
+def slow_router(monkeypatch, workers):
+    monkeypatch.setenv("ROUTER_WORKERS", str(workers))
+    monkeypatch.setattr(model_router, "HEDGE_MAX_DELAY", 0.05)
+    calls = []
+    def provider(model, messages, timeout):
+        calls.append(model)
+        if model == "a": time.sleep(0.3)
+        return f"from {model}"
+    return ModelRouter(routes=ROUTES, providers={"p": provider}), calls
+
+def test_slow_primary_is_hedged_when_a_worker_is_free(monkeypatch):
+    router, calls = slow_router(monkeypatch, workers=4)
+    assert router.complete("fast", [], hedge=True) == "from b"
+    assert calls[:2] == ["a", "b"] and router.hedges["fast"] == 1
+
+def test_no_hedge_when_pool_is_saturated(monkeypatch):
+    router, calls = slow_router(monkeypatch, workers=1)
+    assert router.complete("fast", [], hedge=True) == "from a"
+    assert calls == ["a"] and "fast" not in router.hedges
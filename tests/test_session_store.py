@@ -0,0 +1,20 @@
+import asyncio
+
+import pytest
+
+from session_store import SessionStore
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+def test_revoke_on_one_worker_ends_cached_session_on_another():
+    sessions = mongomock_motor.AsyncMongoMockClient().db.sessions
+    worker_a, worker_b = SessionStore(sessions), SessionStore(sessions)
+    async def scenario():
+        await worker_a.save("sid1", {"user": {"email": "a@x"}})
+        await worker_a.save("sid2", {"user": {"email": "b@x"}})
+        assert (await worker_b.load("sid1"))["user"]["email"] == "a@x"   # ab worker_b ke LRU mein
+        await worker_a.revoke_user("a@x")
+        return await worker_b.load("sid1"), await worker_b.load("sid2")
+    revoked, other = asyncio.run(scenario())
+    assert revoked is None and "sid1" not in worker_b._cache
+    assert other["user"]["email"] == "b@x"
@@ -0,0 +1,30 @@
+import asyncio
+
+from tool_registry import BUSY_REPLY, TIMEOUT_REPLY, ToolSpec, stream_tool
+
+async def slow_stream(message):
+    for i in range(3):
+        await asyncio.sleep(0.01)
+        yield "partial", f"{message} {i}"
+    await asyncio.sleep(1)
+    yield "final", "done"
+
+def collect(spec, **ctx):
+    async def run(): return [item async for item in stream_tool(spec, **ctx)]
+    return asyncio.run(run())
+
+def test_stream_tool_forwards_partials_then_times_out():
+    spec = ToolSpec("yt", None, timeout=0.2, stream=slow_stream)
+    assert collect(spec, message="u") == [("partial", "u 0"), ("partial", "u 1"), ("partial", "u 2"), ("error", TIMEOUT_REPLY)]
+    assert spec.stats["timeouts"] == 1
+
+def test_stream_tool_shares_bulkhead_and_frees_slot_on_disconnect():
+    spec = ToolSpec("yt", None, timeout=5, concurrency=1, queue_timeout=0.05, stream=slow_stream)
+    async def scenario():
+        first = stream_tool(spec, message="u")
+        await first.__anext__()                                       # slot le liya
+        busy = [item async for item in stream_tool(spec, message="v")]
+        await first.aclose()                                          # client chala gaya
+        return busy, spec.semaphore._value
+    busy, free_slots = asyncio.run(scenario())
+    assert busy == [("error", BUSY_REPLY)] and free_slots == 1
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+from tools_lab import build_lyrics_entry, find_line, normalize_lyric
+
+LYRICS = """[Chorus]
+Tum hi ho
+Ab tum hi ho
+Zindagi ab tum hi ho
+Chain bhi, mera dard bhi
+Meri aashiqui ab tum hi ho
+
+Tum hi ho
+Ab tum hi ho
+Last line"""
+
+def entry():
+    return build_lyrics_entry(SimpleNamespace(title="Tum Hi Ho", lyrics=LYRICS))
+
+def test_normalize_lyric_folds_spelling_variants():
+    assert normalize_lyric("Zindagi ab tum hi ho!") == normalize_lyric("jindagee ab tum hii ho")
+    assert normalize_lyric("Meri aashiqui") == normalize_lyric("meri ashiqui")
+    assert normalize_lyric("...") == ""
+
+def test_build_lyrics_entry_skips_section_headers_and_blanks():
+    e = entry()
+    assert e["lines"][0] == "Tum hi ho" and "[Chorus]" not in e["lines"]
+    assert e["index"][normalize_lyric("Tum hi ho")] == [0, 5]
+
+def test_find_line_prefers_occurrence_after_last_position():
+    e = entry()
+    assert find_line(e, "tum hi ho") == 0
+    assert find_line(e, "tum hi ho", after=3) == 5
+
+def test_find_line_substring_and_fuzzy_match():
+    e = entry()
+    assert find_line(e, "chain bhi") == 3
+    assert find_line(e, "meri aashiqi ab tumhi ho") == 4
+
+def test_find_line_never_returns_last_line_or_nonsense():
+    e = entry()
+    assert find_line(e, "last line") is None   # aage gaane ko kuch nahi
+    assert find_line(e, "completely different song") is None
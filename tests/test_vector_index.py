@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+import vector_index
+from memory_store import vector_id
+from vector_index import VectorReindexer, namespace_for
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+@pytest.fixture(autouse=True)
+def single_attempt(monkeypatch):
+    monkeypatch.setattr(vector_index, "REINDEX_RETRIES", 1)   # test mein backoff sleep nahi
+
+def seed(db, n=25):
+    docs = [{"email": f"u{i % 3}@x", "text": f"fact {i}"} for i in range(n)]
+    asyncio.run(db.memories.insert_many(docs))
+    return docs
+
+def test_reindex_writes_each_user_namespace_and_marks_done(fake_index):
+    db, index = mongomock_motor.AsyncMongoMockClient().db, fake_index
+    docs = seed(db)
+    reindexer = VectorReindexer(db.memories, db.checkpoints, index, lambda texts: [[1.0, 0.0]] * len(texts))
+    state = asyncio.run(reindexer.run(batch=10, concurrency=2, log=lambda *_: None))
+    assert state["status"] == "done" and state["upserted"] == 25 and state["batches"] == 3
+    assert vector_id("u1@x", "fact 1") in index.namespaces[namespace_for("u1@x")]
+    assert sum(map(len, index.namespaces.values())) == len(docs)
+
+def test_reindex_checkpoint_resumes_after_failed_batch(fake_index):
+    db, index = mongomock_motor.AsyncMongoMockClient().db, fake_index
+    seed(db)
+    embedded, broken = [], {"fact 12"}
+    def embed(texts):
+        if broken & set(texts): raise RuntimeError("gemini down")
+        embedded.extend(texts)
+        return [[1.0]] * len(texts)
+    reindexer = VectorReindexer(db.memories, db.checkpoints, index, embed)
+
+    state = asyncio.run(reindexer.run(batch=10, concurrency=1, log=lambda *_: None))
+    assert state["status"] == "failed" and "batch 1" in state["error"]
+    assert state["upserted"] == 10   # sirf batch 0 checkpoint tak
+
+    broken.clear(); embedded.clear()
+    state = asyncio.run(reindexer.run(batch=10, concurrency=1, log=lambda *_: None))
+    assert state["status"] == "done" and state["upserted"] == 25
+    assert "fact 0" not in embedded and "fact 12" in embedded   # checkpoint ke baad se hi
+
+    calls = len(embedded)
+    asyncio.run(reindexer.run(log=lambda *_: None))   # done: dobara kuch nahi
+    assert len(embedded) == calls
+
+def test_email_scoped_run_does_not_complete_or_advance_full_run(fake_index):
+    db = mongomock_motor.AsyncMongoMockClient().db
+    docs = seed(db, 30)
+    reindexer = VectorReindexer(db.memories, db.checkpoints, fake_index, lambda texts: [[1.0]] * len(texts))
+    scoped = asyncio.run(reindexer.run(email="u2@x", batch=4, log=lambda *_: None))
+    assert scoped["_id"] == "reindex:u2@x" and scoped["upserted"] == 10
+
+    full = asyncio.run(reindexer.run(batch=4, log=lambda *_: None))
+    assert full["_id"] == "reindex" and full["status"] == "done" and full["upserted"] == len(docs)
+    assert sum(map(len, fake_index.namespaces.values())) == len(docs)
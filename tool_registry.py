@@ -0,0 +1,188 @@
+# ==================================================================================
+#  FILE: tool_registry.py
+#  DESCRIPTION: Declarative Tool Registry (Handler, Template, Timeout, Bulkhead, Cache)
+# ==================================================================================
+
+import asyncio
+import time
+from collections import OrderedDict
+
+from metrics import metrics
+
+from tools_lab import (
+    generate_image_hf, generate_prompt_only, generate_qr_code,
+    analyze_resume, review_github, currency_tool,
+    summarize_youtube, stream_youtube_summary, generate_password_tool, fix_grammar_tool,
+    generate_interview_questions, handle_mock_interview,
+    solve_math_problem, smart_todo_maker, build_pro_resume,
+    sing_with_me_tool, run_agent_task, generate_flashcards_tool,
+    cold_email_tool, fitness_coach_tool, feynman_explainer_tool,
+    code_debugger_tool, movie_talker_tool, anime_talker_tool
+)
+
+TOOL_CACHE_SIZE = 500
+# Admission cost (token) per call: bina LLM wale tools sabse saste
+MODEL_TIER_COSTS = {"none": 0.25, "fast": 1, "heavy": 2, "coding": 3, "vision": 3, "image": 3}
+BUSY_REPLY = "⚠️ This tool is busy right now. Please try again in a moment."
+TIMEOUT_REPLY = "⚠️ This tool took too long to respond. Please try again."
+
+class ToolSpec:
+    """Ek tool ki poori declaration. Routes aur chat dispatch dono isi se bante hain.
+
+    inputs: handler ko kaunse context values kis order mein chahiye
+            ("message", "file_data", "context_history", "session_id").
+    blocking: handler plain sync function hai (async nahi) -> asyncio.to_thread mein chalao.
+              Async handlers apne sync SDK calls khud to_thread mein bhejte hain.
+    cache_ttl: 0 = cache nahi; warna same input ka reply itne seconds tak reuse.
+    cost: admission control ke token; default model_tier se (MODEL_TIER_COSTS).
+    stream: optional async generator fn(*inputs) -> (stage, text); stream_tool isko usi bulkhead/timeout mein chalata hai.
+    """
+
+    def __init__(self, name, handler, template=None, inputs=("message",), model_tier="fast",
+                 timeout=60, concurrency=8, queue_timeout=5, cache_ttl=0, needs_context=False,
+                 blocking=False, chat_mode=True, cost=None, stream=None):
+        self.name = name
+        self.handler = handler
+        self.template = template
+        self.inputs = inputs
+        self.model_tier = model_tier
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.queue_timeout = queue_timeout
+        self.cache_ttl = cache_ttl
+        self.needs_context = needs_context
+        self.blocking = blocking
+        self.chat_mode = chat_mode
+        self.cost = MODEL_TIER_COSTS.get(model_tier, 1) if cost is None else cost
+        self.stream = stream
+        self.stats = {"calls": 0, "cache_hits": 0, "rejected": 0, "timeouts": 0, "errors": 0, "busy_seconds": 0.0}
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        # Event loop ke andar hi banate hain
+        if self._semaphore is None: self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def invoke(self, ctx):
+        args = [ctx.get(key) for key in self.inputs]
+        if self.blocking: return await asyncio.to_thread(self.handler, *args)
+        return await self.handler(*args)
+
+TOOLS = OrderedDict((spec.name, spec) for spec in [
+    ToolSpec("flashcards", generate_flashcards_tool, "tools/flashcards.html", model_tier="heavy", chat_mode=False),
+    ToolSpec("image_gen", generate_image_hf, "tools/image_gen.html", model_tier="image", timeout=90, concurrency=4),
+    ToolSpec("prompt_writer", generate_prompt_only, "tools/prompt_writer.html", model_tier="heavy"),
+    ToolSpec("qr_generator", generate_qr_code, "tools/qr_generator.html", model_tier="none", timeout=10, cache_ttl=3600),
+    ToolSpec("resume_analyzer", analyze_resume, "tools/resume_analyzer.html", inputs=("file_data", "message"), model_tier="vision", timeout=90, concurrency=4),
+    ToolSpec("github_review", review_github, "tools/github_review.html", model_tier="heavy", cache_ttl=600),
+    ToolSpec("currency_converter", currency_tool, "tools/currency_converter.html", model_tier="none", timeout=15),
+    ToolSpec("youtube_summarizer", summarize_youtube, "tools/youtube_summarizer.html", timeout=120, concurrency=4, stream=stream_youtube_summary),
+    ToolSpec("password_generator", generate_password_tool, "tools/password_generator.html", model_tier="none", timeout=5),
+    ToolSpec("grammar_fixer", fix_grammar_tool, "tools/grammar_fixer.html", timeout=30, cache_ttl=600),
+    ToolSpec("interview_questions", generate_interview_questions, "tools/interview_questions.html", model_tier="heavy", cache_ttl=3600),
+    ToolSpec("mock_interviewer", handle_mock_interview, "tools/mock_interviewer.html", model_tier="heavy"),
+    ToolSpec("math_solver", solve_math_problem, "tools/math_solver.html", inputs=("file_data", "message"), model_tier="vision", timeout=90, concurrency=4),
+    ToolSpec("smart_todo", smart_todo_maker, "tools/smart_todo.html", model_tier="heavy"),
+    ToolSpec("resume_builder", build_pro_resume, "tools/resume_builder.html", model_tier="heavy"),
+    ToolSpec("sing_with_me", sing_with_me_tool, "tools/sing_with_me.html", inputs=("message", "context_history", "session_id"), needs_context=True, timeout=30),
+    ToolSpec("cold_email", cold_email_tool, "tools/cold_email.html", model_tier="heavy"),
+    ToolSpec("fitness_coach", fitness_coach_tool, "tools/fitness_coach.html", model_tier="heavy"),
+    ToolSpec("feynman_explainer", feynman_explainer_tool, "tools/feynman_explainer.html", model_tier="heavy", cache_ttl=3600),
+    ToolSpec("code_debugger", code_debugger_tool, "tools/code_debugger.html", model_tier="coding", timeout=90),
+    ToolSpec("movie_talker", movie_talker_tool, "tools/movie_talker.html", inputs=("message", "context_history"), model_tier="heavy", needs_context=True),
+    ToolSpec("anime_talker", anime_talker_tool, "tools/anime_talker.html", inputs=("message", "context_history"), model_tier="heavy", needs_context=True),
+    # Agent 5 LLM steps + scraping karta hai: chhota bulkhead taaki baaki tools ke slots na khaaye.
+    # Chat mode nahi: LLM ka likha Python exec karta hai aur public static/ mein files likhta hai,
+    # sandbox + admin/pro gate ke bina kisi user ko expose nahi karna
+    ToolSpec("agent", run_agent_task, model_tier="heavy", timeout=180, concurrency=2, queue_timeout=2, cost=8, chat_mode=False),
+])
+
+_tool_cache = OrderedDict()   # (tool, args) -> (expires_at, reply)
+
+def get_tool(mode):
+    spec = TOOLS.get(mode)
+    return spec if spec and spec.chat_mode else None
+
+async def run_tool(spec, **ctx):
+    """Timeout + bulkhead + cache ke saath tool chalata hai. Hamesha reply string return karta hai."""
+    spec.stats["calls"] += 1
+    cache_key = None
+    if spec.cache_ttl and not ctx.get("file_data") and not spec.needs_context:
+        cache_key = (spec.name, ctx.get("message"))
+        hit = _tool_cache.get(cache_key)
+        if hit and hit[0] > time.time():
+            spec.stats["cache_hits"] += 1
+            _tool_cache.move_to_end(cache_key)
+            metrics.observe("tool_seconds", 0.0, tool=spec.name, status="cache_hit")
+            return hit[1]
+
+    queued_at = time.perf_counter()
+    try: await asyncio.wait_for(spec.semaphore.acquire(), spec.queue_timeout)
+    except asyncio.TimeoutError:
+        spec.stats["rejected"] += 1
+        metrics.observe("tool_seconds", time.perf_counter() - queued_at, tool=spec.name, status="busy")
+        return BUSY_REPLY
+
+    started = time.perf_counter()
+    task = asyncio.ensure_future(spec.invoke(ctx))
+    def release(t):
+        spec.semaphore.release()
+        spec.stats["busy_seconds"] += time.perf_counter() - started
+        if not t.cancelled(): t.exception()   # timeout ke baad aaya error bhi "retrieved" mark ho jaaye
+    # Slot tabhi free hota hai jab kaam sach mein khatam ho (thread wale tools timeout ke baad bhi chalte rehte hain)
+    task.add_done_callback(release)
+
+    try: reply = await asyncio.wait_for(asyncio.shield(task), spec.timeout)
+    except asyncio.TimeoutError:
+        spec.stats["timeouts"] += 1
+        if not spec.blocking: task.cancel()
+        metrics.observe("tool_seconds", time.perf_counter() - queued_at, tool=spec.name, status="timeout")
+        return TIMEOUT_REPLY
+    except Exception:
+        spec.stats["errors"] += 1
+        metrics.observe("tool_seconds", time.perf_counter() - queued_at, tool=spec.name, status="error")
+        raise
+
+    # Queue wait bhi shaamil hai: user ko wahi latency dikhti hai
+    metrics.observe("tool_seconds", time.perf_counter() - queued_at, tool=spec.name, status="ok")
+
+    if cache_key and isinstance(reply, str) and not reply.startswith("⚠️"):
+        _tool_cache[cache_key] = (time.time() + spec.cache_ttl, reply)
+        while len(_tool_cache) > TOOL_CACHE_SIZE: _tool_cache.popitem(last=False)
+    return reply
+
+async def stream_tool(spec, **ctx):
+    """run_tool jaisa bulkhead + poore stream pe ek timeout. Yields (stage, text); busy/timeout pe ("error", reply)."""
+    spec.stats["calls"] += 1
+    queued_at = time.perf_counter()
+    try: await asyncio.wait_for(spec.semaphore.acquire(), spec.queue_timeout)
+    except asyncio.TimeoutError:
+        spec.stats["rejected"] += 1
+        metrics.observe("tool_seconds", time.perf_counter() - queued_at, tool=spec.name, status="busy")
+        yield "error", BUSY_REPLY
+        return
+
+    started, status = time.perf_counter(), "ok"
+    deadline = time.monotonic() + spec.timeout
+    stream = spec.stream(*[ctx.get(key) for key in spec.inputs])
+    try:
+        while True:
+            try: item = await asyncio.wait_for(stream.__anext__(), max(0, deadline - time.monotonic()))
+            except StopAsyncIteration: break
+            except asyncio.TimeoutError:
+                spec.stats["timeouts"] += 1
+                status = "timeout"
+                yield "error", TIMEOUT_REPLY
+                return
+            yield item
+    except Exception:
+        spec.stats["errors"] += 1
+        status = "error"
+        raise
+    finally:
+        # Client disconnect (generator close) pe bhi slot wapas
+        await stream.aclose()
+        spec.semaphore.release()
+        spec.stats["busy_seconds"] += time.perf_counter() - started
+        metrics.observe("tool_seconds", time.perf_counter() - queued_at, tool=spec.name, status=status)
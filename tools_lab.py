@@ -7,81 +7,49 @@ import os
 import random
 import string
 import requests
-import qrcode
 import io
 import base64
-import PyPDF2
-from youtube_transcript_api import YouTubeTranscriptApi
-from duckduckgo_search import DDGS
-import google.generativeai as genai
-from groq import Groq
-import PIL.Image
-import lyricsgenius
-from bs4 import BeautifulSoup 
 import sys
 from io import StringIO
 import re
+import time
+import asyncio
+import difflib
+from collections import OrderedDict
+from github_client import github_client
+from currency_engine import convert_currency_query
+from metrics import metrics, key_label
+from model_router import router
+from upstreams import HF_INFERENCE_URL, POLLINATIONS_IMAGE_URL, configure_genai
 
 # Load Keys
 HF_TOKEN = os.getenv("HF_TOKEN")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GENIUS_API_KEY = os.getenv("GENIUS_API_KEY")
 
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-
-def get_llm_response(prompt, model="llama-3.3-70b-versatile"):
-    try:
-        client = Groq(api_key=GROQ_API_KEY)
-        chat_completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model=model,
-        )
-        return chat_completion.choices[0].message.content
+# Heavy SDKs (genai, groq, PyPDF2, qrcode, PIL, bs4, lyricsgenius, DDGS, transcript API)
+# pehli baar use hone par import hote hain, taaki server jaldi start ho
+_genai = None
+
+def get_genai():
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        configure_genai(genai, GEMINI_API_KEY)
+        _genai = genai
+    return _genai
+
+def get_llm_response(prompt, task_type="heavy"):
+    # Pehle hamesha ek hi Groq model tha; ab router sabse tez healthy model chunta hai
+    try: return router.complete(task_type, [{"role": "user", "content": prompt}])
     except Exception as e:
         return f"⚠️ LLM Error: {str(e)}"
 
-# 🚀 Naya OpenRouter Helper Function
 # 🚀 SMART OPENROUTER HELPER (WITH TASK-BASED MODELS)
+# Task type (fast/heavy/coding/vision) ke candidates model_router.ROUTES mein hain;
+# random.choice ki jagah rolling p50/p95 + circuit breaker se choose hota hai.
 def get_openrouter_response(prompt, task_type="fast"):
-    try:
-        keys = os.getenv("OPENROUTER_API_KEY_POOL", "").split(",")
-        possible_keys = [k.strip() for k in keys if k.strip()]
-        key = random.choice(possible_keys) if possible_keys else os.getenv("OPENROUTER_API_KEY")
-        
-        if not key:
-            return "⚠️ API Key missing."
-            
-        # 🧠 Smart Model Selection Logic
-        if task_type == "coding":
-            # Best for logic and debugging
-            model = random.choice(["deepseek/deepseek-coder", "deepseek/deepseek-chat:free"])
-        elif task_type == "vision":
-            # For image/PDF tasks if Gemini fails
-            model = "nvidia/nemotron-mini-4b-instruct" # Using Nemotron family for vision fallback
-        elif task_type == "heavy":
-            # Deep reasoning, writing, emails, resumes
-            model = random.choice(["meta-llama/llama-3.1-8b-instruct:free", "qwen/qwen-2.5-7b-instruct:free"])
-        else:
-            # Fast/Lightweight tasks: Grammar, Summaries, Memory
-            model = random.choice(["zhipu/glm-4-flash", "stepfun/step-1-flash", "meta-llama/llama-3-8b-instruct:free"])
-            
-        headers = {
-            "Authorization": f"Bearer {key}",
-            "HTTP-Referer": "https://shanvika.ai", 
-            "X-Title": "Shanvika AI", 
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "model": model,
-            "messages": [{"role": "user", "content": prompt}]
-        }
-        
-        response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=data)
-        response_json = response.json()
-        return response_json['choices'][0]['message']['content']
+    try: return router.complete(task_type, [{"role": "user", "content": prompt}])
     except Exception as e:
         return f"⚠️ OpenRouter Error: {str(e)}"
 
@@ -89,18 +57,23 @@ def get_openrouter_response(prompt, task_type="fast"):
 # [CATEGORY] NEW: AI AGENT TOOLS (Web Surfer, Python, File)
 # ==================================================================================
 
+def clean_html_text(html, max_chars=6000):
+    # CPU wala hissa alag, taaki benchmarks/micro_bench.py bina network ke naap sake
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style", "nav", "footer"]):
+        script.decompose() 
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)[:max_chars]
+
 def scrape_website(url):
     try:
         headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        for script in soup(["script", "style", "nav", "footer"]):
-            script.decompose() 
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = '\n'.join(chunk for chunk in chunks if chunk)
-        return text[:6000] 
+        with metrics.span("upstream_seconds", provider="web", model="scrape"):
+            response = requests.get(url, headers=headers, timeout=10)
+        return clean_html_text(response.content)
     except Exception as e:
         return f"Error reading website: {str(e)}"
 
@@ -154,7 +127,7 @@ async def run_agent_task(query):
         - Do not talk, just command.
         """
         
-        command = get_llm_response(prompt).strip()
+        command = (await asyncio.to_thread(get_llm_response, prompt)).strip()
         history += f"\nStep {step+1}: AI Thought: {command}\n"
         print(f"🤖 Agent Step {step+1}: {command}")
 
@@ -162,22 +135,24 @@ async def run_agent_task(query):
         
         if command.startswith("SEARCH:"):
             q = command.replace("SEARCH:", "").strip()
-            res = DDGS().text(q, max_results=3)
+            from duckduckgo_search import DDGS
+            with metrics.span("upstream_seconds", provider="duckduckgo", model="text"):
+                res = await asyncio.to_thread(DDGS().text, q, max_results=3)
             result = str(res)
             
         elif command.startswith("SCRAPE:"):
             url = command.replace("SCRAPE:", "").strip()
-            result = scrape_website(url)
+            result = await asyncio.to_thread(scrape_website, url)
             
         elif command.startswith("PYTHON:"):
             code = command.replace("PYTHON:", "").strip()
             if code.startswith("```"): code = code.replace("```python", "").replace("```", "")
-            result = execute_python_code(code)
+            result = await asyncio.to_thread(execute_python_code, code)
             
         elif command.startswith("CREATE_FILE:"):
             parts = command.replace("CREATE_FILE:", "").strip().split("|", 1)
             if len(parts) == 2:
-                result = create_file_tool(parts[0], parts[1])
+                result = await asyncio.to_thread(create_file_tool, parts[0], parts[1])
             else:
                 result = "Error: Use format CREATE_FILE: filename|content"
                 
@@ -198,19 +173,21 @@ async def run_agent_task(query):
 async def generate_image_hf(prompt):
     enhanced_prompt = prompt
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        model = get_genai().GenerativeModel('gemini-1.5-flash')
         enhancement_request = f"Convert this simple user idea into a highly detailed, professional AI image generation prompt (photorealistic, 8k, lighting details). User idea: '{prompt}'. Return ONLY the prompt text, no intro."
-        res = model.generate_content(enhancement_request)
+        with metrics.span("upstream_seconds", provider="gemini", model="gemini-1.5-flash", key=key_label(GEMINI_API_KEY)):
+            res = await asyncio.to_thread(model.generate_content, enhancement_request)
         if res.text:
             enhanced_prompt = res.text
     except:
         pass 
 
-    API_URL = "[https://api-inference.huggingface.co/models/black-forest-labs/FLUX.1-dev](https://api-inference.huggingface.co/models/black-forest-labs/FLUX.1-dev)"
+    API_URL = f"{HF_INFERENCE_URL}/black-forest-labs/FLUX.1-dev"
     headers = {"Authorization": f"Bearer {HF_TOKEN}"}
     
     try:
-        response = requests.post(API_URL, headers=headers, json={"inputs": enhanced_prompt}, timeout=25)
+        with metrics.span("upstream_seconds", provider="huggingface", model="FLUX.1-dev", key=key_label(HF_TOKEN)):
+            response = await asyncio.to_thread(requests.post, API_URL, headers=headers, json={"inputs": enhanced_prompt}, timeout=25)
         
         if response.status_code == 200:
             image_bytes = response.content
@@ -227,7 +204,7 @@ async def generate_image_hf(prompt):
     except Exception as e:
         try:
             safe_prompt = enhanced_prompt.replace(" ", "%20")
-            pollinations_url = f"[https://image.pollinations.ai/prompt/](https://image.pollinations.ai/prompt/){safe_prompt}"
+            pollinations_url = f"{POLLINATIONS_IMAGE_URL}/prompt/{safe_prompt}"
             return f"""
             <div class="glass p-2 rounded-xl">
                 <p class="text-xs text-yellow-400 mb-2">⚠️ Server Busy. Switched to Backup AI.</p>
@@ -237,102 +214,314 @@ async def generate_image_hf(prompt):
         except:
             return "⚠️ All Image Servers are currently down. Please try again later."
 
+def extract_pdf_text(pdf_bytes, max_chars=3000):
+    # Prompt mein sirf pehle max_chars jaate hain, toh utna mil gaya toh baaki pages parse hi mat karo
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    parts, size = [], 0
+    for page in reader.pages:
+        page_text = page.extract_text() or ""
+        parts.append(page_text)
+        size += len(page_text)
+        if size >= max_chars: break
+    return "".join(parts)
+
 async def analyze_resume(file_data, user_msg):
     if not file_data: return "⚠️ Please upload a PDF resume first."
     try:
         header, encoded = file_data.split(",", 1)
-        pdf_bytes = base64.b64decode(encoded)
-        reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
-        text = ""
-        for page in reader.pages: text += page.extract_text()
+        text = await asyncio.to_thread(extract_pdf_text, base64.b64decode(encoded))
         prompt = f"Act as an expert HR Manager. Analyze this resume:\n{text[:3000]}...\nProvide Score, Strengths, Weaknesses, and ATS tips."
         
         # 🚀 Shifting to Gemini for large context
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        res = model.generate_content(prompt)
+        model = get_genai().GenerativeModel('gemini-1.5-flash')
+        with metrics.span("upstream_seconds", provider="gemini", model="gemini-1.5-flash", key=key_label(GEMINI_API_KEY)):
+            res = await asyncio.to_thread(model.generate_content, prompt)
         return res.text
     except Exception as e: return f"⚠️ Error: {str(e)}"
 
 async def review_github(url):
-    username = url.split("/")[-1]
+    username = url.strip().rstrip("/").split("/")[-1]
     if not username: return "⚠️ Invalid GitHub URL."
     try:
-        user_data = requests.get(f"[https://api.github.com/users/](https://api.github.com/users/){username}").json()
-        repos_data = requests.get(f"[https://api.github.com/users/](https://api.github.com/users/){username}/repos?sort=updated").json()
-        
-        if "message" in user_data: return "⚠️ User not found."
+        user_data, repos_data = await github_client.fetch_profile(username)
+        if not user_data: return "⚠️ User not found."
         top_repos = [r['name'] for r in repos_data[:5]]
         prompt = f"Review GitHub Profile: {username}, Bio: {user_data.get('bio')}, Repos: {user_data.get('public_repos')}, Recent: {', '.join(top_repos)}. Give rating and advice."
-        return get_llm_response(prompt) # Complex task, keeping Groq
+        return await asyncio.to_thread(get_llm_response, prompt) # Complex task: router ka "heavy" route
     except Exception as e: 
         return f"⚠️ Error: {str(e)}"
 
+# ==================================================================================
+# [CATEGORY] YOUTUBE SUMMARIZER (Transcript Cache + Map-Reduce)
+# ==================================================================================
+YT_CACHE_TTL = int(os.getenv("YT_CACHE_TTL", 6 * 3600))
+YT_CACHE_SIZE = int(os.getenv("YT_CACHE_SIZE", 200))
+YT_CHUNK_CHARS = int(os.getenv("YT_CHUNK_CHARS", 4000))
+YT_MAX_CHUNKS = int(os.getenv("YT_MAX_CHUNKS", 24))
+YT_MAP_CONCURRENCY = int(os.getenv("YT_MAP_CONCURRENCY", 4))
+
+_transcript_cache = OrderedDict()   # video_id -> (fetched_at, full_text)
+_yt_summary_cache = OrderedDict()   # video_id -> (created_at, summary)
+
+def _cache_get(cache, key):
+    item = cache.get(key)
+    if not item: return None
+    if time.time() - item[0] > YT_CACHE_TTL:
+        cache.pop(key, None)
+        return None
+    cache.move_to_end(key)
+    return item[1]
+
+def _cache_put(cache, key, value):
+    cache[key] = (time.time(), value)
+    cache.move_to_end(key)
+    while len(cache) > YT_CACHE_SIZE: cache.popitem(last=False)
+
+def extract_video_id(url):
+    match = re.search(r"(?:v=|youtu\.be/|shorts/|embed/)([A-Za-z0-9_-]{11})", url)
+    if match: return match.group(1)
+    url = url.strip()
+    return url if re.fullmatch(r"[A-Za-z0-9_-]{11}", url) else None
+
+async def get_youtube_transcript(video_id):
+    cached = _cache_get(_transcript_cache, video_id)
+    if cached is not None: return cached
+    # Transcript API blocking hai, isliye thread mein chalao
+    from youtube_transcript_api import YouTubeTranscriptApi
+    with metrics.span("upstream_seconds", provider="youtube", model="transcript"):
+        transcript_list = await asyncio.to_thread(YouTubeTranscriptApi.get_transcript, video_id)
+    full_text = " ".join([i['text'] for i in transcript_list])
+    _cache_put(_transcript_cache, video_id, full_text)
+    return full_text
+
+def split_transcript(text, chunk_chars=YT_CHUNK_CHARS):
+    # Word boundary pe todte hain taaki koi word beech mein na kate
+    chunks, current, size = [], [], 0
+    for word in text.split():
+        if size + len(word) + 1 > chunk_chars and current:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(word)
+        size += len(word) + 1
+    if current: chunks.append(" ".join(current))
+    if len(chunks) > YT_MAX_CHUNKS:
+        # Bahut lambi video: chunks ko merge karke limit mein laao, par poora transcript cover karo
+        group = -(-len(chunks) // YT_MAX_CHUNKS)
+        chunks = [" ".join(chunks[i:i + group]) for i in range(0, len(chunks), group)]
+    return chunks
+
+async def stream_youtube_summary(url):
+    """Yields (stage, text) tuples: 'partial' for each chunk summary, then 'final' (or 'error')."""
+    video_id = extract_video_id(url)
+    if not video_id:
+        yield "error", "⚠️ Invalid YouTube URL."
+        return
+
+    cached = _cache_get(_yt_summary_cache, video_id)
+    if cached is not None:
+        yield "final", cached
+        return
+
+    try: full_text = await get_youtube_transcript(video_id)
+    except Exception:
+        yield "error", "⚠️ Could not fetch transcript."
+        return
+
+    chunks = split_transcript(full_text)
+    if len(chunks) <= 1:
+        prompt = f"Summarize this YouTube video transcript into 5 key bullet points:\n{full_text}"
+        summary = await asyncio.to_thread(get_openrouter_response, prompt, "fast")
+        if not summary.startswith("⚠️"): _cache_put(_yt_summary_cache, video_id, summary)
+        yield "final", summary
+        return
+
+    # MAP: har chunk ka summary parallel mein (bounded concurrency)
+    semaphore = asyncio.Semaphore(YT_MAP_CONCURRENCY)
+    async def summarize_chunk(i, chunk):
+        async with semaphore:
+            prompt = f"This is part {i + 1} of {len(chunks)} of a YouTube video transcript. Summarize the key points of this part in 3-4 short bullet points:\n{chunk}"
+            return i, await asyncio.to_thread(get_openrouter_response, prompt, "fast")
+
+    partials = [None] * len(chunks)
+    for task in asyncio.as_completed([summarize_chunk(i, c) for i, c in enumerate(chunks)]):
+        i, part = await task
+        if part.startswith("⚠️"): continue
+        partials[i] = part
+        yield "partial", f"**Part {i + 1}/{len(chunks)}:**\n{part}"
+
+    notes = [f"Part {i + 1}:\n{p}" for i, p in enumerate(partials) if p]
+    if not notes:
+        yield "error", "⚠️ Could not summarize this video right now."
+        return
+
+    # REDUCE: saare part summaries ko final 5 bullet points mein
+    prompt = "These are summaries of consecutive parts of one YouTube video. Combine them into 5 key bullet points covering the whole video:\n\n" + "\n\n".join(notes)
+    summary = await asyncio.to_thread(get_openrouter_response, prompt, "fast")
+    if summary.startswith("⚠️"):
+        yield "error", summary
+        return
+    if len(notes) == len(chunks): _cache_put(_yt_summary_cache, video_id, summary)
+    yield "final", summary
+
 async def summarize_youtube(url):
-    try:
-        video_id = url.split("v=")[1].split("&")[0]
-        transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-        full_text = " ".join([i['text'] for i in transcript_list])
-        prompt = f"Summarize this YouTube video transcript into 5 key bullet points:\n{full_text[:4000]}..."
-        return get_openrouter_response(prompt, "fast")
-    except: return "⚠️ Could not fetch transcript."
+    result = "⚠️ Could not fetch transcript."
+    async for stage, text in stream_youtube_summary(url):
+        if stage != "partial": result = text
+    return result
 
 async def generate_interview_questions(role):
-    return get_llm_response(f"Generate 10 hard interview questions for {role}.")
+    return await asyncio.to_thread(get_llm_response, f"Generate 10 hard interview questions for {role}.")
 
 async def handle_mock_interview(msg):
-    return get_llm_response(f"You are an interviewer. User said: '{msg}'. Reply professionally.")
+    return await asyncio.to_thread(get_llm_response, f"You are an interviewer. User said: '{msg}'. Reply professionally.")
 
 async def solve_math_problem(file_data, query):
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        model = get_genai().GenerativeModel('gemini-1.5-flash')
         if file_data:
             header, encoded = file_data.split(",", 1)
+            import PIL.Image
             image = PIL.Image.open(io.BytesIO(base64.b64decode(encoded)))
-            response = model.generate_content(["Solve this math problem:", image])
+            with metrics.span("upstream_seconds", provider="gemini", model="gemini-1.5-flash", key=key_label(GEMINI_API_KEY)):
+                response = await asyncio.to_thread(model.generate_content, ["Solve this math problem:", image])
         else:
-            response = model.generate_content(f"Solve this math problem: {query}")
+            with metrics.span("upstream_seconds", provider="gemini", model="gemini-1.5-flash", key=key_label(GEMINI_API_KEY)):
+                response = await asyncio.to_thread(model.generate_content, f"Solve this math problem: {query}")
         return response.text
     except Exception as e: return f"⚠️ Math Error: {str(e)}"
 
 async def smart_todo_maker(raw_text):
-    return get_openrouter_response(f"Convert to To-Do List with priorities:\n{raw_text}", "heavy")
+    return await asyncio.to_thread(get_openrouter_response, f"Convert to To-Do List with priorities:\n{raw_text}", "heavy")
 
 async def generate_password_tool(req):
     chars = string.ascii_letters + string.digits + "!@#$%^&*"
     return f"🔐 `{ ''.join(random.choice(chars) for i in range(12)) }`"
 
-async def generate_qr_code(text):
+def qr_png_base64(text):
+    import qrcode
     qr = qrcode.make(text)
     buffered = io.BytesIO()
     qr.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
+    return base64.b64encode(buffered.getvalue()).decode()
+
+async def generate_qr_code(text):
+    # PNG encode CPU ka kaam hai; lambe text pe loop ko block na kare
+    img_str = await asyncio.to_thread(qr_png_base64, text)
     return f'<div class="flex justify-center p-4 bg-white rounded-xl w-fit mx-auto"><img src="data:image/png;base64,{img_str}" alt="QR Code" width="200"></div>'
 
 async def fix_grammar_tool(text):
-    return get_openrouter_response(f"Fix grammar and make professional:\n{text}", "fast") # 🚀 Shifted to OpenRouter
+    return await asyncio.to_thread(get_openrouter_response, f"Fix grammar and make professional:\n{text}", "fast") # 🚀 Shifted to OpenRouter
 
 async def generate_prompt_only(idea):
-    return get_llm_response(f"Write a professional AI image prompt for: '{idea}'")
+    return await asyncio.to_thread(get_llm_response, f"Write a professional AI image prompt for: '{idea}'")
 
 async def build_pro_resume(details):
-    return get_llm_response(f"Create a resume structure for: {details}")
+    return await asyncio.to_thread(get_llm_response, f"Create a resume structure for: {details}")
 
-async def sing_with_me_tool(user_line, history):
+# ==================================================================================
+# [CATEGORY] SING WITH ME (Session Song Lock + Lyrics Index)
+# ==================================================================================
+LYRICS_CACHE_SIZE = int(os.getenv("LYRICS_CACHE_SIZE", 100))
+SONG_SESSION_TTL = int(os.getenv("SONG_SESSION_TTL", 2 * 3600))
+LYRIC_MATCH_RATIO = float(os.getenv("LYRIC_MATCH_RATIO", 0.78))
+
+_genius_client = None
+_lyrics_cache = OrderedDict()    # song key -> {"title", "lines", "index"}
+_session_songs = OrderedDict()   # session_id -> {"song", "position", "at"}
+
+# Hinglish spelling variations ko ek jaisa bana do: "pyaar"/"pyar", "dil"/"dill", "mein"/"me"
+_SPELLING_RULES = [("ee", "i"), ("oo", "u"), ("aa", "a"), ("w", "v"), ("ph", "f"), ("q", "k"), ("z", "j"), ("ai", "e"), ("ein", "e"), ("yn", "n")]
+
+def normalize_lyric(text):
+    text = re.sub(r"[^\w\s]", " ", text.lower().replace("'", ""))
+    words = []
+    for word in text.split():
+        for old, new in _SPELLING_RULES: word = word.replace(old, new)
+        word = re.sub(r"(.)\1+", r"\1", word)      # double letters collapse
+        if len(word) > 2: word = word.rstrip("h")   # "hai"/"haih", "toh"/"to"
+        words.append(word)
+    return " ".join(words)
+
+def get_genius():
+    global _genius_client
+    if _genius_client is None and GENIUS_API_KEY:
+        import lyricsgenius
+        _genius_client = lyricsgenius.Genius(GENIUS_API_KEY, timeout=10, retries=1, verbose=False, remove_section_headers=True)
+    return _genius_client
+
+def build_lyrics_entry(song):
+    lines = [l.strip() for l in song.lyrics.split('\n') if l.strip() and not l.strip().startswith("[")]
+    normalized = [normalize_lyric(l) for l in lines]
+    index = {}
+    for i, norm in enumerate(normalized): index.setdefault(norm, []).append(i)
+    return {"title": song.title, "lines": lines, "normalized": normalized, "index": index}
+
+async def fetch_song_for_line(user_line):
+    genius = get_genius()
+    if not genius: return None
+    with metrics.span("upstream_seconds", provider="genius", model="search_song", key=key_label(GENIUS_API_KEY)):
+        song = await asyncio.to_thread(genius.search_song, user_line)
+    if not song or not song.lyrics: return None
+    key = f"{song.title}|{getattr(song, 'artist', '')}".lower()
+    if key not in _lyrics_cache: _lyrics_cache[key] = build_lyrics_entry(song)
+    _lyrics_cache.move_to_end(key)
+    while len(_lyrics_cache) > LYRICS_CACHE_SIZE: _lyrics_cache.popitem(last=False)
+    return key
+
+def find_line(entry, user_line, after=-1):
+    """User ki line lyrics mein kahan hai? Exact index -> substring -> fuzzy. Last position ke baad wali occurrence prefer karte hain."""
+    norm = normalize_lyric(user_line)
+    if not norm: return None
+    def pick(positions):
+        positions = [p for p in positions if p + 1 < len(entry["lines"])]
+        if not positions: return None
+        return next((p for p in positions if p > after), positions[0])
+
+    hit = pick(entry["index"].get(norm, []))
+    if hit is not None: return hit
+    hit = pick([i for i, line in enumerate(entry["normalized"]) if norm in line or (len(line) > 8 and line in norm)])
+    if hit is not None: return hit
+    scored = [(difflib.SequenceMatcher(None, norm, line).ratio(), i) for i, line in enumerate(entry["normalized"])]
+    best = [i for ratio, i in sorted(scored, reverse=True) if ratio >= LYRIC_MATCH_RATIO]
+    return pick(best)
+
+def _prune_song_sessions():
+    cutoff = time.time() - SONG_SESSION_TTL
+    while _session_songs and next(iter(_session_songs.values()))["at"] < cutoff: _session_songs.popitem(last=False)
+
+async def sing_with_me_tool(user_line, history, session_id=None):
     if GENIUS_API_KEY:
         try:
-            genius = lyricsgenius.Genius(GENIUS_API_KEY)
-            song = genius.search_song(user_line)
-            if song:
-                lyrics = song.lyrics.split('\n')
-                for i, line in enumerate(lyrics):
-                    if user_line.lower() in line.lower() and i+1 < len(lyrics):
-                        return f"🎶 {lyrics[i+1]} 🎶\n(Song: {song.title})"
-        except: pass
-    return get_llm_response(f"We are singing. User sang: '{user_line}'. Sing the next line nicely.")
+            _prune_song_sessions()
+            pinned = _session_songs.get(session_id) if session_id else None
+            candidates = []
+            if pinned and pinned["song"] in _lyrics_cache: candidates.append((pinned["song"], pinned["position"]))
+            for attempt in range(2):
+                for key, after in candidates:
+                    entry = _lyrics_cache[key]
+                    pos = find_line(entry, user_line, after)
+                    if pos is not None:
+                        if session_id:
+                            # Song ko session pe pin kar do, agli line turant milegi
+                            _session_songs[session_id] = {"song": key, "position": pos + 1, "at": time.time()}
+                            _session_songs.move_to_end(session_id)
+                        return f"🎶 {entry['lines'][pos + 1]} 🎶\n(Song: {entry['title']})"
+                if attempt == 0:
+                    # Pinned song mein nahi mila (ya koi pinned nahi) -> ek baar Genius search
+                    key = await fetch_song_for_line(user_line)
+                    if not key or (pinned and key == pinned["song"]): break
+                    candidates = [(key, -1)]
+        except Exception as e: print(f"Lyrics Error: {e}")
+    return await asyncio.to_thread(get_llm_response, f"We are singing. User sang: '{user_line}'. Sing the next line nicely.")
 
 async def currency_tool(query):
+    # Pehle local rate table se (microseconds), parse na ho tabhi web search
+    local = await convert_currency_query(query)
+    if local: return local
     try:
-        res = DDGS().text(f"convert {query}", max_results=1)
+        from duckduckgo_search import DDGS
+        res = await asyncio.to_thread(DDGS().text, f"convert {query}", max_results=1)
         return f"💱 **Conversion:**\n{res[0]['body']}" if res else "⚠️ Error."
     except: return "⚠️ Service unavailable."
 
@@ -342,7 +531,7 @@ async def cold_email_tool(details):
     The goal is to get a response from a hiring manager or recruiter for a high-paying remote tech job (80+ LPA target) or a foreign opportunity. 
     Keep it concise, compelling, and action-oriented. Do not include placeholder brackets like [Your Name] if the user has provided the info.
     """
-    return get_llm_response(prompt)
+    return await asyncio.to_thread(get_llm_response, prompt)
 
 async def fitness_coach_tool(query):
     prompt = f"""
@@ -350,7 +539,7 @@ async def fitness_coach_tool(query):
     The user says: "{query}"
     Provide a structured, actionable workout routine or diet advice. Use motivating language, bold headings, and bullet points to make it easy to read.
     """
-    return get_llm_response(prompt)
+    return await asyncio.to_thread(get_llm_response, prompt)
 
 async def feynman_explainer_tool(concept):
     prompt = f"""
@@ -358,7 +547,7 @@ async def feynman_explainer_tool(concept):
     Explain it so simply that a 10-year-old could understand it. Use relatable real-life analogies. 
     If it's an Artificial Intelligence, Machine Learning, or B.Tech Math concept, make it engaging and strip away all the confusing jargon.
     """
-    return get_llm_response(prompt)
+    return await asyncio.to_thread(get_llm_response, prompt)
 
 async def code_debugger_tool(code_input):
     prompt = f"""
@@ -368,7 +557,7 @@ async def code_debugger_tool(code_input):
     2. Explain briefly why it happened.
     3. Provide the fully corrected and optimized code using markdown code blocks.
     """
-    return get_openrouter_response(prompt, "coding")
+    return await asyncio.to_thread(get_openrouter_response, prompt, "coding")
 
 async def movie_talker_tool(message, context_history):
     prompt = f"""
@@ -378,7 +567,7 @@ async def movie_talker_tool(message, context_history):
     Context of conversation: {context_history}
     User: {message}
     """
-    return get_llm_response(prompt)
+    return await asyncio.to_thread(get_llm_response, prompt)
 
 async def anime_talker_tool(message, context_history):
     prompt = f"""
@@ -388,7 +577,7 @@ async def anime_talker_tool(message, context_history):
     Context of conversation: {context_history}
     User: {message}
     """
-    return get_llm_response(prompt)
+    return await asyncio.to_thread(get_llm_response, prompt)
 
 async def generate_flashcards_tool(topic):
     prompt = f"""
@@ -403,7 +592,7 @@ async def generate_flashcards_tool(topic):
     Do not add any other text, explanation, or markdown formatting outside this JSON array.
     """
     try:
-        response = get_llm_response(prompt)
+        response = await asyncio.to_thread(get_llm_response, prompt)
         if response.startswith("```"):
             response = response.replace("```json", "").replace("```", "").strip()
         return response
@@ -0,0 +1,25 @@
+# ==================================================================================
+#  FILE: upstreams.py
+#  DESCRIPTION: Upstream Provider Endpoints (Env Overridable, e.g. for Local Load Tests)
+# ==================================================================================
+#  Default = real providers. benchmarks/load_test.py inhe local fake servers pe point karta hai.
+#  Groq SDK apna base URL khud GROQ_BASE_URL env se padhta hai.
+# ==================================================================================
+
+import os
+
+OPENROUTER_CHAT_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1").rstrip("/") + "/chat/completions"
+BREVO_EMAIL_URL = os.getenv("BREVO_BASE_URL", "https://api.brevo.com").rstrip("/") + "/v3/smtp/email"
+HF_INFERENCE_URL = os.getenv("HF_INFERENCE_URL", "https://api-inference.huggingface.co/models").rstrip("/")
+POLLINATIONS_URL = os.getenv("POLLINATIONS_URL", "https://pollinations.ai").rstrip("/")
+POLLINATIONS_IMAGE_URL = os.getenv("POLLINATIONS_IMAGE_URL", "https://image.pollinations.ai").rstrip("/")
+# Set ho toh Gemini REST transport isi host pe jaata hai
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+# Set ho toh list/create index skip karke seedha is data-plane host se connect
+PINECONE_HOST = os.getenv("PINECONE_HOST")
+
+def configure_genai(genai, api_key):
+    if GEMINI_API_ENDPOINT:
+        genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+    elif api_key:
+        genai.configure(api_key=api_key)
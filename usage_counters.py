@@ -0,0 +1,97 @@
+# ==================================================================================
+#  FILE: usage_counters.py
+#  DESCRIPTION: In-Memory Usage Counters + Batched Hourly/Daily Rollups (bulk_write)
+# ==================================================================================
+
+import asyncio
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", 5))
+# Hourly buckets itne din baad TTL se hat jaate hain; daily buckets hamesha rehte hain
+USAGE_HOURLY_RETENTION_DAYS = int(os.getenv("USAGE_HOURLY_RETENTION_DAYS", 30))
+
+GRANULARITIES = {
+    "hour": lambda ts: ts.replace(minute=0, second=0, microsecond=0),
+    "day": lambda ts: ts.replace(hour=0, minute=0, second=0, microsecond=0),
+}
+
+def bucket_id(granularity, bucket, tool, tier):
+    # Deterministic _id: har worker same doc pe $inc kare, upsert race mein duplicate na bane
+    return f"{granularity}|{bucket.isoformat()}|{tool}|{tier}"
+
+class UsageCounter:
+    """Har worker apne counters memory mein rakhta hai aur har kuch seconds mein ek bulk_write karta hai.
+
+    Doc shape: {_id, granularity: hour|day, bucket, tool, tier, count [, expires_at]}
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._pending = Counter()   # (hour_bucket, tool, tier) -> count
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("granularity", 1), ("bucket", -1)])
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def incr(self, tool, tier="free", n=1):
+        """Request path pe sirf dict update."""
+        self._pending[(GRANULARITIES["hour"](datetime.utcnow()), tool, tier)] += n
+
+    def _ops(self, pending):
+        rolled = Counter()
+        for (hour, tool, tier), count in pending.items():
+            rolled[("hour", hour, tool, tier)] += count
+            rolled[("day", GRANULARITIES["day"](hour), tool, tier)] += count
+        ops = []
+        for (granularity, bucket, tool, tier), count in rolled.items():
+            on_insert = {"granularity": granularity, "bucket": bucket, "tool": tool, "tier": tier}
+            if granularity == "hour": on_insert["expires_at"] = bucket + timedelta(days=USAGE_HOURLY_RETENTION_DAYS)
+            ops.append(UpdateOne({"_id": bucket_id(granularity, bucket, tool, tier)}, {"$inc": {"count": count}, "$setOnInsert": on_insert}, upsert=True))
+        return ops
+
+    async def flush(self):
+        if not self._pending: return 0
+        pending, self._pending = self._pending, Counter()
+        ops = self._ops(pending)
+        try: await self.collection.bulk_write(ops, ordered=False)
+        except Exception as e:
+            # Counts khone nahi dete: agli flush mein phir try
+            print(f"Usage Flush Error: {e}")
+            self._pending.update(pending)
+            return 0
+        return len(ops)
+
+    async def flush_forever(self, interval=USAGE_FLUSH_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    async def top_tools(self, days=30, limit=6):
+        since = GRANULARITIES["day"](datetime.utcnow()) - timedelta(days=days - 1)
+        return await self.collection.aggregate([
+            {"$match": {"granularity": "day", "bucket": {"$gte": since}}},
+            {"$group": {"_id": "$tool", "count": {"$sum": "$count"}}},
+            {"$sort": {"count": -1}},
+            {"$limit": limit},
+            {"$project": {"_id": 0, "tool_name": "$_id", "count": 1}},
+        ]).to_list(length=limit)
+
+    async def series(self, granularity="hour", points=24, tool=None):
+        """Admin chart ke liye: har bucket ka free/pro total, khaali buckets 0 ke saath."""
+        floor = GRANULARITIES[granularity]
+        step = timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+        end = floor(datetime.utcnow())
+        buckets = [end - step * i for i in range(points - 1, -1, -1)]
+        match = {"granularity": granularity, "bucket": {"$gte": buckets[0]}}
+        if tool: match["tool"] = tool
+        rows = await self.collection.aggregate([
+            {"$match": match},
+            {"$group": {"_id": {"bucket": "$bucket", "tier": "$tier"}, "count": {"$sum": "$count"}}},
+        ]).to_list(length=None)
+        totals = {}
+        for row in rows: totals[(row["_id"]["bucket"], row["_id"]["tier"])] = row["count"]
+        return [{"bucket": b, "free": totals.get((b, "free"), 0), "pro": totals.get((b, "pro"), 0)} for b in buckets]
@@ -0,0 +1,256 @@
+# ==================================================================================
+#  FILE: vector_index.py
+#  DESCRIPTION: Per-User Pinecone Namespaces (Batched Reindex with Checkpoints + Consistency Check)
+# ==================================================================================
+#  Usage:
+#    python vector_index.py reindex [--batch 200] [--concurrency 4] [--email x] [--restart] [--purge-legacy]
+#    python vector_index.py check [--email x] [--fix] [--json]
+#
+#  - Pehle saari memories ek shared namespace mein thi aur har query {"email": ...} metadata
+#    filter lagati thi: index bada hota gaya, query slow. Ab har user ka apna namespace
+#    (email ka hash), query sirf usi user ke vectors dekhti hai.
+#  - reindex: Mongo memories _id order mein stream, Gemini batch embed, namespace-wise batch
+#    upserts, N batches ek saath (semaphore). Checkpoint sirf lagatar complete hue batches tak
+#    aage badhta hai, toh crash ke baad wahi se resume (upserts idempotent hain).
+#  - check: Mongo ($group count per email) vs describe_index_stats (per namespace count).
+#    Pinecone ke stats eventually consistent hain; abhi-abhi likhe vectors thodi der baad dikhte hain.
+# ==================================================================================
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from memory_store import vector_id
+
+# Migration ke dauraan: naye namespace mein kuch na mile toh purane shared namespace pe filter query
+PINECONE_LEGACY_FALLBACK = os.getenv("PINECONE_LEGACY_FALLBACK", "1") == "1"
+PINECONE_INDEX_NAME = "shanvika-memory"
+EMBED_MODEL = "models/embedding-001"
+EMBED_BATCH = 100    # Gemini batchEmbedContents ki per-call limit
+UPSERT_BATCH = 200   # 768-dim vectors: 200 ~1.5MB, Pinecone ki 2MB request limit ke andar
+DELETE_BATCH = 1000
+REINDEX_BATCH = int(os.getenv("REINDEX_BATCH", 200))
+REINDEX_CONCURRENCY = int(os.getenv("REINDEX_CONCURRENCY", 4))
+REINDEX_RETRIES = 3
+
+def namespace_for(email):
+    # Email seedha namespace naam mein nahi (stats/console mein dikhta hai)
+    return "u-" + hashlib.sha256(email.encode()).hexdigest()[:32]
+
+# ==================================================================================
+# [CATEGORY] SYNC INDEX HELPERS (asyncio.to_thread se call karo)
+# ==================================================================================
+def embed_batch(texts, api_key=None):
+    """Ek Gemini call mein poora batch (max EMBED_BATCH). Returns vectors same order mein."""
+    import google.generativeai as genai
+    from upstreams import configure_genai
+    configure_genai(genai, api_key)
+    result = genai.embed_content(model=EMBED_MODEL, content=list(texts), task_type="retrieval_document")
+    return result["embedding"]
+
+def upsert_vectors(index, email, vectors):
+    """vectors: [(id, values, metadata), ...] -> user ke namespace mein UPSERT_BATCH ke chunks."""
+    namespace = namespace_for(email)
+    for i in range(0, len(vectors), UPSERT_BATCH):
+        index.upsert(vectors=vectors[i:i + UPSERT_BATCH], namespace=namespace)
+
+def delete_vectors(index, email, ids):
+    namespace = namespace_for(email)
+    for i in range(0, len(ids), DELETE_BATCH):
+        index.delete(ids=ids[i:i + DELETE_BATCH], namespace=namespace)
+        # Purana shared-namespace copy bhi hatao, warna legacy fallback usko wapas le aata
+        if PINECONE_LEGACY_FALLBACK: index.delete(ids=ids[i:i + DELETE_BATCH])
+
+def query_memories(index, email, vector, top_k=3):
+    res = index.query(vector=vector, top_k=top_k, include_metadata=True, namespace=namespace_for(email))
+    matches = res["matches"]
+    if not matches and PINECONE_LEGACY_FALLBACK:
+        res = index.query(vector=vector, top_k=top_k, include_metadata=True, filter={"email": email})
+        matches = res["matches"]
+    return [m["metadata"]["text"] for m in matches if m.get("metadata")]
+
+def namespace_counts(index):
+    # SDK versions: object (namespaces -> NamespaceSummary) ya plain dict
+    stats = index.describe_index_stats()
+    namespaces = stats.get("namespaces", {}) if isinstance(stats, dict) else getattr(stats, "namespaces", None) or {}
+    counts = {}
+    for name, summary in namespaces.items():
+        counts[name] = summary.get("vector_count", 0) if isinstance(summary, dict) else getattr(summary, "vector_count", 0)
+    return counts
+
+# ==================================================================================
+# [CATEGORY] REINDEX
+# ==================================================================================
+class VectorReindexer:
+    def __init__(self, memories, checkpoints, index, embed):
+        self.memories = memories
+        self.checkpoints = checkpoints
+        self.index = index
+        self.embed = embed   # sync fn(texts) -> [vector, ...]
+
+    async def _retry(self, fn, *args, **kwargs):
+        for attempt in range(REINDEX_RETRIES):
+            try: return await asyncio.to_thread(fn, *args, **kwargs)
+            except Exception:
+                if attempt == REINDEX_RETRIES - 1: raise
+                await asyncio.sleep(2 ** attempt + random.random())
+
+    async def _index_batch(self, docs, purge_legacy):
+        vectors = []
+        for i in range(0, len(docs), EMBED_BATCH):
+            chunk = docs[i:i + EMBED_BATCH]
+            vectors.extend(await self._retry(self.embed, [d["text"] for d in chunk]))
+        by_user = defaultdict(list)
+        for doc, values in zip(docs, vectors):
+            if values: by_user[doc["email"]].append((vector_id(doc["email"], doc["text"]), values, {"text": doc["text"], "email": doc["email"]}))
+        for email, user_vectors in by_user.items():
+            await self._retry(upsert_vectors, self.index, email, user_vectors)
+            if purge_legacy:
+                await self._retry(self.index.delete, ids=[v[0] for v in user_vectors])
+        return sum(map(len, by_user.values()))
+
+    async def run(self, name="reindex", batch=REINDEX_BATCH, concurrency=REINDEX_CONCURRENCY, email=None, restart=False, purge_legacy=False, log=print):
+        """Returns checkpoint doc. Dobara chalao toh last_id ke baad se resume (restart=True se shuru se)."""
+        # Email-scoped run ka apna checkpoint: uska "done"/last_id full run ko skip na karaye
+        name = f"{name}:{email}" if email else name
+        if restart: await self.checkpoints.delete_one({"_id": name})
+        state = await self.checkpoints.find_one({"_id": name}) or {}
+        if state.get("status") == "done" and not restart:
+            log(f"'{name}' pehle hi complete hai (--restart se dobara chalao)")
+            return state
+        now = datetime.utcnow()
+        await self.checkpoints.update_one({"_id": name}, {"$set": {"status": "running", "email": email, "updated_at": now}, "$setOnInsert": {"started_at": now, "upserted": 0, "batches": 0}}, upsert=True)
+
+        query = {"email": email} if email else {}
+        if state.get("last_id"): query["_id"] = {"$gt": state["last_id"]}
+        semaphore = asyncio.Semaphore(concurrency)
+        last_ids, finished, failed = {}, {}, []
+        committed, started = -1, time.perf_counter()
+
+        async def work(n, docs):
+            try: finished[n] = await self._index_batch(docs, purge_legacy)
+            except Exception as e:
+                failed.append((n, e))
+            finally: semaphore.release()
+
+        async def commit():
+            # Sirf lagatar complete batches: 0,1,2 done aur 4 done par 3 nahi -> checkpoint 2 pe
+            nonlocal committed
+            upserted = batches = 0
+            while committed + 1 in finished:
+                committed += 1
+                upserted += finished.pop(committed)
+                batches += 1
+            if batches:
+                await self.checkpoints.update_one({"_id": name}, {"$set": {"last_id": last_ids[committed], "updated_at": datetime.utcnow()}, "$inc": {"upserted": upserted, "batches": batches}})
+
+        tasks, docs, n = [], [], 0
+        async for doc in self.memories.find(query, {"email": 1, "text": 1}).sort("_id", 1).batch_size(batch):
+            docs.append(doc)
+            if len(docs) < batch: continue
+            await semaphore.acquire()   # concurrency bhar gayi toh Mongo se aage padhna bhi ruk jaata hai
+            if failed: semaphore.release(); break
+            last_ids[n] = docs[-1]["_id"]
+            tasks.append(asyncio.create_task(work(n, docs)))
+            docs, n = [], n + 1
+            await commit()
+            if n % 10 == 0: log(f"  batch {n}: {time.perf_counter() - started:.1f}s")
+        if docs and not failed:
+            await semaphore.acquire()
+            last_ids[n] = docs[-1]["_id"]
+            tasks.append(asyncio.create_task(work(n, docs)))
+        await asyncio.gather(*tasks)
+        await commit()
+
+        status = "failed" if failed else "done"
+        update = {"status": status, "updated_at": datetime.utcnow(), "duration_s": round(time.perf_counter() - started, 3)}
+        if failed:
+            first, error = min(failed, key=lambda f: f[0])
+            update["error"] = f"batch {first}: {error}"[:500]
+        await self.checkpoints.update_one({"_id": name}, {"$set": update})
+        return await self.checkpoints.find_one({"_id": name})
+
+# ==================================================================================
+# [CATEGORY] CONSISTENCY CHECK
+# ==================================================================================
+async def check_consistency(memories, index, email=None):
+    """Per user: Mongo memories count vs Pinecone namespace vector count."""
+    pipeline = ([{"$match": {"email": email}}] if email else []) + [{"$group": {"_id": "$email", "count": {"$sum": 1}}}]
+    expected = {row["_id"]: row["count"] async for row in memories.aggregate(pipeline)}
+    actual = await asyncio.to_thread(namespace_counts, index)
+    mismatched = []
+    for user_email, count in sorted(expected.items()):
+        in_index = actual.pop(namespace_for(user_email), 0)
+        if in_index != count: mismatched.append({"email": user_email, "mongo": count, "pinecone": in_index})
+    # Bache hue namespaces: jinki Mongo mein ek bhi memory nahi (email filter pe sirf woh user dekha)
+    actual.pop("", None)
+    orphans = {} if email else {ns: c for ns, c in actual.items() if c}
+    return {"checked": len(expected), "ok": len(expected) - len(mismatched), "mismatched": mismatched, "orphan_namespaces": orphans}
+
+async def fix_mismatches(reindexer, report, log=print):
+    # Namespace khaali karke sirf us user ka reindex: stale/extra vectors bhi saaf
+    for row in report["mismatched"]:
+        try: await asyncio.to_thread(reindexer.index.delete, delete_all=True, namespace=namespace_for(row["email"]))
+        except Exception as e: log(f"  namespace clear skipped ({row['email']}): {e}")
+        state = await reindexer.run(name="fix", email=row["email"], restart=True, log=log)
+        log(f"  {row['email']}: {state.get('status')} ({state.get('upserted', 0)} vectors)")
+    for ns in report["orphan_namespaces"]:
+        await asyncio.to_thread(reindexer.index.delete, delete_all=True, namespace=ns)
+        log(f"  orphan namespace {ns} cleared")
+
+# ==================================================================================
+# [CATEGORY] CLI
+# ==================================================================================
+def connect_index():
+    from pinecone import Pinecone
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    host = os.getenv("PINECONE_HOST")
+    return pc.Index(host=host) if host else pc.Index(PINECONE_INDEX_NAME)
+
+def cli_embedder():
+    keys = [k.strip() for k in os.getenv("GEMINI_API_KEY_POOL", "").split(",") if k.strip()] or [os.getenv("GEMINI_API_KEY")]
+    return lambda texts: embed_batch(texts, random.choice(keys))
+
+async def main():
+    parser = argparse.ArgumentParser(description="Pinecone per-user namespaces: bulk reindex + consistency check")
+    sub = parser.add_subparsers(dest="command", required=True)
+    reindex = sub.add_parser("reindex", help="Mongo memories -> per-user namespaces (resumable)")
+    reindex.add_argument("--name", default="reindex", help="checkpoint id (alag naam = alag run; --email ho toh name:email)")
+    reindex.add_argument("--batch", type=int, default=REINDEX_BATCH)
+    reindex.add_argument("--concurrency", type=int, default=REINDEX_CONCURRENCY)
+    reindex.add_argument("--email", help="sirf ek user")
+    reindex.add_argument("--restart", action="store_true", help="checkpoint ignore karke shuru se")
+    reindex.add_argument("--purge-legacy", action="store_true", help="shared namespace se purane vectors bhi delete")
+    check = sub.add_parser("check", help="Mongo vs Pinecone counts per user")
+    check.add_argument("--email")
+    check.add_argument("--fix", action="store_true", help="mismatched users ka namespace rebuild, orphan namespaces delete")
+    check.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+    db = AsyncIOMotorClient(os.getenv("MONGO_URL")).shanvika_db
+    index = connect_index()
+    reindexer = VectorReindexer(db.memories, db.vector_reindex, index, cli_embedder())
+
+    if args.command == "reindex":
+        state = await reindexer.run(args.name, args.batch, args.concurrency, args.email, args.restart, args.purge_legacy)
+        print(f"{state['status']}: {state.get('upserted', 0)} vectors in {state.get('batches', 0)} batches ({state.get('duration_s', 0)}s)")
+        if state.get("error"): print(f"⚠️ {state['error']} -> dobara chalao, checkpoint se resume hoga")
+        return 0 if state["status"] == "done" else 1
+
+    report = await check_consistency(db.memories, index, args.email)
+    if args.json: print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['ok']}/{report['checked']} users consistent, {len(report['orphan_namespaces'])} orphan namespaces")
+        for row in report["mismatched"][:50]: print(f"  {row['email']}: mongo={row['mongo']} pinecone={row['pinecone']}")
+    if args.fix and (report["mismatched"] or report["orphan_namespaces"]): await fix_mismatches(reindexer, report)
+    return 0 if not report["mismatched"] else 1
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))